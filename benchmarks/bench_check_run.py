@@ -0,0 +1,198 @@
+"""
+Бенчмарк: повний запуск TenderMonitor.check_new_tenders без мережі
+
+Stub Prozorro API і Telegram Bot API працює в окремому процесі, тож час
+і пікова пам'ять (RSS) вимірюються лише для монітора. Кожен запуск
+починається з порожнього сховища. З --workers N монітор працює як
+координатор, а деталі завантажують N процесів-виконавців (кожен з
+--concurrency паралельних запитів).
+
+Запуск:
+    python benchmarks/bench_check_run.py [--tenders 2000] [--latency 0.02]
+        [--error-rate 0] [--runs 3] [--storage json|sqlite] [--workers 0]
+        [--gzip] [--no-prefetch] [--json results.json] [--max-seconds 10]
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_server import StubServer, build_tenders
+
+# Вікно сканування монітора - 2 години; всі синтетичні тендери мають у нього влізти
+WINDOW_SECONDS = 7000
+
+
+def serve(conn, tenders: int, latency: float, error_rate: float, page_size: int, compress: bool):
+    """Процес stub-сервера: команди 'reset' / 'stats' / 'stop' через pipe"""
+    step = min(5.0, WINDOW_SECONDS / max(1, tenders))
+    stub = StubServer(build_tenders(tenders, step_seconds=step), latency=latency,
+                      error_rate=error_rate, page_size=page_size, compress=compress).start()
+    conn.send(stub.base_url)
+
+    while True:
+        command = conn.recv()
+        if command == 'reset':
+            stub.reset_stats()
+            conn.send(True)
+        elif command == 'stats':
+            conn.send(stub.stats())
+        else:
+            stub.stop()
+            conn.send(True)
+            return
+
+
+def expected_notifications(tenders: int) -> int:
+    """Скільки сповіщень має бути (див. build_tenders: кожен 10-й, крім reporting)"""
+    return sum(1 for i in range(tenders) if i % 10 == 0 and i % 3)
+
+
+def configure_env(base_url: str, args):
+    """Спрямувати монітор на stub (шляхи сховища задає run_once)"""
+    os.environ.update({
+        'PROZORRO_API_URL': f'{base_url}/api/2.5/tenders',
+        'PROZORRO_REQUEST_INTERVAL': '0',
+        'PROZORRO_MAX_CONCURRENCY': str(args.concurrency),
+        'PROZORRO_FEED_PREFETCH': '0' if args.no_prefetch else '1',
+        'TELEGRAM_API_URL': base_url,
+        'TELEGRAM_BOT_TOKEN': 'bench',
+        'TELEGRAM_CHAT_ID': '1',
+        'TELEGRAM_RATE_PER_MINUTE': '600000',
+        'TELEGRAM_BURST': '1000',
+        'TELEGRAM_DIGEST': '1' if args.digest else '0',
+        'DETAIL_CACHE_DIR': '',
+        'FEED_MODE': args.mode,
+        'STORAGE_BACKEND': args.storage,
+        'MATCH_RULES_FILE': '',
+        'SUBSCRIPTIONS_FILE': '',
+        'PROCESSED_TENDERS_BACKUP': '',
+        'SEARCH_INDEX_PATH': '',
+        'WORK_QUEUE_PATH': '',
+    })
+
+
+def run_once(conn, args) -> dict:
+    """Один запуск перевірки з порожнім сховищем"""
+    from src.scheduler import TenderMonitor
+    from src.work_queue import _worker_process
+
+    conn.send('reset')
+    conn.recv()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ['STORAGE_PATH'] = os.path.join(workdir, 'processed_tenders.json')
+        os.environ['STORAGE_DB_PATH'] = os.path.join(workdir, 'tenders.db')
+        workers = []
+        if args.workers:
+            os.environ['WORK_QUEUE_PATH'] = os.path.join(workdir, 'work_queue.db')
+            workers = [multiprocessing.Process(target=_worker_process, args=(os.environ['WORK_QUEUE_PATH'], 120),
+                                               daemon=True)
+                       for _ in range(args.workers)]
+            for worker in workers:
+                worker.start()
+
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        started = time.perf_counter()
+        try:
+            with output:
+                monitor = TenderMonitor()
+                monitor.check_new_tenders()
+            elapsed = time.perf_counter() - started
+        finally:
+            for worker in workers:
+                worker.terminate()
+                worker.join()
+
+        if hasattr(monitor.storage, 'close'):
+            monitor.storage.close()
+
+    conn.send('stats')
+    stats = conn.recv()
+    return {
+        'wall_seconds': round(elapsed, 3),
+        'feed_requests': stats['requests'].get('feed', 0),
+        'detail_requests': stats['requests'].get('detail', 0),
+        'telegram_requests': stats['requests'].get('telegram', 0),
+        'injected_errors': stats['requests'].get('errors', 0),
+        'bytes_received': stats['bytes_sent'],
+        'notifications': stats['messages'],
+        # ru_maxrss у Linux - КБ
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tenders', type=int, default=2000)
+    parser.add_argument('--latency', type=float, default=0.02, help='затримка відповіді stub, сек')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='частка відповідей 503')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=0, help='процесів-виконавців (0 - без черги завдань)')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--mode', choices=['incremental', 'window'], default='incremental')
+    parser.add_argument('--storage', choices=['json', 'sqlite'], default='json')
+    parser.add_argument('--digest', action='store_true')
+    parser.add_argument('--gzip', action='store_true', help='stub стискає відповіді gzip')
+    parser.add_argument('--no-prefetch', action='store_true', help='без попереднього завантаження сторінок стрічки')
+    parser.add_argument('--verbose', action='store_true', help='показувати вивід монітора')
+    parser.add_argument('--json', help='записати результати у файл')
+    parser.add_argument('--max-seconds', type=float, help='код виходу 1, якщо найкращий запуск повільніший')
+    args = parser.parse_args()
+
+    conn, child_conn = multiprocessing.Pipe()
+    server = multiprocessing.Process(
+        target=serve, args=(child_conn, args.tenders, args.latency, args.error_rate, args.page_size, args.gzip),
+        daemon=True
+    )
+    server.start()
+    base_url = conn.recv()
+    configure_env(base_url, args)
+
+    expected = expected_notifications(args.tenders)
+    print(f"Тендерів: {args.tenders}, затримка stub: {args.latency * 1000:.0f} мс, "
+          f"помилок: {args.error_rate:.0%}, concurrency: {args.concurrency}, виконавців: {args.workers}, "
+          f"сховище: {args.storage}, режим: {args.mode}, gzip: {'так' if args.gzip else 'ні'}, "
+          f"попереднє завантаження стрічки: {'ні' if args.no_prefetch else 'так'}")
+
+    runs = []
+    try:
+        for number in range(1, args.runs + 1):
+            result = run_once(conn, args)
+            runs.append(result)
+            status = 'OK' if result['notifications'] == expected else f"очікувалось {expected}"
+            print(f"  #{number}: {result['wall_seconds']:7.2f} с  "
+                  f"стрічка {result['feed_requests']:>4}  деталі {result['detail_requests']:>5}  "
+                  f"telegram {result['telegram_requests']:>4}  помилки {result['injected_errors']:>4}  "
+                  f"{result['bytes_received'] / 1024:8.0f} КБ  RSS {result['peak_rss_mb']:6.1f} МБ  "
+                  f"сповіщень {result['notifications']} ({status})")
+    finally:
+        conn.send('stop')
+        conn.recv()
+        server.join(timeout=5)
+
+    best = min(run['wall_seconds'] for run in runs)
+    print(f"Найкращий час: {best:.2f} с, медіана: {statistics.median(r['wall_seconds'] for r in runs):.2f} с, "
+          f"пікова RSS: {max(r['peak_rss_mb'] for r in runs):.1f} МБ")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'params': vars(args), 'expected_notifications': expected, 'runs': runs}, f, indent=2)
+
+    if args.max_seconds is not None and best > args.max_seconds:
+        print(f"❌ Регресія: {best:.2f} с > {args.max_seconds:.2f} с")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
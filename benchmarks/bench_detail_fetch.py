@@ -0,0 +1,61 @@
+"""
+Бенчмарк: послідовне vs паралельне завантаження деталей тендерів
+
+Піднімає локальний stub Prozorro API із штучною затримкою і порівнює
+час search_new_translation_tenders при різних max_concurrency.
+
+Запуск:
+    python benchmarks/bench_detail_fetch.py [--tenders 200] [--latency 0.1]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_server import StubServer, build_tenders
+from src.prozorro_api import ProzorroAPI
+
+
+def run_search(api_url: str, concurrency: int, hours: int):
+    """Виконати пошук і повернути (час, результати)"""
+    os.environ['PROZORRO_API_URL'] = api_url
+    os.environ['DETAIL_CACHE_DIR'] = ''
+    api = ProzorroAPI(max_concurrency=concurrency, request_interval=0)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = api.search_new_translation_tenders(hours=hours)
+    return time.perf_counter() - started, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenders', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.1)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    stub = StubServer(build_tenders(args.tenders), latency=args.latency).start()
+    api_url = stub.api_url
+    hours = args.tenders * 5 // 3600 + 1
+
+    print(f"Тендерів: {args.tenders}, затримка stub: {args.latency * 1000:.0f} мс")
+    baseline_time, baseline = None, None
+    for concurrency in args.concurrency:
+        elapsed, results = run_search(api_url, concurrency, hours)
+        if baseline is None:
+            baseline_time, baseline = elapsed, results
+        same = [t['id'] for t in results] == [t['id'] for t in baseline]
+        print(f"  concurrency={concurrency:<3} {elapsed:7.2f} с  "
+              f"x{baseline_time / elapsed:4.1f}  знайдено: {len(results)}  "
+              f"{'OK' if same else 'РЕЗУЛЬТАТИ ВІДРІЗНЯЮТЬСЯ'}")
+
+    stub.stop()
+
+
+if __name__ == '__main__':
+    main()
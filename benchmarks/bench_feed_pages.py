@@ -0,0 +1,69 @@
+"""
+Бенчмарк: читання стрічки з попереднім завантаженням сторінок і без нього
+
+Піднімає локальний stub Prozorro API із штучною затримкою і читає всю
+стрічку через iter_recent_pages. Обробка сторінки викликачем імітується
+паузою --work (фільтр, запис у сховище, черга деталей); з попереднім
+завантаженням наступна сторінка вантажиться під час цієї паузи.
+З --gzip stub стискає відповіді, і виводиться трафік з мережі та після
+розпакування.
+
+Запуск:
+    python benchmarks/bench_feed_pages.py [--tenders 3500] [--latency 0.1]
+        [--work 0.1] [--gzip]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_server import StubServer, build_tenders
+from src.prozorro_api import ProzorroAPI
+
+
+def read_feed(api_url: str, prefetch: bool, work: float, hours: int):
+    """Прочитати стрічку і повернути (час, сторінок, тендерів, трафік)"""
+    os.environ['PROZORRO_API_URL'] = api_url
+    api = ProzorroAPI(request_interval=0, feed_prefetch=prefetch)
+
+    pages = tenders = 0
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for page in api.iter_recent_pages(hours):
+            pages += 1
+            tenders += len(page)
+            time.sleep(work)
+    return time.perf_counter() - started, pages, tenders, api.traffic()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tenders', type=int, default=3500)
+    parser.add_argument('--latency', type=float, default=0.1, help='затримка відповіді stub, сек')
+    parser.add_argument('--work', type=float, default=0.1, help='обробка сторінки викликачем, сек')
+    parser.add_argument('--gzip', action='store_true', help='stub стискає відповіді gzip')
+    args = parser.parse_args()
+
+    stub = StubServer(build_tenders(args.tenders, step_seconds=1), latency=args.latency,
+                      compress=args.gzip).start()
+    hours = args.tenders // 3600 + 1
+
+    print(f"Тендерів: {args.tenders}, затримка stub: {args.latency * 1000:.0f} мс, "
+          f"обробка сторінки: {args.work * 1000:.0f} мс, gzip: {'так' if args.gzip else 'ні'}")
+    baseline = None
+    for prefetch in (False, True):
+        elapsed, pages, tenders, traffic = read_feed(stub.api_url, prefetch, args.work, hours)
+        baseline = baseline or elapsed
+        print(f"  {'з попереднім завантаженням' if prefetch else 'послідовно':<26} {elapsed:6.2f} с  "
+              f"x{baseline / elapsed:4.1f}  сторінок: {pages}  тендерів: {tenders}  "
+              f"трафік: {traffic['wire'] / 1024:.0f} КБ з мережі, {traffic['decoded'] / 1024:.0f} КБ розпаковано")
+
+    stub.stop()
+
+
+if __name__ == '__main__':
+    main()
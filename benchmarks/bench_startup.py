@@ -0,0 +1,105 @@
+"""
+Бенчмарк: холодний старт разових команд main.py
+
+Кожна команда запускається в окремому процесі з python -X importtime.
+Виводиться найкращий час запуску, час імпортів самої програми (без site,
+тобто без налаштувань інтерпретатора й .pth-файлів) і чи підвантажено
+важкі залежності, яких команда не потребує. Сховище, індекс і стрічка
+спрямовані в тимчасовий каталог, мережа не використовується.
+
+Запуск:
+    python benchmarks/bench_startup.py [--runs 5] [--max-help-ms 50]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Команди для вимірювання: (назва, аргументи main.py)
+COMMANDS = [
+    ('help', ['help']),
+    ('search', ['search', 'переклад']),
+    ('backup export', ['backup', 'export', '--output', os.devnull]),
+]
+
+# Залежності, які варто тягнути лише командам, що ними користуються
+HEAVY_MODULES = ('requests', 'apscheduler', 'pytz', 'src.scheduler', 'src.prozorro_api')
+
+
+def parse_importtime(stderr: str):
+    """(мкс імпортів без site, імена модулів) з виводу -X importtime"""
+    total = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules.add(name.strip())
+        # Модулі верхнього рівня мають рівно один пробіл перед назвою
+        if name.startswith(' ') and not name.startswith('  ') and name.strip() != 'site':
+            total += int(cumulative)
+    return total, modules
+
+
+def measure(args, env, runs: int):
+    """Найкращий час запуску (с), імпорти програми (мкс) та завантажені модулі"""
+    best = None
+    imports, modules = 0, set()
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = subprocess.run([sys.executable, '-X', 'importtime', 'main.py', *args], cwd=ROOT, env=env,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best:
+            best = elapsed
+            imports, modules = parse_importtime(process.stderr)
+    return best, imports, modules
+
+
+def measure_interpreter(runs: int) -> float:
+    """Найкращий час запуску інтерпретатора без програми (нижня межа для команд), с"""
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], stdout=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None or elapsed < best else best
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-help-ms', type=float,
+                        help='код виходу 1, якщо імпорти help довші (мс, без site)')
+    args = parser.parse_args()
+
+    baseline = measure_interpreter(args.runs)
+    print(f"Порожній інтерпретатор: {baseline * 1000:.0f} мс")
+
+    failed = False
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ,
+                   STORAGE_PATH=os.path.join(workdir, 'processed_tenders.json'),
+                   STORAGE_DB_PATH=os.path.join(workdir, 'tenders.db'),
+                   SEARCH_INDEX_PATH=os.path.join(workdir, 'search.db'),
+                   PROCESSED_TENDERS_BACKUP='')
+        for name, command in COMMANDS:
+            elapsed, imports, modules = measure(command, env, args.runs)
+            heavy = [module for module in HEAVY_MODULES if module in modules]
+            print(f"  {name:<14} {elapsed * 1000:6.0f} мс  імпорти програми {imports / 1000:6.1f} мс  "
+                  f"важкі залежності: {', '.join(heavy) or 'немає'}")
+            if name == 'help' and args.max_help_ms is not None and imports / 1000 > args.max_help_ms:
+                print(f"❌ Регресія: імпорти help {imports / 1000:.1f} мс > {args.max_help_ms:.1f} мс")
+                failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""
+Локальний stub Prozorro API та Telegram Bot API для бенчмарків
+
+Стрічка /api/2.5/tenders віддає синтетичні тендери сторінками з курсором
+next_page.offset (timestamp dateModified, як у справжньому API) в обох
+напрямках, /api/2.5/tenders/<id> - деталі, /bot<token>/sendMessage -
+фіктивну відправку. Затримка, частка помилок, обсяг і стиснення gzip
+(якщо клієнт його приймає) налаштовуються.
+"""
+import gzip
+import json
+import random
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List
+from urllib.parse import urlsplit, parse_qs
+
+
+def build_tenders(count: int, translation_every: int = 10, step_seconds: float = 5) -> List[Dict]:
+    """
+    Згенерувати синтетичні тендери від найновішого до найстарішого
+    з кроком step_seconds (кожен translation_every-й - на переклад)
+    """
+    now = time.time()
+    tenders = []
+    for i in range(count):
+        is_translation = i % translation_every == 0
+        tenders.append({
+            'id': f'{i:032x}',
+            'tenderID': f'UA-BENCH-{i:06d}-a',
+            'dateModified': datetime.fromtimestamp(now - i * step_seconds, timezone.utc).isoformat(),
+            'procurementMethodType': 'aboveThreshold' if i % 3 else 'reporting',
+            'status': 'active.tendering',
+            'title': 'Послуги письмового перекладу' if is_translation else 'Будівельні роботи',
+            'value': {'amount': 10000 + i, 'currency': 'UAH'},
+            'procuringEntity': {'name': f'Замовник {i % 50}'},
+            'tenderPeriod': {'endDate': datetime.fromtimestamp(now + 7 * 86400, timezone.utc).isoformat()},
+            'items': [{'classification': {'id': '79530000-8' if is_translation else '45000000-7'}}],
+        })
+    return tenders
+
+
+class StubServer:
+    """
+    Stub-сервер у фоновому потоці.
+
+    Лічильники: requests (feed / detail / telegram / errors), bytes_sent
+    (тіла відповідей, як передані мережею), messages (тексти, прийняті sendMessage).
+    """
+
+    def __init__(self, tenders: List[Dict], latency: float = 0.0, error_rate: float = 0.0,
+                 page_size: int = 100, seed: int = 0, compress: bool = False):
+        self.tenders = sorted(tenders, key=self._timestamp)
+        self._timestamps = [self._timestamp(tender) for tender in self.tenders]
+        self.by_id = {tender['id']: tender for tender in tenders}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.compress = compress
+
+        self.requests: Counter = Counter()
+        self.bytes_sent = 0
+        self.messages: List[str] = []
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @staticmethod
+    def _timestamp(tender: Dict) -> float:
+        return datetime.fromisoformat(tender['dateModified']).timestamp()
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    @property
+    def api_url(self) -> str:
+        """Значення для PROZORRO_API_URL"""
+        return f'{self.base_url}/api/2.5/tenders'
+
+    def start(self) -> 'StubServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'StubServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests.clear()
+            self.bytes_sent = 0
+            self.messages = []
+
+    def stats(self) -> Dict:
+        """Лічильники з останнього reset_stats()"""
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'bytes_sent': self.bytes_sent,
+                'messages': len(self.messages),
+            }
+
+    def _count(self, kind: str, size: int = 0):
+        with self._lock:
+            self.requests[kind] += 1
+            self.bytes_sent += size
+
+    def feed_page(self, query: Dict[str, List[str]]) -> Dict:
+        """Сторінка стрічки: тендери після (або до, з descending) offset"""
+        offset = (query.get('offset') or [''])[0]
+        descending = (query.get('descending') or [''])[0] in ('1', 'true')
+        limit = min(int((query.get('limit') or [self.page_size])[0]), self.page_size)
+        opt_fields = (query.get('opt_fields') or [''])[0].split(',')
+        fields = {'id', 'dateModified', *opt_fields}
+
+        if descending:
+            end = bisect_left(self._timestamps, float(offset)) if offset else len(self.tenders)
+            page = self.tenders[max(0, end - limit):end][::-1]
+        else:
+            start = bisect_right(self._timestamps, float(offset)) if offset else 0
+            page = self.tenders[start:start + limit]
+
+        next_offset = str(self._timestamp(page[-1])) if page else offset
+        return {
+            'data': [{k: v for k, v in t.items() if k in fields} for t in page],
+            'next_page': {'offset': next_offset},
+        }
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Заголовки і тіло пишуться окремо: без цього Nagle додає ~40 мс на відповідь
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, kind: str, payload, status=200):
+                body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                if stub.compress and 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzip.compress(body, compresslevel=6)
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                stub._count(kind, len(body))
+
+            def _fail(self) -> bool:
+                """Імітувати збій сервера з імовірністю error_rate"""
+                with stub._lock:
+                    failed = stub._random.random() < stub.error_rate
+                if failed:
+                    self._send('errors', {'errors': ['stub error']}, status=503)
+                return failed
+
+            def do_GET(self):
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if self._fail():
+                    return
+
+                parts = urlsplit(self.path)
+                segments = parts.path.rstrip('/').split('/')
+
+                if segments[-1] == 'tenders':
+                    self._send('feed', stub.feed_page(parse_qs(parts.query)))
+                    return
+
+                tender = stub.by_id.get(segments[-1])
+                if tender is None:
+                    self._send('detail', {'errors': ['not found']}, status=404)
+                    return
+                self._send('detail', {'data': tender})
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                payload = json.loads(self.rfile.read(length) or b'{}')
+
+                if not self.path.endswith('/sendMessage'):
+                    self._send('telegram', {'ok': False, 'description': 'Not Found'}, status=404)
+                    return
+
+                with stub._lock:
+                    stub.messages.append(payload.get('text', ''))
+                    message_id = len(stub.messages)
+                self._send('telegram', {'ok': True, 'result': {'message_id': message_id}})
+
+        return Handler
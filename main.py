@@ -1,10 +1,16 @@
 """
 Prozorro Tender Monitor - Головний файл
 Моніторинг тендерів на послуги письмового перекладу
+
+Модулі команд імпортуються лише для обраної команди: довідка не тягне
+requests, apscheduler чи pytz, а search і backup - клієнт API і Telegram.
 """
+import contextlib
+import os
 import sys
-import asyncio
-from src.scheduler import TenderMonitor
+import time
+import argparse
+from datetime import datetime, timedelta, timezone
 
 
 def print_help():
@@ -17,8 +23,18 @@ def print_help():
 РЕЖИМИ РОБОТИ:
 
 1. python main.py                - Запустити моніторинг (щоденні перевірки о 09:00)
-2. python main.py test            - Тестовий режим (перевірити зараз)
-3. python main.py help            - Показати цю довідку
+2. python main.py tail            - Безперервне стеження за стрічкою (сповіщення за секунди)
+3. python main.py test            - Тестовий режим (перевірити зараз)
+4. python main.py backfill --from 2024-01-01 --to 2024-12-31
+                                  - Заповнити історію без сповіщень
+5. python main.py backup export --output backup.txt
+   python main.py backup import backup.txt
+                                  - Експорт/імпорт історії (компактний формат)
+6. python main.py search "переклад документів" [--from 2024-05-01]
+                                  - Пошук серед тендерів, які бот уже бачив
+7. python main.py worker [--processes 4]
+                                  - Виконавці для режиму координатора (WORK_QUEUE_PATH)
+8. python main.py help            - Показати цю довідку
 
 -------------------------------------------------------------------
 
@@ -41,18 +57,185 @@ def print_help():
     """)
 
 
+def parse_date(value: str, end: bool = False) -> datetime:
+    """
+    Дата YYYY-MM-DD або ISO-момент; без часового поясу - UTC.
+    Для кінця діапазону дата без часу означає кінець цього дня.
+    """
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    if end and len(value) == 10:
+        moment += timedelta(days=1)
+    return moment
+
+
+def run_backfill(argv):
+    """Команда backfill: історичне заповнення сховища"""
+    parser = argparse.ArgumentParser(prog='python main.py backfill',
+                                     description='Заповнити сховище тендерами за період без сповіщень')
+    parser.add_argument('--from', dest='date_from', required=True, help='Початок періоду (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='date_to', help='Кінець періоду включно (YYYY-MM-DD, за замовчуванням зараз)')
+    parser.add_argument('--workers', type=int, help='Кількість процесів (BACKFILL_WORKERS)')
+    parser.add_argument('--shards', type=int, help='Кількість шардів (BACKFILL_SHARDS)')
+    parser.add_argument('--subscription', action='append',
+                        help='Заповнити лише історію цієї підписки (можна кілька разів)')
+    args = parser.parse_args(argv)
+
+    from src.backfill import Backfill
+    from src.data_storage import create_storage
+    from src.search_index import SearchIndex
+    from src.subscriptions import load_subscriptions
+
+    try:
+        date_from = parse_date(args.date_from)
+        date_to = parse_date(args.date_to, end=True) if args.date_to else datetime.now(timezone.utc)
+    except ValueError as e:
+        parser.error(f"Неправильна дата: {e}")
+
+    subscriptions = load_subscriptions()
+    if args.subscription:
+        subscriptions = [item for item in subscriptions if item.name in args.subscription]
+        if not subscriptions:
+            parser.error(f"Підписок {', '.join(args.subscription)} не знайдено")
+
+    Backfill(create_storage(), subscriptions, workers=args.workers, shards=args.shards,
+             search_index=SearchIndex.from_env()).run(date_from, date_to)
+
+
+def run_search(argv):
+    """Команда search: пошук по локальному індексу переглянутих тендерів"""
+    parser = argparse.ArgumentParser(prog='python main.py search',
+                                     description='Пошук тендерів, які бот уже бачив у стрічці')
+    parser.add_argument('query', nargs='+', help='Слова для пошуку (усі мають бути в тендері)')
+    parser.add_argument('--from', dest='date_from', help='Лише тендери, змінені від дати (YYYY-MM-DD)')
+    parser.add_argument('--limit', type=int, default=20, help='Скільки тендерів показати')
+    args = parser.parse_args(argv)
+
+    from src.search_index import SearchIndex
+
+    index = SearchIndex.from_env()
+    if index is None:
+        print("❌ Пошуковий індекс вимкнено (SEARCH_INDEX_PATH)")
+        sys.exit(1)
+
+    since = None
+    if args.date_from:
+        try:
+            since = parse_date(args.date_from).isoformat()
+        except ValueError as e:
+            parser.error(f"Неправильна дата: {e}")
+
+    started = time.perf_counter()
+    results = index.search(' '.join(args.query), limit=args.limit, since=since)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    print(f"🔎 Знайдено {len(results)} тендерів (з {index.count()} у індексі, {elapsed:.0f} мс)\n")
+    for tender in results:
+        tender_id = tender['tenderID'] or tender['id']
+        print(f"{tender_id}  {(tender['dateModified'] or '')[:10]}  {tender['status'] or ''}")
+        print(f"   {tender['title'] or 'N/A'}")
+        if tender['customer']:
+            print(f"   🏢 {tender['customer']}")
+        print(f"   🔗 https://tender.uub.com.ua/tender/{tender_id}/\n")
+
+
+def run_worker(argv):
+    """Команда worker: процеси-виконавці для режиму координатора"""
+    parser = argparse.ArgumentParser(prog='python main.py worker',
+                                     description='Завантажувати й перевіряти тендери з черги координатора')
+    parser.add_argument('--processes', type=int, help='Кількість процесів (WORKER_PROCESSES, за замовчуванням 1)')
+    args = parser.parse_args(argv)
+
+    from src.work_queue import WorkQueue, run_workers
+
+    queue = WorkQueue.from_env()
+    if queue is None:
+        parser.error("Не задано WORK_QUEUE_PATH (спільний файл черги з координатором)")
+    run_workers(max(1, args.processes or int(os.getenv('WORKER_PROCESSES', '1'))), queue)
+
+
+def run_backup(argv):
+    """Команда backup: потоковий експорт та імпорт історії оброблених тендерів"""
+    parser = argparse.ArgumentParser(prog='python main.py backup',
+                                     description='Експорт та імпорт історії у компактному форматі PTB1')
+    actions = parser.add_subparsers(dest='action', required=True)
+    export_parser = actions.add_parser('export', help='Записати історію у файл (за замовчуванням - stdout)')
+    export_parser.add_argument('--output', default='-', help='Файл для backup ("-" - stdout)')
+    import_parser = actions.add_parser('import', help='Імпортувати backup (PTB1 або старий JSON)')
+    import_parser.add_argument('input', help='Файл з backup ("-" - stdin)')
+    args = parser.parse_args(argv)
+
+    from src import backup
+    from src.data_storage import create_storage
+
+    if args.action == 'export':
+        # stdout - лише для backup: повідомлення сховища (відновлення, міграція) йдуть у stderr
+        out = sys.stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            storage = create_storage()
+            if args.output == '-':
+                count = backup.export_storage(storage, out)
+                out.write('\n')
+            else:
+                with open(args.output, 'w', encoding='ascii') as f:
+                    count = backup.export_storage(storage, f)
+        print(f"💾 Експортовано {count} записів", file=sys.stderr)
+        return
+
+    storage = create_storage()
+    try:
+        if args.input == '-':
+            added = backup.import_storage(storage, sys.stdin)
+        else:
+            with open(args.input, 'r', encoding='utf-8') as f:
+                added = backup.import_storage(storage, f)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"🔄 Імпортовано {added} нових записів")
+
+
 def main():
     """Головна функція"""
+    command = sys.argv[1].lower() if len(sys.argv) > 1 else None
+    if command == 'help':
+        print_help()
+        return
+    
+    # Змінні середовища з .env (довідці не потрібні)
+    from dotenv import load_dotenv
+    load_dotenv()
+    
     # Перевірити аргументи командного рядка
-    if len(sys.argv) > 1:
-        command = sys.argv[1].lower()
+    if command is not None:
+        if command == 'tail':
+            # Режим tail - коротке опитування стрічки замість планувальника
+            from src.scheduler import TenderMonitor
+            monitor = TenderMonitor()
+            monitor.start_tail()
+            return
+        
+        elif command == 'backfill':
+            run_backfill(sys.argv[2:])
+            return
+        
+        elif command == 'backup':
+            run_backup(sys.argv[2:])
+            return
+        
+        elif command == 'search':
+            run_search(sys.argv[2:])
+            return
         
-        if command == 'help':
-            print_help()
+        elif command == 'worker':
+            run_worker(sys.argv[2:])
             return
         
         elif command == 'test':
             # Тестовий режим
+            import asyncio
+            from src.scheduler import TenderMonitor
             monitor = TenderMonitor()
             asyncio.run(monitor.run_test())
             return
@@ -64,6 +247,7 @@ def main():
     
     # Звичайний режим - запуск планувальника
     try:
+        from src.scheduler import TenderMonitor
         monitor = TenderMonitor()
         monitor.start_scheduler()
     except KeyboardInterrupt:
@@ -0,0 +1,244 @@
+"""
+Історичне заповнення сховища (backfill)
+
+Діапазон часу ділиться на шарди, які читаються паралельно в окремих
+процесах. Кожен процес читає стрічку свого шарду порціями по кілька
+сторінок і повертає знайдені тендери; головний процес позначає їх
+обробленими (без сповіщень) і зберігає курсор шарду, тож перерваний
+backfill продовжується з місця зупинки. Якщо задано пошуковий індекс,
+процеси повертають і документи переглянутих тендерів, а записує їх
+головний процес.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from src import search_index
+from src.subscriptions import Subscription
+
+
+# Клієнт API процесу-виконавця (створюється один раз на процес)
+_worker_api = None
+
+
+def _get_worker_api():
+    """ProzorroAPI поточного процесу"""
+    global _worker_api
+    if _worker_api is None:
+        from src.prozorro_api import ProzorroAPI
+        _worker_api = ProzorroAPI()
+    return _worker_api
+
+
+def split_range(date_from: datetime, date_to: datetime, shards: int) -> List[Tuple[float, float]]:
+    """Поділити [date_from, date_to) на shards рівних проміжків (unix timestamp)"""
+    start, end = date_from.timestamp(), date_to.timestamp()
+    if end <= start:
+        raise ValueError("Кінець діапазону має бути пізніше початку")
+    shards = max(1, shards)
+    step = (end - start) / shards
+    bounds = [start + step * i for i in range(shards)] + [end]
+    return [(bounds[i], bounds[i + 1]) for i in range(shards)]
+
+
+def _match_items(api, items: List[Tuple[str, Optional[str]]],
+                 documents: Optional[List] = None) -> Tuple[List[Dict], Dict[str, Optional[str]]]:
+    """
+    Завантажити деталі кандидатів і перевірити правилами.
+    Повертає знайдені тендери та {id: dateModified} тих, деталі яких не отримано.
+    documents - список, куди додати документи пошукового індексу з деталей
+    """
+    def fetch(item):
+        tender_id, date_modified = item
+        try:
+            return api.fetch_tender_details(tender_id, date_modified)
+        except requests.exceptions.RequestException:
+            return item
+
+    matched, failed, stats = [], {}, {}
+    with ThreadPoolExecutor(max_workers=api.max_concurrency) as executor:
+        for item, details in zip(items, executor.map(fetch, items)):
+            if details is item:
+                failed[item[0]] = item[1]
+                continue
+            if details and documents is not None:
+                documents.append(search_index.document(details))
+            tender = api.check_tender_details(item[0], details, stats)
+            if tender is not None:
+                matched.append(tender)
+    return matched, failed
+
+
+def crawl_chunk(offset: str, until: float, max_pages: int, index: bool = False) -> Dict:
+    """
+    Прочитати до max_pages сторінок шарду від offset (виконується в окремому процесі).
+    Курсор просувається лише після обробки сторінки, тож після помилки
+    порцію можна повторити з повернутого offset.
+    index - повернути документи пошукового індексу переглянутих тендерів
+    """
+    api = _get_worker_api()
+    result = {'offset': offset, 'done': False, 'scanned': 0, 'candidates': 0,
+              'matched': [], 'failed': {}, 'documents': [], 'error': None}
+    documents = result['documents'] if index else None
+    try:
+        for tenders, cursor in api.iter_feed_range(offset, until, max_pages=max_pages):
+            items = [(tender['id'], tender.get('dateModified')) for tender in tenders
+                     if tender.get('id') and api.prefilter_feed_item(tender)]
+            if documents is not None:
+                documents.extend(search_index.document(tender) for tender in tenders)
+            matched, failed = _match_items(api, items, documents)
+
+            result['scanned'] += len(tenders)
+            result['candidates'] += len(items)
+            result['matched'].extend(matched)
+            result['failed'].update(failed)
+            result['offset'] = cursor
+            # Остання сторінка шарду повертає курсор, рівний until
+            result['done'] = float(cursor) >= until
+    except requests.exceptions.RequestException as e:
+        result['error'] = str(e)
+    return result
+
+
+def retry_failed(items: List[Tuple[str, Optional[str]]], index: bool = False) -> Dict:
+    """Повторно запитати деталі тендерів, що не вдалися (в окремому процесі)"""
+    documents = [] if index else None
+    matched, failed = _match_items(_get_worker_api(), items, documents)
+    return {'matched': matched, 'failed': failed, 'documents': documents or []}
+
+
+class Backfill:
+    """Паралельне історичне заповнення сховища з контрольними точками"""
+
+    # Ключ стану в сховищі для контрольної точки
+    STATE_KEY = 'backfill'
+
+    # Скільки помилок поспіль допускається для шарду за один запуск
+    MAX_SHARD_ERRORS = 3
+
+    def __init__(self, storage, subscriptions: List[Subscription], workers: Optional[int] = None,
+                 shards: Optional[int] = None, chunk_pages: Optional[int] = None, search_index=None):
+        """
+        workers - кількість процесів (BACKFILL_WORKERS, за замовчуванням 4)
+        shards - кількість шардів (BACKFILL_SHARDS, за замовчуванням workers * 4)
+        chunk_pages - сторінок стрічки між контрольними точками (BACKFILL_CHUNK_PAGES)
+        search_index - SearchIndex для переглянутих тендерів (None - не індексувати)
+        """
+        self.storage = storage
+        self.subscriptions = subscriptions
+        self.search_index = search_index
+        self.workers = max(1, workers or int(os.getenv('BACKFILL_WORKERS', '4')))
+        self.shards = max(1, shards or int(os.getenv('BACKFILL_SHARDS') or self.workers * 4))
+        self.chunk_pages = max(1, chunk_pages or int(os.getenv('BACKFILL_CHUNK_PAGES', '20')))
+
+    def _load_state(self, date_from: datetime, date_to: datetime) -> Dict:
+        """Незавершена контрольна точка для цього діапазону або нова"""
+        state = self.storage.get_state(self.STATE_KEY)
+        if (state and state.get('from') == date_from.isoformat() and state.get('to') == date_to.isoformat()
+                and not state.get('completed')):
+            remaining = sum(1 for shard in state['shards'] if not shard['done'])
+            print(f"↩️  Продовжуємо backfill: залишилось {remaining} з {len(state['shards'])} шардів")
+            return state
+
+        return {
+            'from': date_from.isoformat(),
+            'to': date_to.isoformat(),
+            'shards': [{'offset': str(start), 'until': end, 'done': False}
+                       for start, end in split_range(date_from, date_to, self.shards)],
+            'failed': {},
+            'scanned': 0,
+            'matched': 0,
+            'completed': False,
+        }
+
+    def _store(self, tenders: List[Dict]) -> int:
+        """Позначити тендери обробленими для підписок, яким вони цікаві (без сповіщень)"""
+        stored = 0
+        for tender in tenders:
+            accepted = [subscription for subscription in self.subscriptions if subscription.accepts(tender)]
+            if not accepted:
+                continue
+            for subscription in accepted:
+                self.storage.mark_as_processed(tender['id'], subscription.namespace)
+            self.storage.save_snapshot(tender)
+            stored += 1
+        return stored
+
+    def _checkpoint(self, state: Dict):
+        """Зберегти контрольну точку разом з позначками"""
+        self.storage.set_state(self.STATE_KEY, state)
+        self.storage.flush()
+
+    def run(self, date_from: datetime, date_to: datetime) -> Dict:
+        """Заповнити сховище тендерами за [date_from, date_to). Повертає підсумок"""
+        if date_from.tzinfo is None:
+            date_from = date_from.replace(tzinfo=timezone.utc)
+        if date_to.tzinfo is None:
+            date_to = date_to.replace(tzinfo=timezone.utc)
+
+        state = self._load_state(date_from, date_to)
+        self._checkpoint(state)
+        print(f"📚 Backfill {date_from:%Y-%m-%d %H:%M} - {date_to:%Y-%m-%d %H:%M} UTC: "
+              f"{len(state['shards'])} шардів, {self.workers} процесів")
+
+        errors = [0] * len(state['shards'])
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            running = {}
+
+            def submit(index: int):
+                shard = state['shards'][index]
+                future = executor.submit(crawl_chunk, shard['offset'], shard['until'], self.chunk_pages,
+                                         self.search_index is not None)
+                running[future] = index
+
+            for index, shard in enumerate(state['shards']):
+                if not shard['done']:
+                    submit(index)
+
+            while running:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    index = running.pop(future)
+                    shard = state['shards'][index]
+                    chunk = future.result()
+
+                    state['matched'] += self._store(chunk['matched'])
+                    if self.search_index is not None:
+                        self.search_index.add(chunk['documents'])
+                    state['scanned'] += chunk['scanned']
+                    state['failed'].update(chunk['failed'])
+                    shard['offset'] = chunk['offset']
+                    shard['done'] = chunk['done']
+                    self._checkpoint(state)
+
+                    if chunk['error']:
+                        errors[index] += 1
+                        print(f"❌ Шард {index + 1}: {chunk['error']}")
+                        if errors[index] >= self.MAX_SHARD_ERRORS:
+                            print(f"⚠️  Шард {index + 1} відкладено до наступного запуску")
+                            continue
+                    else:
+                        errors[index] = 0
+
+                    if not shard['done']:
+                        submit(index)
+
+            if state['failed'] and all(shard['done'] for shard in state['shards']):
+                print(f"🔁 Повторний запит деталей {len(state['failed'])} тендерів")
+                retried = executor.submit(retry_failed, list(state['failed'].items()),
+                                          self.search_index is not None).result()
+                state['matched'] += self._store(retried['matched'])
+                if self.search_index is not None:
+                    self.search_index.add(retried['documents'])
+                state['failed'] = retried['failed']
+
+        state['completed'] = all(shard['done'] for shard in state['shards']) and not state['failed']
+        self._checkpoint(state)
+
+        print(f"\n✅ Backfill: переглянуто {state['scanned']} змін стрічки, збережено {state['matched']} тендерів")
+        if not state['completed']:
+            print("⚠️  Backfill не завершено: запустіть ту саму команду ще раз, щоб продовжити")
+        return state
@@ -0,0 +1,312 @@
+"""
+Компактний формат резервної копії історії оброблених тендерів
+
+Рядок вигляду PTB1:<base64(zlib(...))>, придатний для змінної середовища
+PROCESSED_TENDERS_BACKUP. Усередині:
+
+    varint довжина + JSON метаданих (last_check, state)
+    для кожного простору імен: 0x01, varint довжина + назва, записи, 0x00
+    0x00 - кінець
+
+Запис: 0x01 + 16 байт (ID з 32 hex-символів, як у Prozorro) або
+0x02 + varint довжина + UTF-8 (інший ID), далі zigzag-varint різниця
+epoch-секунд з попереднім записом. ID у просторі імен відсортовані.
+
+Запис і читання потокові: файл будь-якого розміру проходить через
+zlib і base64 порціями, без побудови всієї історії в пам'яті.
+"""
+import base64
+import binascii
+import io
+import json
+import re
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, TextIO, Tuple
+
+
+# Префікс і версія формату
+PREFIX = 'PTB1:'
+
+# ID у вигляді 32 hex-символів кодується 16 байтами
+_HEX_ID = re.compile(r'[0-9a-f]{32}')
+
+_END = 0
+_SECTION = 1
+_HEX_ENTRY = 1
+_TEXT_ENTRY = 2
+
+# Розмір порції читання, символів
+CHUNK_SIZE = 64 * 1024
+
+# Найбільший backup, що виводиться в лог для змінної середовища, символів
+PRINT_LIMIT = 2000
+
+# Приблизний розмір запису в backup, символів: за ним велика історія
+# відсікається без кодування
+ENTRY_SIZE = 27
+
+
+def _varint(value: int) -> bytes:
+    """Беззнакове число у varint (7 біт на байт)"""
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+class _Writer:
+    """zlib + base64 поверх текстового потоку"""
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self._compressor = zlib.compressobj(9)
+        self._pending = b''
+        out.write(PREFIX)
+
+    def _emit(self, chunk: bytes):
+        self._pending += chunk
+        # base64 кодує групи по 3 байти; залишок чекає наступної порції
+        ready = len(self._pending) // 3 * 3
+        if ready:
+            self.out.write(base64.b64encode(self._pending[:ready]).decode('ascii'))
+            self._pending = self._pending[ready:]
+
+    def write(self, data: bytes):
+        self._emit(self._compressor.compress(data))
+
+    def close(self):
+        self._emit(self._compressor.flush())
+        self.out.write(base64.b64encode(self._pending).decode('ascii'))
+        self._pending = b''
+
+
+class _Reader:
+    """Розпакований потік з base64 + zlib тексту"""
+
+    def __init__(self, stream: TextIO, prefix_read: bool = False):
+        self._chunks = self._decompressed(stream, prefix_read)
+        self._buffer = b''
+        self._offset = 0
+
+    @staticmethod
+    def _decompressed(stream: TextIO, prefix_read: bool) -> Iterator[bytes]:
+        if not prefix_read and stream.read(len(PREFIX)) != PREFIX:
+            raise ValueError("Невідомий формат резервної копії")
+
+        decompressor = zlib.decompressobj()
+        rest = ''
+        while True:
+            text = stream.read(CHUNK_SIZE)
+            if not text:
+                break
+            text = rest + ''.join(text.split())
+            ready = len(text) // 4 * 4
+            rest = text[ready:]
+            yield decompressor.decompress(base64.b64decode(text[:ready]))
+        yield decompressor.decompress(base64.b64decode(rest)) + decompressor.flush()
+
+    def read(self, size: int) -> bytes:
+        while len(self._buffer) - self._offset < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                raise ValueError("Резервну копію обрізано")
+            self._buffer = self._buffer[self._offset:] + chunk
+            self._offset = 0
+        data = self._buffer[self._offset:self._offset + size]
+        self._offset += size
+        return data
+
+    def byte(self) -> int:
+        return self.read(1)[0]
+
+    def varint(self) -> int:
+        value, shift = 0, 0
+        while True:
+            byte = self.byte()
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+            shift += 7
+
+
+def write_backup(out: TextIO, rows: Iterable[Tuple[str, str, float]], meta: Dict[str, Any]):
+    """
+    Записати резервну копію в out.
+    rows - (простір імен, ID, epoch processed_at), впорядковані за простором імен та ID
+    meta - {'last_check': ..., 'state': {...}}
+    """
+    writer = _Writer(out)
+    header = json.dumps(meta, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    writer.write(_varint(len(header)) + header)
+
+    namespace = None
+    previous = 0
+    for row_namespace, tender_id, processed_at in rows:
+        if row_namespace != namespace:
+            if namespace is not None:
+                writer.write(bytes([_END]))
+            encoded = row_namespace.encode('utf-8')
+            writer.write(bytes([_SECTION]) + _varint(len(encoded)) + encoded)
+            namespace, previous = row_namespace, 0
+
+        if _HEX_ID.fullmatch(tender_id):
+            entry = bytes([_HEX_ENTRY]) + bytes.fromhex(tender_id)
+        else:
+            encoded = tender_id.encode('utf-8')
+            entry = bytes([_TEXT_ENTRY]) + _varint(len(encoded)) + encoded
+        timestamp = int(processed_at)
+        writer.write(entry + _varint(_zigzag(timestamp - previous)))
+        previous = timestamp
+
+    if namespace is not None:
+        writer.write(bytes([_END]))
+    writer.write(bytes([_END]))
+    writer.close()
+
+
+def read_backup(stream: TextIO, prefix_read: bool = False) -> Tuple[Dict[str, Any], Iterator[Tuple[str, str, float]]]:
+    """
+    Метадані та лінивий ітератор записів (простір імен, ID, epoch) резервної копії.
+    prefix_read - префікс PTB1: уже прочитано з потоку
+    """
+    reader = _Reader(stream, prefix_read)
+    meta = json.loads(reader.read(reader.varint()).decode('utf-8'))
+
+    def rows() -> Iterator[Tuple[str, str, float]]:
+        while reader.byte() == _SECTION:
+            namespace = reader.read(reader.varint()).decode('utf-8')
+            previous = 0
+            while True:
+                kind = reader.byte()
+                if kind == _END:
+                    break
+                if kind == _HEX_ENTRY:
+                    tender_id = reader.read(16).hex()
+                elif kind == _TEXT_ENTRY:
+                    tender_id = reader.read(reader.varint()).decode('utf-8')
+                else:
+                    raise ValueError(f"Пошкоджена резервна копія (тип запису {kind})")
+                previous += _unzigzag(reader.varint())
+                yield namespace, tender_id, float(previous)
+
+    return meta, rows()
+
+
+def _epoch(date_str: Optional[str]) -> float:
+    try:
+        return datetime.fromisoformat(date_str).timestamp()
+    except (TypeError, ValueError):
+        return datetime.now().timestamp()
+
+
+def _json_rows(data: Dict) -> Iterator[Tuple[str, str, float]]:
+    """Записи з даних у форматі JSON-сховища, впорядковані за простором імен та ID"""
+    processed = data.get('processed_tenders') or {}
+    if isinstance(processed, list):
+        processed = {tender_id: None for tender_id in processed}
+    tables = {'': processed, **(data.get('namespaces') or {})}
+    for namespace in sorted(tables):
+        for tender_id in sorted(tables[namespace]):
+            yield namespace, tender_id, _epoch(tables[namespace][tender_id])
+
+
+def encode(data: Dict) -> str:
+    """Дані у форматі JSON-сховища (processed_tenders, namespaces, last_check, state) -> рядок PTB1"""
+    out = io.StringIO()
+    write_backup(out, _json_rows(data), {'last_check': data.get('last_check'), 'state': data.get('state') or {}})
+    return out.getvalue()
+
+
+def _decode_error(error: Exception) -> ValueError:
+    return ValueError(f"Пошкоджена резервна копія: {error}")
+
+
+def decode(text: str) -> Dict:
+    """
+    Рядок резервної копії -> дані у форматі JSON-сховища.
+    Приймає і старий формат (JSON). ValueError - пошкоджена копія.
+    """
+    text = text.strip()
+    if not text.startswith(PREFIX):
+        return json.loads(text)
+
+    data = {'processed_tenders': {}}
+    try:
+        meta, rows = read_backup(io.StringIO(text))
+        for namespace, tender_id, processed_at in rows:
+            table = data.setdefault('namespaces', {}).setdefault(namespace, {}) if namespace \
+                else data['processed_tenders']
+            table[tender_id] = datetime.fromtimestamp(processed_at).isoformat()
+    except (zlib.error, binascii.Error, UnicodeDecodeError) as e:
+        raise _decode_error(e) from e
+    data['last_check'] = meta.get('last_check')
+    data['state'] = meta.get('state') or {}
+    return data
+
+
+def export_storage(storage, out: TextIO) -> int:
+    """Записати історію сховища (DataStorage/SQLiteStorage) в out потоково. Повертає кількість записів"""
+    count = 0
+
+    def rows():
+        nonlocal count
+        for row in storage.iter_processed():
+            count += 1
+            yield row
+
+    write_backup(out, rows(), storage.get_backup_meta())
+    return count
+
+
+def import_storage(storage, stream: TextIO, batch_size: int = 1000) -> int:
+    """Імпортувати резервну копію (PTB1 або JSON) у сховище порціями. Повертає кількість нових записів"""
+    added = 0
+    batch = []
+    try:
+        head = stream.read(len(PREFIX))
+        if head == PREFIX:
+            meta, rows = read_backup(stream, prefix_read=True)
+        else:
+            data = json.loads(head + stream.read())
+            meta = {'last_check': data.get('last_check'), 'state': data.get('state') or {}}
+            rows = _json_rows(data)
+
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                added += storage.import_processed(batch)
+                batch = []
+    except (zlib.error, binascii.Error, UnicodeDecodeError) as e:
+        raise _decode_error(e) from e
+    added += storage.import_processed(batch)
+
+    storage.import_backup_meta(meta)
+    storage.flush()
+    return added
+
+
+def print_instruction(count: int, encode: Callable[[], str]):
+    """
+    Вивести backup для PROCESSED_TENDERS_BACKUP. Кодується лише невелика
+    історія; для більшої виводиться підказка про експорт у файл
+    """
+    text = encode() if count * ENTRY_SIZE <= PRINT_LIMIT else None
+    if text is not None and len(text) <= PRINT_LIMIT:
+        print(f"\n💾 Backup ({count} тендерів, {len(text)} символів). Оновіть PROCESSED_TENDERS_BACKUP в Railway:")
+        print(f"   {text}")
+    else:
+        print(f"\n💾 Backup ({count} тендерів) завеликий для логу: python main.py backup export --output backup.txt")
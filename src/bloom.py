@@ -0,0 +1,169 @@
+"""
+Фільтр Блума перед сховищем оброблених тендерів
+
+Відповідь "немає у фільтрі" означає, що тендер точно не оброблено, і
+сховище не читається. "Є у фільтрі" перевіряється в сховищі (можливий
+хибнопозитивний результат). Фільтр зберігається поряд зі сховищем як
+бітовий масив, відображений у пам'ять (mmap):
+
+    заголовок: PTBF, версія, k, m (бітів), місткість, записів, одиничних бітів
+    далі m / 8 байт бітів
+
+Видаляти ключі з фільтра неможливо, тому після очищення історії він
+будується заново.
+"""
+import hashlib
+import math
+import mmap
+import os
+import struct
+import tempfile
+from typing import Callable, Iterable, Optional
+
+from src import metrics
+
+
+MAGIC = b'PTBF'
+VERSION = 1
+
+_HEADER = struct.Struct('<4sBBxxQQQQ')
+
+# Найменша місткість нового фільтра, записів
+MIN_CAPACITY = 10000
+
+# Частка хибнопозитивних відповідей за замовчуванням
+ERROR_RATE = 0.001
+
+# Найбільше k: по 4 байти дайджесту blake2b (до 64 байт) на позицію
+MAX_K = 16
+
+
+def key(namespace: str, tender_id: str) -> str:
+    """Ключ фільтра для тендера простору імен"""
+    return f'{namespace}\0{tender_id}'
+
+
+def _positions(item: str, k: int, m: int) -> Iterable[int]:
+    """k позицій бітів з одного дайджесту blake2b"""
+    digest = hashlib.blake2b(item.encode('utf-8'), digest_size=4 * k).digest()
+    return (value % m for value in struct.unpack(f'<{k}I', digest))
+
+
+class BloomFilter:
+    """Фільтр Блума у файлі, відображеному в пам'ять"""
+
+    def __init__(self, path: str):
+        """Відкрити наявний файл фільтра. ValueError - файл пошкоджено"""
+        self.path = path
+        with open(path, 'r+b') as f:
+            self._map = mmap.mmap(f.fileno(), 0)
+        try:
+            magic, version, self.k, self.m, self.capacity, self.count, self.bits_set = \
+                _HEADER.unpack_from(self._map)
+        except struct.error as e:
+            self._map.close()
+            raise ValueError(f"Пошкоджений фільтр {path}") from e
+        if magic != MAGIC or version != VERSION or not self.k or \
+                len(self._map) != _HEADER.size + (self.m + 7) // 8:
+            self._map.close()
+            raise ValueError(f"Пошкоджений фільтр {path}")
+
+    @classmethod
+    def open(cls, path: str) -> Optional['BloomFilter']:
+        """Наявний фільтр або None, якщо файлу немає чи він пошкоджений"""
+        try:
+            return cls(path)
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def build(cls, path: str, items: Iterable[str], count: int,
+              error_rate: float = ERROR_RATE) -> 'BloomFilter':
+        """
+        Побудувати фільтр з ключів items і атомарно записати у path.
+        count - кількість записів у сховищі; місткість береться з запасом
+        """
+        capacity = max(MIN_CAPACITY, count * 2)
+        m = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        k = min(MAX_K, max(1, round(m / capacity * math.log(2))))
+
+        bits = bytearray((m + 7) // 8)
+        for item in items:
+            for position in _positions(item, k, m):
+                bits[position >> 3] |= 1 << (position & 7)
+        bits_set = sum(bin(byte).count('1') for byte in bits)
+
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.bloom')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_HEADER.pack(MAGIC, VERSION, k, m, capacity, count, bits_set))
+                f.write(bits)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return cls(path)
+
+    def __contains__(self, item: str) -> bool:
+        offset = _HEADER.size
+        for position in _positions(item, self.k, self.m):
+            if not self._map[offset + (position >> 3)] >> (position & 7) & 1:
+                return False
+        return True
+
+    def add(self, item: str):
+        """
+        Додати ключ. Лічильник записів (count) веде сховище: воно знає,
+        чи запис справді новий
+        """
+        offset = _HEADER.size
+        for position in _positions(item, self.k, self.m):
+            index = offset + (position >> 3)
+            byte = self._map[index]
+            mask = 1 << (position & 7)
+            if not byte & mask:
+                self._map[index] = byte | mask
+                self.bits_set += 1
+
+    @property
+    def full(self) -> bool:
+        """Записів більше за місткість - частка хибних відповідей зростає"""
+        return self.count > self.capacity
+
+    def false_positive_rate(self) -> float:
+        """Оцінка частки хибнопозитивних відповідей за заповненням бітів"""
+        return (self.bits_set / self.m) ** self.k
+
+    def flush(self):
+        """Записати заголовок і біти на диск"""
+        _HEADER.pack_into(self._map, 0, MAGIC, VERSION, self.k, self.m, self.capacity, self.count, self.bits_set)
+        self._map.flush()
+
+    def close(self):
+        if not self._map.closed:
+            self.flush()
+            self._map.close()
+
+
+def lookup(bloom: Optional[BloomFilter], backend: str, item: str, exists: Callable[[], bool]) -> bool:
+    """
+    Перевірка через фільтр: exists() (запит до сховища) викликається лише
+    тоді, коли фільтр не може дати точної відповіді
+    """
+    if bloom is None:
+        return exists()
+    if item not in bloom:
+        metrics.BLOOM_CHECKS.inc(backend=backend, result='negative')
+        return False
+    found = exists()
+    metrics.BLOOM_CHECKS.inc(backend=backend, result='positive' if found else 'false_positive')
+    return found
+
+
+def report(bloom: Optional[BloomFilter], backend: str):
+    """Оновити метрику оцінки частки хибнопозитивних відповідей"""
+    if bloom is not None:
+        metrics.BLOOM_FALSE_POSITIVE_RATE.set(bloom.false_positive_rate(), backend=backend)
@@ -4,16 +4,51 @@
 """
 import json
 import os
+import tempfile
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, Union
+
+from src import backup, bloom, metrics
+from src.records import TenderRecord
 
 
 class DataStorage:
-    """Клас для збереження та завантаження оброблених тендерів"""
+    """
+    Клас для збереження та завантаження оброблених тендерів.
+    
+    Дані тримаються в пам'яті; позначки накопичуються і записуються на диск
+    пачками (кожні flush_every позначок або при виклику flush()).
+    
+    З use_bloom=True (або STORAGE_BLOOM=1) перед перевіркою історії стоїть
+    фільтр Блума у файлі <сховище>.bloom.
     
-    def __init__(self, filepath: str = "data/processed_tenders.json"):
+    Файл створюється (або відновлюється з PROCESSED_TENDERS_BACKUP) і
+    читається при першому зверненні, а не в конструкторі.
+    """
+    
+    # Скільки нових позначок накопичувати перед записом на диск
+    FLUSH_EVERY = 20
+    
+    def __init__(self, filepath: str = "data/processed_tenders.json", flush_every: Optional[int] = None,
+                 use_bloom: Optional[bool] = None):
         """Ініціалізація сховища"""
         self.filepath = filepath
+        self.flush_every = (flush_every if flush_every is not None
+                            else int(os.getenv('STORAGE_FLUSH_EVERY', self.FLUSH_EVERY)))
+        self.bloom_enabled = use_bloom if use_bloom is not None else os.getenv('STORAGE_BLOOM', '0') == '1'
+        self.bloom_path = os.path.splitext(filepath)[0] + '.bloom'
+        self._bloom: Optional[bloom.BloomFilter] = None
+        self._data: Optional[Dict] = None
+        self._file_stamp: Optional[Tuple[int, int]] = None
+        self._unsaved_marks = 0
+        self._backup_changed = False
+        self._opened = False
+    
+    def _open(self):
+        """Підготувати файл при першому зверненні: створити або відновити з backup"""
+        if self._opened:
+            return
+        self._opened = True
         self._ensure_file_exists()
         self._restore_from_env_if_needed()
     
@@ -30,120 +65,378 @@ class DataStorage:
         """
         Відновити дані з PROCESSED_TENDERS_BACKUP якщо локальний файл порожній
         """
-        backup = os.getenv('PROCESSED_TENDERS_BACKUP', '')
+        backup_value = os.getenv('PROCESSED_TENDERS_BACKUP', '')
         
-        if not backup:
+        if not backup_value:
             return
         
         data = self._load_data()
         
         if len(data.get("processed_tenders", {})) == 0:
             try:
-                backup_data = json.loads(backup)
+                backup_data = backup.decode(backup_value)
                 if backup_data.get("processed_tenders"):
                     print(f"🔄 Відновлено {len(backup_data['processed_tenders'])} тендерів з backup")
-                    self._save_data(backup_data)
-            except json.JSONDecodeError:
+                    self._save_data(self._normalize(backup_data))
+            except ValueError:
                 print("⚠️  Помилка парсингу PROCESSED_TENDERS_BACKUP")
     
-    def _load_data(self) -> Dict:
-        """Завантажити дані з файлу"""
+    def _get_file_stamp(self) -> Optional[Tuple[int, int]]:
+        """Відбиток файлу (mtime, розмір) для виявлення зовнішніх змін"""
+        try:
+            stat = os.stat(self.filepath)
+            return stat.st_mtime_ns, stat.st_size
+        except FileNotFoundError:
+            return None
+    
+    @staticmethod
+    def _normalize(data: Dict) -> Dict:
+        """Привести старий формат (список ID без дат) до словника"""
+        processed = data.get("processed_tenders") or {}
+        if isinstance(processed, list):
+            now = datetime.now().isoformat()
+            processed = {tid: now for tid in processed}
+        data["processed_tenders"] = processed
+        return data
+    
+    def _read_file(self) -> Dict:
+        """Прочитати дані з файлу"""
         try:
-            with open(self.filepath, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with metrics.STORAGE_SECONDS.time(backend='json', operation='load'):
+                with open(self.filepath, 'r', encoding='utf-8') as f:
+                    return self._normalize(json.load(f))
         except (json.JSONDecodeError, FileNotFoundError):
             return {"processed_tenders": {}, "last_check": None}
     
+    def _load_data(self) -> Dict:
+        """
+        Отримати дані з пам'яті. Файл перечитується лише якщо його змінили
+        ззовні і в пам'яті немає незбережених позначок.
+        """
+        self._open()
+        stamp = self._get_file_stamp()
+        if self._data is None or (stamp != self._file_stamp and not self._unsaved_marks):
+            self._data = self._read_file()
+            self._file_stamp = stamp
+        return self._data
+    
     def _save_data(self, data: Dict):
-        """Зберегти дані у файл"""
-        with open(self.filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        """Атомарно зберегти дані у файл (тимчасовий файл + rename)"""
+        directory = os.path.dirname(self.filepath) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix='.json')
+        try:
+            with metrics.STORAGE_SECONDS.time(backend='json', operation='save'):
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.filepath)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        
+        self._data = data
+        self._file_stamp = self._get_file_stamp()
+        self._unsaved_marks = 0
     
-    def is_processed(self, tender_id: str) -> bool:
-        """Перевірити чи тендер вже оброблено"""
+    def _write_marks(self):
+        """Записати накопичені позначки і фільтр Блума на диск"""
+        if self._unsaved_marks and self._data is not None:
+            self._save_data(self._data)
+        if self._bloom is not None:
+            self._bloom.flush()
+            bloom.report(self._bloom, 'json')
+    
+    def flush(self):
+        """Записати накопичені позначки на диск і вивести backup, якщо історія змінилась"""
+        self._write_marks()
+        if self._backup_changed:
+            self._backup_changed = False
+            self._print_backup_instruction()
+    
+    def _processed(self, namespace: str = '') -> Dict[str, str]:
+        """
+        Словник оброблених тендерів простору імен. Порожній простір -
+        основна історія (processed_tenders), інші - окремі підписки
+        """
         data = self._load_data()
-        processed = data["processed_tenders"]
-        
-        if isinstance(processed, list):
-            return tender_id in processed
-        return tender_id in processed
+        if not namespace:
+            return data["processed_tenders"]
+        return data.setdefault("namespaces", {}).setdefault(namespace, {})
+    
+    def _tables(self) -> Dict[str, Dict[str, str]]:
+        """Історії всіх просторів імен ('' - основна)"""
+        data = self._load_data()
+        return {'': data["processed_tenders"], **data.get("namespaces", {})}
+    
+    def _current_bloom(self) -> Optional[bloom.BloomFilter]:
+        """
+        Фільтр Блума, що відповідає історії. Будується заново, якщо файлу
+        немає, кількість записів не збігається (історію змінили ззовні або
+        фільтр не встиг зберегтися) чи фільтр переповнений
+        """
+        if not self.bloom_enabled:
+            return None
+        tables = self._tables()
+        count = sum(len(table) for table in tables.values())
+        if self._bloom is None:
+            self._bloom = bloom.BloomFilter.open(self.bloom_path)
+        if self._bloom is None or self._bloom.count != count or self._bloom.full:
+            if self._bloom is not None:
+                self._bloom.close()
+            self._bloom = bloom.BloomFilter.build(
+                self.bloom_path,
+                (bloom.key(namespace, tender_id) for namespace, table in tables.items() for tender_id in table),
+                count,
+            )
+            bloom.report(self._bloom, 'json')
+        return self._bloom
+    
+    def _reset_bloom(self):
+        """Викинути фільтр (з нього не можна видаляти); наступна перевірка побудує новий"""
+        if self._bloom is not None:
+            self._bloom.close()
+            self._bloom = None
+        if os.path.exists(self.bloom_path):
+            os.remove(self.bloom_path)
+    
+    def _add_to_bloom(self, tender_id: str, namespace: str):
+        """Додати новий запис історії до відкритого фільтра"""
+        if self._bloom is not None:
+            self._bloom.add(bloom.key(namespace, tender_id))
+            self._bloom.count += 1
+    
+    def is_processed(self, tender_id: str, namespace: str = '') -> bool:
+        """Перевірити чи тендер вже оброблено"""
+        return bloom.lookup(self._current_bloom(), 'json', bloom.key(namespace, tender_id),
+                            lambda: tender_id in self._processed(namespace))
+    
+    def _mark(self, data: Dict, tender_id: str, namespace: str) -> bool:
+        """Додати позначку в пам'яті (без запису на диск). False - тендер уже оброблено"""
+        processed = self._processed(namespace)
+        if tender_id in processed:
+            return False
+        processed[tender_id] = datetime.now().isoformat()
+        self._add_to_bloom(tender_id, namespace)
+        data["last_check"] = datetime.now().isoformat()
+        return True
     
-    def mark_as_processed(self, tender_id: str):
+    def mark_as_processed(self, tender_id: str, namespace: str = ''):
         """Позначити тендер як оброблений"""
         data = self._load_data()
-        processed = data["processed_tenders"]
-        
-        if isinstance(processed, list):
-            processed = {tid: datetime.now().isoformat() for tid in processed}
-            data["processed_tenders"] = processed
         
-        if tender_id not in processed:
-            processed[tender_id] = datetime.now().isoformat()
-            data["last_check"] = datetime.now().isoformat()
-            self._save_data(data)
-            self._print_backup_instruction(data)
-    
-    def _print_backup_instruction(self, data: Dict):
-        """Вивести JSON для збереження в Railway Variables"""
-        count = len(data.get("processed_tenders", {}))
-        if count > 0 and count % 5 == 0:
-            print(f"\n💾 Backup ({count} тендерів). Оновіть PROCESSED_TENDERS_BACKUP в Railway:")
-            compact = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
-            if len(compact) < 2000:
-                print(f"   {compact[:500]}...")
-    
-    def get_processed_count(self) -> int:
+        if self._mark(data, tender_id, namespace):
+            self._unsaved_marks += 1
+            self._backup_changed = True
+            
+            if self._unsaved_marks >= self.flush_every:
+                self._write_marks()
+    
+    def mark_many(self, tender_ids: Iterable[str], namespace: str = ''):
+        """Позначити кілька тендерів як оброблені"""
+        for tender_id in tender_ids:
+            self.mark_as_processed(tender_id, namespace)
+    
+    def _print_backup_instruction(self):
+        """Вивести компактний backup для збереження в Railway Variables"""
+        count = sum(len(table) for table in self._tables().values())
+        if count > 0:
+            backup.print_instruction(count, self.get_backup)
+    
+    def get_processed_count(self, namespace: str = '') -> int:
         """Отримати кількість оброблених тендерів"""
-        data = self._load_data()
-        processed = data["processed_tenders"]
-        
-        if isinstance(processed, list):
-            return len(processed)
-        return len(processed)
+        return len(self._processed(namespace))
     
-    def get_processed_ids(self) -> List[str]:
+    def get_processed_ids(self, namespace: str = '') -> List[str]:
         """Отримати список ID оброблених тендерів"""
-        data = self._load_data()
-        processed = data["processed_tenders"]
-        
-        if isinstance(processed, list):
-            return processed
-        return list(processed.keys())
+        return list(self._processed(namespace).keys())
     
     def get_last_check(self) -> str:
         """Отримати час останньої перевірки"""
         data = self._load_data()
         return data.get("last_check", "Ніколи")
     
+    def get_state(self, key: str, default: Any = None) -> Any:
+        """Отримати службове значення (курсор стрічки тощо)"""
+        data = self._load_data()
+        return data.get("state", {}).get(key, default)
+    
+    def set_state(self, key: str, value: Any):
+        """Зберегти службове значення поряд з обробленими тендерами"""
+        data = self._load_data()
+        data.setdefault("state", {})[key] = value
+        self._save_data(data)
+    
+    def outbox_add(self, entries: Iterable[Dict]) -> int:
+        """
+        Записати сповіщення в outbox і одразу зберегти файл.
+        entries - {'key', 'namespace', 'tender_ids', 'text'}; запис з ключем,
+        що вже є в outbox, пропускається. Повертає кількість доданих
+        """
+        data = self._load_data()
+        outbox = data.setdefault("outbox", [])
+        keys = {entry['key'] for entry in outbox}
+        added = 0
+        for entry in entries:
+            if entry['key'] not in keys:
+                keys.add(entry['key'])
+                outbox.append({name: entry[name] for name in ('key', 'namespace', 'tender_ids', 'text')})
+                added += 1
+        if added:
+            self._save_data(data)
+        return added
+    
+    def outbox_pending(self, namespace: str = '') -> List[Dict]:
+        """Невідправлені сповіщення простору імен у порядку додавання"""
+        return [dict(entry) for entry in self._load_data().get("outbox", []) if entry['namespace'] == namespace]
+    
+    def outbox_complete(self, keys: Iterable[str], namespace: str = '') -> int:
+        """
+        Відправлені сповіщення: тендери позначаються обробленими, записи
+        видаляються з outbox - одним записом файлу. Повертає кількість тендерів
+        """
+        keys = set(keys)
+        data = self._load_data()
+        outbox = data.get("outbox", [])
+        delivered = [entry for entry in outbox if entry['key'] in keys and entry['namespace'] == namespace]
+        if not delivered:
+            return 0
+        for entry in delivered:
+            for tender_id in entry['tender_ids']:
+                self._mark(data, tender_id, namespace)
+        data["outbox"] = [entry for entry in outbox if entry['key'] not in keys or entry['namespace'] != namespace]
+        self._save_data(data)
+        self._backup_changed = True
+        return sum(len(entry['tender_ids']) for entry in delivered)
+    
+    def record_seen(self, items: Iterable[Tuple[str, str]]):
+        """
+        Останній побачений dateModified для всіх тендерів стрічки зберігає
+        лише SQLiteStorage; JSON-файл для цього не масштабується
+        """
+    
+    def get_seen_date_modified(self, tender_id: str) -> Optional[str]:
+        """Див. record_seen: JSON-сховище не веде цю історію"""
+        return None
+    
+    @staticmethod
+    def make_snapshot(tender: Union[TenderRecord, Dict]) -> Dict:
+        """Компактний знімок тендера: лише поля, потрібні для сповіщення"""
+        return TenderRecord.coerce(tender).snapshot()
+    
+    def save_snapshot(self, tender: Union[TenderRecord, Dict]):
+        """Зберегти компактний знімок знайденого тендера з відбитком відстежуваних полів"""
+        record = TenderRecord.coerce(tender)
+        snapshot = record.snapshot()
+        snapshot['hash'] = record.tracked_hash()
+        data = self._load_data()
+        data.setdefault("snapshots", {})[snapshot['id']] = snapshot
+        self._unsaved_marks += 1
+    
+    def get_snapshot(self, tender_id: str) -> Optional[Dict]:
+        """Отримати збережений знімок тендера"""
+        return self._load_data().get("snapshots", {}).get(tender_id)
+    
+    def get_tracked(self, tender_ids: Iterable[str]) -> Dict[str, Tuple[Optional[str], str]]:
+        """
+        Тендери зі знімками серед tender_ids: ID -> (dateModified знімка, відбиток).
+        Відбиток '' - знімок збережено до відстеження змін
+        """
+        snapshots = self._load_data().get("snapshots", {})
+        return {
+            tender_id: (snapshots[tender_id].get('dateModified'), snapshots[tender_id].get('hash', ''))
+            for tender_id in tender_ids if tender_id in snapshots
+        }
+    
     def get_backup_json(self) -> str:
-        """Отримати JSON для збереження в PROCESSED_TENDERS_BACKUP"""
+        """Отримати JSON для збереження в PROCESSED_TENDERS_BACKUP (старий формат)"""
         data = self._load_data()
         return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
     
+    def get_backup(self) -> str:
+        """Отримати компактний backup (PTB1) для PROCESSED_TENDERS_BACKUP"""
+        return backup.encode(self._load_data())
+    
+    def iter_processed(self) -> Iterator[Tuple[str, str, float]]:
+        """Записи (простір імен, ID, epoch) за простором імен та ID - для експорту"""
+        tables = self._tables()
+        for namespace in sorted(tables):
+            table = tables[namespace]
+            for tender_id in sorted(table):
+                try:
+                    processed_at = datetime.fromisoformat(table[tender_id]).timestamp()
+                except (TypeError, ValueError):
+                    processed_at = datetime.now().timestamp()
+                yield namespace, tender_id, processed_at
+    
+    def get_backup_meta(self) -> Dict[str, Any]:
+        """last_check і службові значення для backup"""
+        data = self._load_data()
+        return {'last_check': data.get("last_check"), 'state': data.get("state", {})}
+    
+    def import_processed(self, rows: Iterable[Tuple[str, str, float]]) -> int:
+        """Додати записи (простір імен, ID, epoch) з backup. Повертає кількість нових"""
+        added = 0
+        for namespace, tender_id, processed_at in rows:
+            processed = self._processed(namespace)
+            if tender_id not in processed:
+                processed[tender_id] = datetime.fromtimestamp(processed_at).isoformat()
+                self._add_to_bloom(tender_id, namespace)
+                added += 1
+        self._unsaved_marks += added
+        return added
+    
+    def import_backup_meta(self, meta: Dict[str, Any]):
+        """Відновити last_check і службові значення з backup"""
+        data = self._load_data()
+        data.setdefault("state", {}).update(meta.get('state') or {})
+        if meta.get('last_check'):
+            data["last_check"] = meta['last_check']
+        self._unsaved_marks += 1
+    
     def cleanup_old_tenders(self, days: int = 90):
         """Видалити тендери старші за N днів"""
         data = self._load_data()
         processed = data["processed_tenders"]
         
-        if isinstance(processed, list):
-            print(f"⚠️  Старий формат даних, очищення неможливе")
-            return
-        
         cutoff_date = datetime.now() - timedelta(days=days)
-        old_count = len(processed)
-        processed_clean = {}
         
-        for tender_id, date_str in processed.items():
+        def is_recent(date_str: str) -> bool:
             try:
-                tender_date = datetime.fromisoformat(date_str)
-                if tender_date > cutoff_date:
-                    processed_clean[tender_id] = date_str
-            except:
-                processed_clean[tender_id] = date_str
+                return datetime.fromisoformat(date_str) > cutoff_date
+            except (TypeError, ValueError):
+                return True
         
-        data["processed_tenders"] = processed_clean
-        self._save_data(data)
+        tables = [processed] + list(data.get("namespaces", {}).values())
+        removed = 0
+        
+        for table in tables:
+            for tender_id in [tid for tid, date_str in table.items() if not is_recent(date_str)]:
+                del table[tender_id]
+                removed += 1
         
-        removed = old_count - len(processed_clean)
         if removed > 0:
-            print(f"🧹 Видалено {removed} старих записів (старші {days} днів)")
\ No newline at end of file
+            snapshots = data.get("snapshots")
+            if snapshots:
+                data["snapshots"] = {
+                    tid: snap for tid, snap in snapshots.items()
+                    if any(tid in table for table in tables)
+                }
+            self._save_data(data)
+            self._reset_bloom()
+            print(f"🧹 Видалено {removed} старих записів (старші {days} днів)")
+
+
+def create_storage():
+    """
+    Створити сховище за STORAGE_BACKEND: json (за замовчуванням) або sqlite
+    """
+    backend = os.getenv('STORAGE_BACKEND', 'json').lower()
+    json_path = os.getenv('STORAGE_PATH', 'data/processed_tenders.json')
+    
+    if backend == 'sqlite':
+        from src.sqlite_storage import SQLiteStorage
+        return SQLiteStorage(os.getenv('STORAGE_DB_PATH', 'data/tenders.db'), json_path=json_path)
+    
+    return DataStorage(json_path)
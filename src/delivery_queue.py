@@ -0,0 +1,238 @@
+"""
+Черга доставки сповіщень у Telegram з обмеженням частоти
+та outbox у сховищі (сповіщення надсилається один раз)
+"""
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+from src import metrics
+from src.records import TenderRecord
+
+
+class TokenBucket:
+    """
+    Обмежувач частоти «відро з токенами»: rate токенів на секунду,
+    не більше capacity накопичених токенів (короткий сплеск)
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        """Додати токени за час, що минув"""
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Зачекати, доки з'явиться токен, і забрати його"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = max(0.0, self._blocked_until - now)
+                if not wait:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Призупинити видачу токенів (retry_after від Telegram)"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+class DeliveryQueue:
+    """
+    Черга сповіщень підписки поверх outbox сховища.
+
+    enqueue() одразу записує сповіщення в outbox з ключем ідемпотентності,
+    тож знайдений тендер не губиться і не додається двічі. Відправка
+    (deliver() або take/send/finish паралельно з перевіркою) фіксує кожне
+    повідомлення окремо: тендери позначаються обробленими і прибираються
+    з outbox однією транзакцією. Після падіння невідправлені повідомлення
+    лишаються в outbox; повторно може піти лише те, що було в дорозі.
+    """
+
+    # Ключ стану, де старі версії зберігали невідправлені повідомлення
+    PENDING_KEY = 'pending_notifications'
+
+    # Спроб відправки одного повідомлення за запуск (з урахуванням 429)
+    MAX_ATTEMPTS = 3
+
+    def __init__(self, notifier, storage, digest: bool = None, namespace: str = '',
+                 limiter: Optional[TokenBucket] = None):
+        """
+        notifier - TelegramNotifier, storage - DataStorage/SQLiteStorage
+        digest - пакувати кілька тендерів в одне повідомлення
+        namespace - простір імен історії підписки у сховищі
+        limiter - обмежувач частоти чату (черги підписок з одним chat_id
+        мають ділити один, див. chat_limiter())
+        """
+        self.notifier = notifier
+        self.storage = storage
+        self.namespace = namespace
+        self.pending_key = f"{self.PENDING_KEY}:{namespace}" if namespace else self.PENDING_KEY
+
+        if digest is None:
+            digest = os.getenv('TELEGRAM_DIGEST', '0') == '1'
+        self.digest = digest
+
+        self.limiter = limiter or self.chat_limiter(notifier.chat_id)
+
+        # Ключі outbox: додані цим екземпляром, у дорозі, невдалі за цей запуск
+        self._keys: Set[str] = set()
+        self._in_flight: Set[str] = set()
+        self._failed: Set[str] = set()
+        self._lock = threading.Lock()
+        self._migrate_pending()
+
+    @staticmethod
+    def chat_limiter(chat_id) -> TokenBucket:
+        """Обмежувач за лімітами Telegram: ~1 повідомлення/сек в особистий чат, 20/хв у групу"""
+        is_group = str(chat_id).startswith('-')
+        per_minute = float(os.getenv('TELEGRAM_RATE_PER_MINUTE', '20' if is_group else '60'))
+        burst = float(os.getenv('TELEGRAM_BURST', '3'))
+        return TokenBucket(rate=per_minute / 60, capacity=burst)
+
+    def _migrate_pending(self):
+        """Перенести невідправлені повідомлення старого формату (стан сховища) в outbox"""
+        messages = self.storage.get_state(self.pending_key)
+        if not messages:
+            return
+        self.storage.outbox_add({
+            'key': f"{self.namespace}:pending:{','.join(message['tender_ids'])}",
+            'namespace': self.namespace,
+            'tender_ids': message['tender_ids'],
+            'text': message['text'],
+        } for message in messages)
+        self.storage.set_state(self.pending_key, [])
+
+    def pending_ids(self) -> Set[str]:
+        """ID тендерів, що чекають відправки в outbox"""
+        return {
+            tender_id
+            for entry in self.storage.outbox_pending(self.namespace)
+            for tender_id in entry['tender_ids']
+        }
+
+    def enqueue(self, tender: Dict, changes: Optional[List] = None) -> bool:
+        """
+        Записати сповіщення про тендер в outbox; changes - зміни вже надісланого
+        тендера (поле, було, стало). False - таке сповіщення вже чекає відправки
+        """
+        tender_id = tender.get('id')
+        if changes:
+            text = self.notifier.format_change_message(tender, changes)
+            key = f"{self.namespace}:change:{tender_id}:{TenderRecord.coerce(tender).tracked_hash()}"
+        else:
+            text = self.notifier.format_tender_message(tender)
+            key = f"{self.namespace}:new:{tender_id}"
+
+        added = self.storage.outbox_add([
+            {'key': key, 'namespace': self.namespace, 'tender_ids': [tender_id], 'text': text}
+        ])
+        if added:
+            with self._lock:
+                self._keys.add(key)
+        return bool(added)
+
+    def take(self, include_pending: bool = True) -> List[Dict]:
+        """
+        Повідомлення з outbox, готові до відправки (у дайджесті - по кілька
+        тендерів). Взяті повідомлення не видаються знову, доки не викликано
+        finish(); невдалі за цей запуск - не видаються зовсім.
+
+        include_pending=False - лише сповіщення, додані цим екземпляром
+        """
+        entries = self.storage.outbox_pending(self.namespace)
+        messages = []
+        with self._lock:
+            for entry in entries:
+                key = entry['key']
+                if key in self._in_flight or key in self._failed:
+                    continue
+                if not include_pending and key not in self._keys:
+                    continue
+                self._in_flight.add(key)
+
+                if self.digest and messages:
+                    last = messages[-1]
+                    combined = f"{last['text']}\n{'─' * 20}\n\n{entry['text']}"
+                    if len(combined) <= self.notifier.MAX_MESSAGE_LENGTH:
+                        last['text'] = combined
+                        last['keys'].append(key)
+                        last['tender_ids'].extend(entry['tender_ids'])
+                        continue
+
+                messages.append({'keys': [key], 'tender_ids': list(entry['tender_ids']), 'text': entry['text']})
+        return messages
+
+    def send(self, message: Dict) -> bool:
+        """Відправити повідомлення, поважаючи ліміт та retry_after (можна з кількох потоків)"""
+        for _ in range(self.MAX_ATTEMPTS):
+            self.limiter.acquire()
+            success, retry_after = self.notifier.send_message(message['text'])
+
+            if success:
+                return True
+            if retry_after is None:
+                return False
+
+            print(f"⏳ Telegram просить зачекати {retry_after:.0f} с")
+            metrics.TELEGRAM_RETRIES.inc()
+            self.limiter.pause(retry_after)
+
+        return False
+
+    def finish(self, message: Dict, delivered: bool) -> int:
+        """
+        Зафіксувати результат відправки: доставлене прибирається з outbox разом
+        з позначкою тендерів, невдале лишається до наступного запуску.
+        Повертає кількість доставлених тендерів
+        """
+        with self._lock:
+            self._in_flight.difference_update(message['keys'])
+            if not delivered:
+                self._failed.update(message['keys'])
+                return 0
+        return self.storage.outbox_complete(message['keys'], self.namespace)
+
+    @property
+    def failed(self) -> int:
+        """Скільки сповіщень не вдалося відправити за цей запуск"""
+        with self._lock:
+            return len(self._failed)
+
+    def deliver(self, include_pending: bool = True) -> int:
+        """
+        Відправити сповіщення з outbox по черзі. Повертає кількість
+        доставлених тендерів.
+
+        include_pending=False - лише сповіщення, додані цим екземпляром
+        (повідомлення минулих запусків лишаються в outbox недоторканими)
+        """
+        messages = self.take(include_pending)
+        if not messages:
+            return 0
+
+        previous = sum(1 for message in messages if not self._keys.issuperset(message['keys']))
+        if previous:
+            print(f"🔁 Повторна відправка {previous} повідомлень з попереднього запуску")
+
+        delivered = 0
+        for message in messages:
+            delivered += self.finish(message, self.send(message))
+
+        if self.failed:
+            print(f"⚠️  Не відправлено {self.failed} повідомлень, повтор при наступному запуску")
+        return delivered
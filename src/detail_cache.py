@@ -0,0 +1,176 @@
+"""
+Локальний дисковий кеш деталей тендерів
+Ключ - ID тендера + dateModified: поки тендер не змінився, повторний запит не потрібен
+"""
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+class DetailCache:
+    """
+    Дисковий LRU-кеш з обмеженням розміру та TTL.
+
+    Кожен тендер - окремий файл. mtime файлу - час запису (для TTL),
+    atime - час останнього звернення (для витіснення LRU).
+    """
+
+    def __init__(self, directory: str = "data/detail_cache", max_bytes: int = 100 * 1024 * 1024,
+                 ttl_seconds: float = 72 * 3600):
+        """Ініціалізація кешу (каталог створюється при першому записі)"""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+        self._lock = threading.Lock()
+        # tender_id -> (розмір, час останнього звернення)
+        self._index: Dict[str, Tuple[int, float]] = {}
+        self._total_bytes = 0
+        self._load_index()
+
+    @classmethod
+    def from_env(cls) -> Optional['DetailCache']:
+        """Створити кеш з налаштувань середовища (DETAIL_CACHE_DIR='' вимикає кеш)"""
+        directory = os.getenv('DETAIL_CACHE_DIR', 'data/detail_cache')
+        if not directory:
+            return None
+        return cls(
+            directory=directory,
+            max_bytes=int(float(os.getenv('DETAIL_CACHE_MAX_MB', '100')) * 1024 * 1024),
+            ttl_seconds=float(os.getenv('DETAIL_CACHE_TTL_HOURS', '72')) * 3600,
+        )
+
+    def _path(self, tender_id: str) -> str:
+        """Шлях до файлу тендера"""
+        safe_id = re.sub(r'[^A-Za-z0-9_-]', '_', tender_id)
+        return os.path.join(self.directory, f"{safe_id}.json")
+
+    def _load_index(self):
+        """Побудувати індекс з файлів каталогу, видаливши прострочені"""
+        if not os.path.isdir(self.directory):
+            return
+
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.json') or not entry.is_file():
+                continue
+            stat = entry.stat()
+            if now - stat.st_mtime > self.ttl_seconds:
+                self._remove_file(entry.path)
+                continue
+            self._index[entry.name[:-5]] = (stat.st_size, stat.st_atime)
+            self._total_bytes += stat.st_size
+
+    @staticmethod
+    def _remove_file(path: str):
+        """Видалити файл, ігноруючи відсутність"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _drop(self, key: str):
+        """Прибрати запис з індексу та диска (під блокуванням)"""
+        size, _ = self._index.pop(key, (0, 0))
+        self._total_bytes -= size
+        self._remove_file(os.path.join(self.directory, f"{key}.json"))
+
+    def get(self, tender_id: str, date_modified: Optional[str]) -> Optional[Dict]:
+        """
+        Отримати деталі з кешу, якщо збережена копія має той самий dateModified
+        і не прострочена
+        """
+        if not date_modified:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        path = self._path(tender_id)
+        key = os.path.basename(path)[:-5]
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            stat = os.stat(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        now = time.time()
+        if entry.get('dateModified') != date_modified or now - stat.st_mtime > self.ttl_seconds:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        # Оновити лише atime: mtime лишається часом запису для TTL
+        os.utime(path, (now, stat.st_mtime))
+
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += stat.st_size
+            self._index[key] = (stat.st_size, now)
+
+        return entry.get('data')
+
+    def put(self, tender_id: str, date_modified: Optional[str], data: Dict):
+        """Зберегти деталі тендера та витіснити найстаріші записи понад ліміт"""
+        if not date_modified:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(tender_id)
+        key = os.path.basename(path)[:-5]
+
+        payload = json.dumps(
+            {'dateModified': date_modified, 'data': data},
+            ensure_ascii=False, separators=(',', ':')
+        ).encode('utf-8')
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp_')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            old_size, _ = self._index.get(key, (0, 0))
+            self._index[key] = (len(payload), time.time())
+            self._total_bytes += len(payload) - old_size
+            self._evict()
+
+    def _evict(self):
+        """Витіснити найдавніше використані записи, доки кеш не вміститься в ліміт"""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        target = self.max_bytes * 0.9
+        for key, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= target:
+                break
+            self._drop(key)
+
+    def reset_stats(self):
+        """Обнулити лічильники (на початку кожного запуску)"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.bytes_saved = 0
+
+    def stats(self) -> Dict:
+        """Лічильники кешу з останнього reset_stats()"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'bytes_saved': self.bytes_saved,
+                'entries': len(self._index),
+                'size_bytes': self._total_bytes,
+            }
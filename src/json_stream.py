@@ -0,0 +1,197 @@
+"""
+Потокове читання відповідей Prozorro API
+
+Якщо встановлено ijson, відповідь розбирається подіями прямо з сокета:
+зі сторінки стрічки збираються лише елементи data та next_page.offset,
+з деталей тендера - лише потрібні поля (bids, awards тощо не потрапляють
+у пам'ять, від документів одразу будуються лише ID та дата зміни). Без
+ijson - звичайний response.json() з тією ж проекцією полів.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+# Чи можна читати відповіді потоково (передається як stream= у запит)
+AVAILABLE = ijson is not None
+
+# Поля деталей тендера, потрібні правилам відбору та сповіщенню
+DETAIL_FIELDS = frozenset({
+    'id', 'tenderID', 'title', 'description', 'status', 'dateModified',
+    'procurementMethodType', 'value', 'tenderPeriod', 'procuringEntity', 'items', 'documents',
+})
+
+# Поля документа, потрібні для відстеження змін
+DOCUMENT_FIELDS = frozenset({'id', 'dateModified'})
+
+# Масиви деталей, від елементів яких лишаються лише вказані поля
+ITEM_FIELDS = {'documents': DOCUMENT_FIELDS}
+
+
+def project(document: Optional[Dict], fields: Iterable[str]) -> Optional[Dict]:
+    """Лише поля fields документа"""
+    if document is None:
+        return None
+    return {key: value for key, value in document.items() if key in fields}
+
+
+def project_details(details: Optional[Dict], fields: Iterable[str]) -> Optional[Dict]:
+    """Лише поля fields деталей; елементи масивів ITEM_FIELDS - лише з їхніми полями"""
+    details = project(details, fields)
+    if details:
+        for key, item_fields in ITEM_FIELDS.items():
+            if isinstance(details.get(key), list):
+                details[key] = [project(item, item_fields) if isinstance(item, dict) else item
+                                for item in details[key]]
+    return details
+
+
+class _CountingReader:
+    """Потік тіла відповіді, що рахує прочитані (вже розпаковані) байти"""
+
+    __slots__ = ('raw', 'bytes')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.raw.read(size)
+        self.bytes += len(data)
+        return data
+
+
+def _events(response) -> Optional[Iterator[Tuple[str, str, object]]]:
+    """Події ijson з тіла відповіді або None, якщо відповідь уже прочитано чи ijson немає"""
+    raw = getattr(response, 'raw', None)
+    if ijson is None or raw is None or getattr(response, '_content_consumed', False):
+        return None
+    raw.decode_content = True
+    reader = response._decoded_reader = _CountingReader(raw)
+    return ijson.parse(reader, use_float=True)
+
+
+def body_size(response) -> Tuple[int, int]:
+    """
+    Розмір прочитаного тіла відповіді: (байтів з мережі, байтів після
+    розпакування gzip/deflate/br). Без стиснення значення однакові
+    """
+    reader = getattr(response, '_decoded_reader', None)
+    if reader is not None:
+        decoded = reader.bytes
+    else:
+        content = getattr(response, '_content', None)
+        decoded = len(content) if isinstance(content, bytes) else 0
+    raw = getattr(response, 'raw', None)
+    wire = raw.tell() if hasattr(raw, 'tell') else decoded
+    return wire, decoded
+
+
+class _ItemBuilder:
+    """
+    ObjectBuilder значення за шляхом prefix. Якщо задано item_fields і
+    значення - масив об'єктів, від кожного елемента будуються лише ці поля
+    """
+
+    __slots__ = ('_builder', '_item', '_fields')
+
+    def __init__(self, prefix: str, item_fields: Optional[Iterable[str]] = None):
+        self._builder = ijson.ObjectBuilder()
+        self._item = f'{prefix}.item'
+        self._fields = item_fields
+
+    @property
+    def value(self):
+        return self._builder.value
+
+    def event(self, prefix: str, event: str, value):
+        if self._fields is not None:
+            # Поле елемента, до якого належить подія (None - сам масив чи елемент)
+            field = None
+            if prefix == self._item and event == 'map_key':
+                field = value
+            elif prefix.startswith(self._item + '.'):
+                field = prefix[len(self._item) + 1:].partition('.')[0]
+            if field is not None and field not in self._fields:
+                return
+        self._builder.event(event, value)
+
+
+def _collect(events: Iterator[Tuple[str, str, object]], root: str, fields: Optional[Set[str]] = None,
+             item_fields: Optional[Dict[str, Iterable[str]]] = None) -> Iterator[Tuple[str, object]]:
+    """
+    Пари (ключ, значення) об'єкта за шляхом root. Значення ключів поза
+    fields пропускаються без побудови; fields=None - всі ключі. Для масивів
+    з item_fields будуються лише вказані поля елементів.
+    """
+    item_fields = item_fields or {}
+    key = None
+    builder = None
+    depth = 0
+    for prefix, event, value in events:
+        if builder is not None:
+            builder.event(prefix, event, value)
+            if event in ('start_map', 'start_array'):
+                depth += 1
+            elif event in ('end_map', 'end_array'):
+                depth -= 1
+                if depth == 0:
+                    yield key, builder.value
+                    builder = None
+            continue
+
+        if prefix == root and event == 'map_key':
+            key = value if fields is None or value in fields else None
+        elif key is not None and prefix == f'{root}.{key}':
+            if event in ('start_map', 'start_array'):
+                builder = _ItemBuilder(prefix, item_fields.get(key))
+                builder.event(prefix, event, value)
+                depth = 1
+            else:
+                yield key, value
+
+
+def read_feed_page(response) -> Tuple[List[Dict], Optional[str]]:
+    """Елементи сторінки стрічки та next_page.offset"""
+    events = _events(response)
+    if events is None:
+        data = response.json()
+        return data.get('data', []), (data.get('next_page') or {}).get('offset')
+
+    tenders, offset = [], None
+    try:
+        builder = None
+        for prefix, event, value in events:
+            if prefix == 'next_page.offset':
+                offset = value
+            elif prefix == 'data.item' and event == 'start_map':
+                builder = ijson.ObjectBuilder()
+            if builder is None or not prefix.startswith('data.item'):
+                continue
+            builder.event(event, value)
+            if prefix == 'data.item' and event == 'end_map':
+                tenders.append(builder.value)
+                builder = None
+    finally:
+        response.close()
+    return tenders, offset
+
+
+def read_details(response, fields: Iterable[str] = DETAIL_FIELDS) -> Optional[Dict]:
+    """
+    Поле data відповіді з деталями тендера, лише з ключами fields
+    (від елементів масивів ITEM_FIELDS - лише їхні поля)
+    """
+    fields = set(fields)
+    events = _events(response)
+    if events is None:
+        return project_details(response.json().get('data'), fields)
+
+    try:
+        details = dict(_collect(events, 'data', fields, ITEM_FIELDS))
+    finally:
+        response.close()
+    return details or None
@@ -0,0 +1,263 @@
+"""
+Рушій правил відбору тендерів
+Правила завантажуються з JSON-файлу і компілюються один раз при старті:
+CPV-префікси - у префіксне дерево, ключові слова - в один загальний regex
+"""
+import json
+import os
+import re
+from typing import List, Dict, Optional, Set, Iterable
+
+
+# Конкурентні процедури та активні статуси за замовчуванням
+DEFAULT_PROCEDURE_TYPES = [
+    'aboveThreshold',           # Відкриті торги з особливостями
+    'aboveThresholdUA',         # Відкриті торги UA
+    'aboveThresholdEU',         # Відкриті торги ЄС
+    'aboveThreshold.defense',   # Відкриті торги оборона
+    'aboveThresholdUA.defense', # Відкриті торги оборона UA
+    'competitiveDialogueUA',    # Конкурентний діалог
+    'competitiveDialogueEU',    # Конкурентний діалог ЄС
+    'competitiveOrdering',      # Конкурентні замовлення
+]
+DEFAULT_STATUSES = ['active.tendering', 'active.enquiries']
+
+
+class MatchRule:
+    """
+    Правило відбору.
+
+    keywords - список умов; умова - список термінів, які мають бути в тексті
+    одночасно. Термін з '!' на початку не повинен зустрічатися, з '^' -
+    текст має з нього починатися. Досить виконання однієї умови.
+    exclude - терміни, наявність яких скасовує правило повністю.
+    """
+
+    def __init__(self, name: str, cpv_prefixes: Iterable[str] = (), keywords: Iterable[Iterable[str]] = (),
+                 exclude: Iterable[str] = (), procedure_types: Optional[Iterable[str]] = None,
+                 statuses: Optional[Iterable[str]] = None, keyword_fields: Iterable[str] = ('title',)):
+        self.name = name
+        self.cpv_prefixes = [prefix.strip() for prefix in cpv_prefixes if prefix.strip()]
+        self.keywords = [[term.lower() for term in clause] for clause in keywords]
+        self.exclude = [term.lower() for term in exclude]
+        self.procedure_types = set(procedure_types if procedure_types is not None else DEFAULT_PROCEDURE_TYPES)
+        self.statuses = set(statuses if statuses is not None else DEFAULT_STATUSES)
+        self.keyword_fields = list(keyword_fields)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MatchRule':
+        """Створити правило з елемента конфігураційного файлу"""
+        return cls(
+            name=data['name'],
+            cpv_prefixes=data.get('cpv_prefixes', []),
+            keywords=data.get('keywords', []),
+            exclude=data.get('exclude', []),
+            procedure_types=data.get('procedure_types'),
+            statuses=data.get('statuses'),
+            keyword_fields=data.get('keyword_fields', ['title']),
+        )
+
+    def terms(self) -> Set[str]:
+        """Всі терміни правила без модифікаторів '!'"""
+        result = set(self.exclude)
+        for clause in self.keywords:
+            result.update(term.lstrip('!') for term in clause)
+        return result
+
+
+class MatchResult:
+    """Результат перевірки тендера всіма правилами"""
+
+    __slots__ = ('procedure_ok', 'by_cpv', 'by_title', 'matched')
+
+    def __init__(self):
+        # Хоча б одне правило приймає тип процедури
+        self.procedure_ok = False
+        # Правила, що збіглися за CPV / ключовими словами (без урахування статусу)
+        self.by_cpv: Set[str] = set()
+        self.by_title: Set[str] = set()
+        # Остаточні збіги з урахуванням статусу: назва правила -> 'CPV' або 'title'
+        self.matched: Dict[str, str] = {}
+
+
+class MatchEngine:
+    """Скомпільований набір правил"""
+
+    def __init__(self, rules: List[MatchRule]):
+        """Скомпілювати правила"""
+        self.rules = rules
+        self._compile_cpv_trie()
+        self._compile_keywords()
+
+    @classmethod
+    def default_rules(cls, cpv_code: str = '79530000-8') -> List[MatchRule]:
+        """Вбудоване правило: письмовий переклад за CPV_CODE та назвою"""
+        prefix = cpv_code.split('-')[0]
+        return [MatchRule(
+            name='translation',
+            cpv_prefixes=[prefix],
+            keywords=[
+                ['письмов', 'переклад'],
+                [prefix],
+                ['послуги', 'переклад', '!українськ', '!мовою'],
+                ['^переклад'],
+                ['^послуги з перекладу'],
+            ],
+        )]
+
+    @classmethod
+    def from_env(cls) -> 'MatchEngine':
+        """
+        Завантажити правила з MATCH_RULES_FILE; якщо файлу немає -
+        вбудоване правило для CPV_CODE
+        """
+        path = os.getenv('MATCH_RULES_FILE', 'config/match_rules.json')
+        if path and os.path.exists(path):
+            return cls.load(path)
+        return cls(cls.default_rules(os.getenv('CPV_CODE', '79530000-8')))
+
+    @classmethod
+    def load(cls, path: str) -> 'MatchEngine':
+        """Завантажити правила з JSON-файлу"""
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        rules = [MatchRule.from_dict(item) for item in config.get('rules', [])]
+        if not rules:
+            raise ValueError(f"У файлі правил {path} немає жодного правила")
+        return cls(rules)
+
+    def _compile_cpv_trie(self):
+        """Побудувати префіксне дерево CPV-кодів: вузол '$' містить назви правил"""
+        self._cpv_trie: Dict = {}
+        for rule in self.rules:
+            for prefix in rule.cpv_prefixes:
+                node = self._cpv_trie
+                for char in prefix:
+                    node = node.setdefault(char, {})
+                node.setdefault('$', set()).add(rule.name)
+
+    def _compile_keywords(self):
+        """
+        Скомпілювати всі терміни в один regex. Для кожної позиції тексту він
+        знаходить найдовший термін; коротші терміни, що є його підрядками,
+        додаються через заздалегідь обчислене замикання.
+        """
+        terms = set()
+        anchored = set()
+        for rule in self.rules:
+            for term in rule.terms():
+                if term.startswith('^'):
+                    anchored.add(term[1:])
+                else:
+                    terms.add(term)
+
+        self._anchored_terms = sorted(anchored)
+        ordered = sorted(terms, key=len, reverse=True)
+        self._implied = {
+            term: {other for other in ordered if other in term}
+            for term in ordered
+        }
+        self._keyword_re = (
+            re.compile('(?=(' + '|'.join(re.escape(term) for term in ordered) + '))')
+            if ordered else None
+        )
+
+    def find_terms(self, text: str) -> Set[str]:
+        """Знайти всі терміни в тексті за один прохід ('^термін' для початку тексту)"""
+        if not text:
+            return set()
+
+        text = text.lower()
+        found = set()
+        if self._keyword_re is not None:
+            for match in self._keyword_re.finditer(text):
+                found |= self._implied[match.group(1)]
+
+        for term in self._anchored_terms:
+            if text.startswith(term):
+                found.add('^' + term)
+        return found
+
+    def match_cpv(self, cpv_ids: Iterable[str]) -> Set[str]:
+        """Назви правил, чиї CPV-префікси збігаються з будь-яким з кодів"""
+        names = set()
+        for cpv_id in cpv_ids:
+            node = self._cpv_trie
+            for char in cpv_id or '':
+                node = node.get(char)
+                if node is None:
+                    break
+                names |= node.get('$', set())
+        return names
+
+    @staticmethod
+    def _clause_matches(clause: List[str], found: Set[str]) -> bool:
+        """Перевірити умову: всі позитивні терміни є, жодного негативного"""
+        for term in clause:
+            if term.startswith('!'):
+                if term[1:] in found:
+                    return False
+            elif term not in found:
+                return False
+        return True
+
+    def match_text(self, text: str) -> Set[str]:
+        """Назви правил, ключові слова яких збігаються з текстом"""
+        found = self.find_terms(text)
+        return {
+            rule.name for rule in self.rules
+            if not any(term in found for term in rule.exclude)
+            and any(self._clause_matches(clause, found) for clause in rule.keywords)
+        }
+
+    def accepts_feed_item(self, item: Dict) -> bool:
+        """
+        Дешева перевірка за полями стрічки: чи може хоч одне правило
+        прийняти цей тип процедури та статус (відсутні поля не відсіюють)
+        """
+        proc_type = item.get('procurementMethodType')
+        status = item.get('status')
+        return any(
+            (proc_type is None or proc_type in rule.procedure_types)
+            and (status is None or status in rule.statuses)
+            for rule in self.rules
+        )
+
+    def evaluate(self, tender: Dict) -> MatchResult:
+        """Перевірити тендер усіма правилами за один прохід"""
+        result = MatchResult()
+        proc_type = tender.get('procurementMethodType', '')
+        status = tender.get('status', '')
+
+        rules = [rule for rule in self.rules if proc_type in rule.procedure_types]
+        if not rules:
+            return result
+        result.procedure_ok = True
+
+        cpv_names = self.match_cpv(
+            (item.get('classification') or {}).get('id', '')
+            for item in tender.get('items') or []
+        )
+
+        found_by_field: Dict[str, Set[str]] = {}
+        for rule in rules:
+            found = set()
+            for field in rule.keyword_fields:
+                if field not in found_by_field:
+                    found_by_field[field] = self.find_terms(tender.get(field) or '')
+                found |= found_by_field[field]
+
+            if any(term in found for term in rule.exclude):
+                continue
+
+            by_cpv = rule.name in cpv_names
+            by_title = any(self._clause_matches(clause, found) for clause in rule.keywords)
+            if by_cpv:
+                result.by_cpv.add(rule.name)
+            if by_title:
+                result.by_title.add(rule.name)
+
+            if (by_cpv or by_title) and status in rule.statuses:
+                result.matched[rule.name] = 'CPV' if by_cpv else 'title'
+
+        return result
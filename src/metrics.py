@@ -0,0 +1,294 @@
+"""
+Метрики моніторингу у форматі Prometheus
+
+Невеликий реєстр без зовнішніх залежностей: лічильники, датчики та
+гістограми з мітками, а також HTTP-ендпоінт /metrics у фоновому потоці
+(вмикається змінною METRICS_PORT).
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+
+# Межі кошиків гістограм за замовчуванням, секунди
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _format_value(value: float) -> str:
+    """Число у форматі Prometheus"""
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return f"{value:.1f}"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    """Екранувати значення мітки"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Metric(ABC):
+    """Спільна частина метрик: назва, опис, мітки і потокобезпечні значення"""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        """Значення міток у порядку labelnames"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Метрика {self.name} очікує мітки {self.labelnames}, отримано {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: Optional[Dict[str, str]] = None) -> str:
+        """Мітки у форматі {a="b",...}"""
+        pairs = list(zip(self.labelnames, key)) + list((extra or {}).items())
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def clear(self):
+        """Скинути всі значення"""
+        with self._lock:
+            self._values.clear()
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Рядки значень метрики у текстовому форматі Prometheus"""
+
+    def render(self) -> str:
+        """Метрика у текстовому форматі Prometheus"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Лічильник, що лише зростає"""
+
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{self._labels(key)} {_format_value(value)}"
+                    for key, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    """Довільне значення (останній стан)"""
+
+    kind = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Розподіл значень по кошиках (тривалості операцій)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][index] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Виміряти тривалість блоку with"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def get_count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state['count'] if state else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, state['counts']):
+                    cumulative += count
+                    le = {'le': _format_value(bound)}
+                    lines.append(f"{self.name}_bucket{self._labels(key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(state['sum'])}")
+                lines.append(f"{self.name}_count{self._labels(key)} {state['count']}")
+        return lines
+
+
+class Registry:
+    """Набір метрик процесу"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Метрику {metric.name} вже зареєстровано")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def clear(self):
+        """Скинути значення всіх метрик (для тестів)"""
+        for metric in list(self._metrics.values()):
+            metric.clear()
+
+    def render(self) -> str:
+        """Всі метрики у текстовому форматі Prometheus"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+# Prozorro API
+HTTP_REQUESTS = REGISTRY.counter(
+    'prozorro_http_requests_total', 'Запити до Prozorro API за кінцевою точкою та статусом',
+    ('endpoint', 'status'))
+HTTP_SECONDS = REGISTRY.histogram(
+    'prozorro_http_request_seconds', 'Тривалість запитів до Prozorro API', ('endpoint',))
+HTTP_RETRIES = REGISTRY.counter(
+    'prozorro_http_retries_total', 'Повторні запити до Prozorro API', ('endpoint',))
+HTTP_BYTES = REGISTRY.counter(
+    'prozorro_http_response_bytes_total',
+    'Байти тіл відповідей Prozorro API: wire - з мережі (стиснені), decoded - після розпакування',
+    ('endpoint', 'encoding'))
+BREAKER_STATE = REGISTRY.gauge(
+    'prozorro_circuit_state', 'Стан запобіжника: 0 - замкнено, 1 - розімкнено, 2 - пробний запит', ('name',))
+BREAKER_OPENED = REGISTRY.counter(
+    'prozorro_circuit_opened_total', 'Скільки разів запобіжник розмикався', ('name',))
+DETAIL_CACHE = REGISTRY.counter(
+    'prozorro_detail_cache_total', 'Звернення до кешу деталей тендерів', ('result',))
+
+# Сховище
+STORAGE_SECONDS = REGISTRY.histogram(
+    'storage_operation_seconds', 'Тривалість операцій сховища', ('backend', 'operation'))
+BLOOM_CHECKS = REGISTRY.counter(
+    'storage_bloom_checks_total',
+    'Перевірки фільтром Блума: negative - без звернення до сховища, false_positive - хибні',
+    ('backend', 'result'))
+BLOOM_FALSE_POSITIVE_RATE = REGISTRY.gauge(
+    'storage_bloom_false_positive_rate', 'Оцінка частки хибнопозитивних відповідей фільтра Блума',
+    ('backend',))
+
+# Telegram
+TELEGRAM_MESSAGES = REGISTRY.counter(
+    'telegram_messages_total', 'Спроби відправки повідомлень у Telegram за результатом', ('result',))
+TELEGRAM_SECONDS = REGISTRY.histogram(
+    'telegram_send_seconds', 'Тривалість відправки повідомлення в Telegram')
+TELEGRAM_RETRIES = REGISTRY.counter(
+    'telegram_retries_total', 'Повторні спроби відправки після 429')
+
+# Монітор
+STAGE_SECONDS = REGISTRY.histogram(
+    'monitor_stage_seconds', 'Тривалість етапів конвеєра перевірки', ('stage',))
+TENDERS = REGISTRY.counter(
+    'monitor_tenders_total', 'Тендери за етапом: scanned, fetched, matched, new, changed, sent', ('stage',))
+NOTIFY_LATENCY = REGISTRY.histogram(
+    'monitor_notify_latency_seconds', 'Від dateModified тендера до доставки сповіщення',
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600))
+WORK_QUEUE_JOBS = REGISTRY.gauge(
+    'monitor_work_queue_jobs', 'Завдання спільної черги виконавців за станом', ('state',))
+WORKER_JOBS = REGISTRY.counter(
+    'worker_jobs_total', 'Завдання, оброблені виконавцем: done, failed, stale (оренду втрачено)', ('result',))
+DETAIL_RETRY_PENDING = REGISTRY.gauge(
+    'monitor_detail_retry_pending', 'Тендери, деталі яких не вдалося отримати (повтор при наступному запуску)')
+RUNS = REGISTRY.counter(
+    'monitor_runs_total', 'Запуски перевірки за результатом', ('result',))
+RUN_SECONDS = REGISTRY.histogram(
+    'monitor_run_seconds', 'Тривалість повної перевірки')
+LAST_RUN_SECONDS = REGISTRY.gauge(
+    'monitor_last_run_seconds', 'Тривалість останньої перевірки')
+LAST_RUN_TIMESTAMP = REGISTRY.gauge(
+    'monitor_last_run_timestamp_seconds', 'Час завершення останньої перевірки (unix)')
+SCHEDULE_INTERVAL = REGISTRY.gauge(
+    'monitor_schedule_interval_seconds', 'Інтервал між запланованими перевірками')
+
+
+def start_metrics_server(port: Optional[int] = None, registry: Registry = REGISTRY) -> Optional['ThreadingHTTPServer']:
+    """
+    Запустити HTTP-ендпоінт /metrics у фоновому потоці.
+    Порт за замовчуванням - METRICS_PORT; якщо не задано - нічого не робить.
+    """
+    if port is None:
+        port = int(os.getenv('METRICS_PORT') or 0)
+        if not port:
+            return None
+
+    # http.server потрібен лише ендпоінту, а метрики імпортує кожна команда
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('', port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    print(f"📈 Метрики: http://0.0.0.0:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,609 @@
+"""
+Асинхронний конвеєр перевірки тендерів:
+сторінки стрічки -> деталі -> фільтр -> дедуплікація -> outbox -> відправка
+
+Етапи з'єднані обмеженими чергами, тож перше сповіщення йде, поки стрічка
+ще читається, а пам'ять не залежить від кількості тендерів у вікні.
+
+Для вже надісланих тендерів, у яких у стрічці змінився dateModified,
+деталі запитуються знову: відбиток відстежуваних полів порівнюється зі
+збереженим, і лише при розбіжності знімки порівнюються по полях, а
+підпискам іде коротке сповіщення про зміни.
+
+З чергою завдань (work_queue) деталі завантажують і перевіряють процеси-
+виконавці, а конвеєр лише передає їм кандидатів і забирає результати;
+дедуплікація і сповіщення лишаються тут.
+
+Знайдені тендери спершу записуються в outbox сховища, а окремий етап
+відправляє їх паралельно (TELEGRAM_SEND_CONCURRENCY) і фіксує кожне
+повідомлення окремою транзакцією, тож падіння між відправкою і позначкою
+не призводить до повторних сповіщень.
+"""
+import asyncio
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+from src import metrics, search_index
+from src.delivery_queue import DeliveryQueue
+from src.records import TenderRecord
+from src.subscriptions import Subscription
+
+
+# Маркер завершення етапу в черзі
+_DONE = object()
+
+
+def evaluate_details(api, tender_id: str, details: Optional[Dict], track: Optional[str],
+                     stats: Dict[str, int]) -> Tuple[Optional[TenderRecord], bool, bool]:
+    """
+    Перевірити деталі правилами. Для надісланого тендера (track - збережений
+    відбиток) відбиток рахується заново. Повертає (запис, знайдено, змінено)
+    """
+    with metrics.STAGE_SECONDS.time(stage='filter'):
+        record = api.check_tender_details(tender_id, details, stats)
+    matched = record is not None
+    changed = False
+    if track is not None and details:
+        if record is None:
+            record = TenderRecord.from_details(details)
+            record.id = tender_id
+        # Відбиток не змінився - знімок не читається і не порівнюється
+        changed = record.tracked_hash() != track
+    return record, matched, changed
+
+
+class PipelineResult:
+    """Підсумок одного проходу конвеєра"""
+
+    __slots__ = ('feed_items', 'candidates', 'failed', 'matched', 'new', 'changed', 'sent', 'cursor', 'stats',
+                 'feed_error')
+
+    def __init__(self):
+        self.feed_items = 0
+        self.candidates = 0
+        # Тендери, деталі яких не вдалося отримати (відкладені до наступного запуску)
+        self.failed = 0
+        self.matched = 0
+        self.new = 0
+        # Вже надіслані тендери зі зміненими відстежуваними полями
+        self.changed = 0
+        self.sent = 0
+        # Курсор стрічки після останньої прочитаної сторінки (None у режимі вікна)
+        self.cursor: Optional[str] = None
+        # Лічильники check_tender_details: competitive, cpv, title
+        self.stats: Dict[str, int] = {'competitive': 0, 'cpv': 0, 'title': 0}
+        # Читання стрічки перервала помилка запиту: прочитано не всі сторінки
+        self.feed_error = False
+
+
+class TenderPipeline:
+    """
+    Конвеєр одного запуску перевірки.
+
+    Мережеві запити виконуються в пулі потоків (не більше max_concurrency
+    одночасно), а всі операції зі сховищем і відправка в Telegram - в одному
+    окремому потоці: DataStorage не розрахований на паралельні записи.
+    """
+
+    # Розмір кожної черги між етапами
+    QUEUE_SIZE = 100
+
+    # Ключ стану в сховищі: тендери, деталі яких не вдалося отримати
+    RETRY_KEY = 'detail_retry'
+
+    # Скільки запусків поспіль повторювати запит деталей одного тендера
+    MAX_DETAIL_ATTEMPTS = 5
+
+    # Скільки тендерів передавати в пошуковий індекс за одну транзакцію
+    INDEX_BATCH = 200
+
+    # Режим черги завдань: розмір пачки завдань і результатів, пауза між опитуваннями, сек
+    JOB_BATCH = 100
+    POLL_SECONDS = 0.1
+
+    # Скільки повідомлень відправляти одночасно (усі черги разом)
+    SEND_CONCURRENCY = 4
+
+    def __init__(self, api, storage, subscriptions: List[Subscription], notifiers: Dict[str, object],
+                 queue_size: Optional[int] = None, digest: Optional[bool] = None, page_limit: int = 100,
+                 verbose: bool = True, track_changes: Optional[bool] = None, search_index=None,
+                 work_queue=None, job_timeout: Optional[float] = None, send_concurrency: Optional[int] = None):
+        """
+        api - ProzorroAPI, storage - DataStorage/SQLiteStorage
+        notifiers - TelegramNotifier для кожного chat_id підписок
+        digest - режим дайджесту черг доставки (None - TELEGRAM_DIGEST)
+        page_limit - розмір сторінки стрічки
+        verbose - False: не виводити підсумки проходу без знахідок
+        track_changes - сповіщати про зміни надісланих тендерів (None - TRACK_CHANGES)
+        search_index - SearchIndex для переглянутих тендерів (None - не індексувати)
+        work_queue - WorkQueue: деталі обробляють виконавці (None - у цьому процесі)
+        job_timeout - скільки секунд чекати результатів виконавців без жодного нового
+                      (WORK_QUEUE_TIMEOUT); решта лишається в черзі до наступного запуску
+        send_concurrency - одночасних відправок у Telegram (None - TELEGRAM_SEND_CONCURRENCY)
+        """
+        self.api = api
+        self.storage = storage
+        self.subscriptions = subscriptions
+        self.notifiers = notifiers
+        self.digest = digest
+        self.page_limit = page_limit
+        self.verbose = verbose
+        self.search_index = search_index
+        self.work_queue = work_queue
+        if job_timeout is None:
+            job_timeout = float(os.getenv('WORK_QUEUE_TIMEOUT', '300'))
+        self.job_timeout = job_timeout
+        if track_changes is None:
+            track_changes = os.getenv('TRACK_CHANGES', '1') == '1'
+        self.track_changes = track_changes
+
+        if queue_size is None:
+            queue_size = int(os.getenv('PIPELINE_QUEUE_SIZE', str(self.QUEUE_SIZE)))
+        self.queue_size = max(1, queue_size)
+
+        if send_concurrency is None:
+            send_concurrency = int(os.getenv('TELEGRAM_SEND_CONCURRENCY', str(self.SEND_CONCURRENCY)))
+        self.send_concurrency = max(1, send_concurrency)
+
+    async def run(self, cursor: Optional[str] = None, incremental: bool = True, hours: int = 2) -> PipelineResult:
+        """
+        Прочитати стрічку (від курсора або за останні hours годин)
+        і доставити знайдені тендери всім підпискам
+        """
+        result = PipelineResult()
+        workers = max(1, self.api.max_concurrency)
+        if self.work_queue is not None:
+            # Один етап передає завдання виконавцям, інший забирає результати
+            workers = 1
+
+        self._loop = asyncio.get_running_loop()
+        self._fetch_pool = ThreadPoolExecutor(max_workers=workers + 1, thread_name_prefix='pipeline-fetch')
+        self._storage_lane = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pipeline-storage')
+        self._index_lane = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pipeline-index')
+        self._send_pool = ThreadPoolExecutor(max_workers=self.send_concurrency, thread_name_prefix='pipeline-send')
+        self._index_docs: List = []
+        self._index_jobs: List[asyncio.Future] = []
+        # Відправка: сигнал про нові записи outbox, задачі відправки, dateModified нових тендерів
+        self._outbox_ready = asyncio.Event()
+        self._dispatched = False
+        self._sends: List[asyncio.Task] = []
+        self._modified: Dict[str, Optional[str]] = {}
+
+        detail_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        match_queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+        if self.api.detail_cache:
+            self.api.detail_cache.reset_stats()
+        self.api.reset_traffic()
+
+        try:
+            queues = await self._in_storage_lane(self._open_delivery_queues)
+            # tender_id -> {'dateModified', 'attempts'}; спершу - невдалі з минулих запусків
+            self._retry = dict(await self._in_storage_lane(self.storage.get_state, self.RETRY_KEY, {}))
+            self._retry_changed = False
+
+            stages = [
+                asyncio.create_task(self._read_feed(detail_queue, result, cursor, incremental, hours, workers)),
+                asyncio.create_task(self._notify(match_queue, result, queues, workers)),
+                asyncio.create_task(self._deliver(queues)),
+            ]
+            if self.work_queue is not None:
+                restored = await self._in_fetch_pool(self.work_queue.restore)
+                if restored:
+                    print(f"🔁 Результати виконавців з попереднього запуску: {restored}")
+                self._waiting = set()
+                self._collected: List[str] = []
+                self._submitted = False
+                stages += [
+                    asyncio.create_task(self._submit_jobs(detail_queue)),
+                    asyncio.create_task(self._collect_results(match_queue, result)),
+                ]
+            else:
+                stages += [
+                    asyncio.create_task(self._fetch_details(detail_queue, match_queue, result))
+                    for _ in range(workers)
+                ]
+
+            try:
+                await asyncio.gather(*stages)
+                if self.work_queue is not None:
+                    # Усі зібрані результати доставлено - їх можна прибрати з черги
+                    await self._in_fetch_pool(self.work_queue.ack, self._collected)
+            except BaseException:
+                for stage in stages:
+                    stage.cancel()
+                await asyncio.gather(*stages, return_exceptions=True)
+                raise
+            finally:
+                # Дайджести та решта outbox - наприкінці (зокрема при помилці)
+                await asyncio.gather(*self._sends, return_exceptions=True)
+                for entry in queues:
+                    await self._drain(entry)
+                result.sent = sum(entry['sent'] for entry in queues)
+                failed = sum(entry['queue'].failed for entry in queues)
+                if failed:
+                    print(f"⚠️  Не відправлено {failed} повідомлень, повтор при наступному запуску")
+                if self._retry_changed:
+                    await self._in_storage_lane(self.storage.set_state, self.RETRY_KEY, self._retry)
+                metrics.DETAIL_RETRY_PENDING.set(len(self._retry))
+                if self.work_queue is not None:
+                    for state, count in (await self._in_fetch_pool(self.work_queue.counts)).items():
+                        metrics.WORK_QUEUE_JOBS.set(count, state=state)
+                self._flush_index()
+                await asyncio.gather(*self._index_jobs)
+        finally:
+            self._fetch_pool.shutdown(wait=False, cancel_futures=True)
+            self._send_pool.shutdown(wait=False, cancel_futures=True)
+            self._storage_lane.shutdown(wait=True)
+            self._index_lane.shutdown(wait=True)
+
+        if self.verbose or result.matched or result.failed:
+            self._print_stats(result)
+        return result
+
+    def _in_fetch_pool(self, func, *args):
+        """Виконати мережевий виклик у пулі потоків"""
+        return self._loop.run_in_executor(self._fetch_pool, func, *args)
+
+    def _in_storage_lane(self, func, *args):
+        """Виконати операцію зі сховищем у єдиному потоці сховища"""
+        return self._loop.run_in_executor(self._storage_lane, func, *args)
+
+    def _index(self, items: Iterable[Dict]):
+        """Передати елементи стрічки або деталі в пошуковий індекс (пачками, в окремому потоці)"""
+        if self.search_index is None:
+            return
+        self._index_documents(search_index.document(item) for item in items)
+
+    def _index_documents(self, docs: Iterable):
+        """Передати готові документи індексу (з search_index.document)"""
+        if self.search_index is None:
+            return
+        self._index_docs.extend(docs)
+        if len(self._index_docs) >= self.INDEX_BATCH:
+            self._flush_index()
+
+    def _flush_index(self):
+        """Записати накопичені документи індексу"""
+        if not self._index_docs:
+            return
+        docs, self._index_docs = self._index_docs, []
+        self._index_jobs = [job for job in self._index_jobs if not job.done()]
+        self._index_jobs.append(self._loop.run_in_executor(self._index_lane, self._write_index, docs))
+
+    def _write_index(self, docs: List):
+        """Помилка індексу не зупиняє перевірку: індекс лише для пошуку"""
+        try:
+            self.search_index.add(docs)
+        except sqlite3.Error as e:
+            print(f"⚠️  Помилка пошукового індексу: {e}")
+
+    def _open_delivery_queues(self) -> List[Dict]:
+        """
+        Створити черги доставки підписок. Повідомлення, що лишилися в outbox
+        з минулих запусків, відправить етап доставки разом з новими
+        """
+        queues = []
+        # Ліміт Telegram діє на чат: підписки з одним chat_id ділять обмежувач
+        limiters = {}
+        for subscription in self.subscriptions:
+            if subscription.chat_id not in limiters:
+                limiters[subscription.chat_id] = DeliveryQueue.chat_limiter(subscription.chat_id)
+            queue = DeliveryQueue(self.notifiers[subscription.chat_id], self.storage,
+                                  digest=self.digest, namespace=subscription.namespace,
+                                  limiter=limiters[subscription.chat_id])
+            # ID, що вже в черзі цього запуску або чекають повторної відправки
+            skip_ids = queue.pending_ids()
+            if skip_ids:
+                print(f"🔁 [{subscription.name}] Повторна відправка {len(skip_ids)} сповіщень з попереднього запуску")
+            queues.append({'subscription': subscription, 'queue': queue, 'skip_ids': skip_ids, 'sent': 0})
+        return queues
+
+    async def _read_feed(self, detail_queue: asyncio.Queue, result: PipelineResult, cursor: Optional[str],
+                         incremental: bool, hours: int, workers: int):
+        """Етап 1: читати сторінки стрічки і передавати кандидатів на завантаження деталей"""
+        if incremental:
+            pages = self.api.iter_feed_pages(cursor, hours, limit=self.page_limit, verbose=self.verbose)
+        else:
+            pages = ((page, None) for page in self.api.iter_recent_pages(hours))
+
+        # Тендери, деталі яких не вдалося отримати минулого разу, - першими
+        retry_ids = set(self._retry)
+        if retry_ids:
+            print(f"🔁 Повторний запит деталей {len(retry_ids)} тендерів з попереднього запуску")
+        for tender_id, entry in list(self._retry.items()):
+            result.candidates += 1
+            await detail_queue.put((tender_id, entry.get('dateModified'), entry.get('track')))
+
+        recorded = None
+        while True:
+            try:
+                with metrics.STAGE_SECONDS.time(stage='feed_page'):
+                    item = await self._in_fetch_pool(next, pages, None)
+            except requests.exceptions.RequestException as e:
+                # Вже прочитані сторінки лишаються чинними
+                print(f"❌ Помилка запиту до Prozorro API: {e}")
+                result.feed_error = True
+                break
+            if item is None:
+                break
+
+            page, page_cursor = item
+            result.feed_items += len(page)
+            if page_cursor:
+                result.cursor = page_cursor
+
+            seen = [(tender['id'], tender.get('dateModified')) for tender in page if tender.get('id')]
+            recorded = self._in_storage_lane(self.storage.record_seen, seen)
+            self._index(page)
+            tracked = {}
+            if self.track_changes and seen:
+                tracked = await self._in_storage_lane(self.storage.get_tracked, [tender_id for tender_id, _ in seen])
+
+            for tender in page:
+                if tender.get('id') in retry_ids:
+                    continue
+                # Відбиток надісланого тендера, якщо його dateModified змінився
+                track = None
+                if tender.get('id') in tracked:
+                    snapshot_modified, track = tracked[tender['id']]
+                    if snapshot_modified == tender.get('dateModified'):
+                        track = None
+                if tender.get('id') and (track is not None or self.api.prefilter_feed_item(tender)):
+                    result.candidates += 1
+                    await detail_queue.put((tender['id'], tender.get('dateModified'), track))
+
+        for _ in range(workers):
+            await detail_queue.put(_DONE)
+
+        if recorded is not None:
+            # Потік сховища виконує завдання по черзі: досить дочекатися останнього
+            await recorded
+
+    async def _fetch_details(self, detail_queue: asyncio.Queue, match_queue: asyncio.Queue,
+                             result: PipelineResult):
+        """
+        Етап 2-3: завантажити деталі тендера і перевірити правилами.
+        Для надісланого тендера (track - збережений відбиток) відбиток
+        рахується заново; далі передаються знайдені та змінені тендери
+        """
+        while True:
+            item = await detail_queue.get()
+            if item is _DONE:
+                await match_queue.put(_DONE)
+                return
+
+            tender_id, date_modified, track = item
+            try:
+                with metrics.STAGE_SECONDS.time(stage='detail'):
+                    details = await self._in_fetch_pool(self.api.fetch_tender_details, tender_id, date_modified)
+            except requests.exceptions.RequestException:
+                self._defer_detail(tender_id, date_modified, result, track)
+                continue
+
+            if self._retry.pop(tender_id, None) is not None:
+                self._retry_changed = True
+            if details:
+                self._index((details,))
+            record, matched, changed = evaluate_details(self.api, tender_id, details, track, result.stats)
+            if matched:
+                result.matched += 1
+            if matched or changed:
+                await match_queue.put((record, matched, changed))
+
+    async def _submit_jobs(self, detail_queue: asyncio.Queue):
+        """Етап 2 з чергою завдань: передавати кандидатів виконавцям пачками"""
+        while True:
+            batch = [await detail_queue.get()]
+            while len(batch) < self.JOB_BATCH and batch[-1] is not _DONE:
+                try:
+                    batch.append(detail_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            jobs = [item for item in batch if item is not _DONE]
+            if jobs:
+                self._waiting.update(tender_id for tender_id, _, _ in jobs)
+                await self._in_fetch_pool(self.work_queue.put, jobs)
+            if batch[-1] is _DONE:
+                self._submitted = True
+                return
+
+    async def _collect_results(self, match_queue: asyncio.Queue, result: PipelineResult):
+        """
+        Етап 3 з чергою завдань: забирати результати виконавців, поки не
+        повернуться всі завдання запуску або job_timeout секунд не буде нових
+        """
+        idle_since = time.monotonic()
+        while not (self._submitted and not self._waiting):
+            collected = await self._in_fetch_pool(self.work_queue.collect, self.JOB_BATCH)
+            if not collected:
+                if not self._submitted:
+                    idle_since = time.monotonic()
+                elif time.monotonic() - idle_since >= self.job_timeout:
+                    print(f"⚠️  Виконавці не повернули {len(self._waiting)} завдань за {self.job_timeout:g} с; "
+                          f"результати буде оброблено наступним запуском")
+                    break
+                await asyncio.sleep(self.POLL_SECONDS)
+                continue
+
+            idle_since = time.monotonic()
+            for tender_id, date_modified, track, outcome in collected:
+                self._waiting.discard(tender_id)
+                self._collected.append(tender_id)
+                if outcome['failed']:
+                    self._defer_detail(tender_id, date_modified, result, track)
+                    continue
+
+                if self._retry.pop(tender_id, None) is not None:
+                    self._retry_changed = True
+                if outcome.get('document'):
+                    self._index_documents((tuple(outcome['document']),))
+                for key, count in outcome['stats'].items():
+                    result.stats[key] = result.stats.get(key, 0) + count
+                if outcome['matched']:
+                    result.matched += 1
+                if outcome['matched'] or outcome['changed']:
+                    record = TenderRecord.from_dict(outcome['record'])
+                    await match_queue.put((record, outcome['matched'], outcome['changed']))
+
+        await match_queue.put(_DONE)
+
+    def _defer_detail(self, tender_id: str, date_modified: Optional[str], result: PipelineResult,
+                      track: Optional[str] = None):
+        """Відкласти тендер до наступного запуску (не більше MAX_DETAIL_ATTEMPTS разів)"""
+        result.failed += 1
+        self._retry_changed = True
+        attempts = self._retry.get(tender_id, {}).get('attempts', 0) + 1
+        if attempts >= self.MAX_DETAIL_ATTEMPTS:
+            self._retry.pop(tender_id, None)
+            print(f"⚠️  Деталі тендера {tender_id} недоступні після {attempts} запусків, пропускаємо")
+            return
+        entry = {'dateModified': date_modified, 'attempts': attempts}
+        if track is not None:
+            entry['track'] = track
+        self._retry[tender_id] = entry
+
+    async def _notify(self, match_queue: asyncio.Queue, result: PipelineResult, queues: List[Dict],
+                      workers: int):
+        """Етап 4-5: відкинути вже оброблені тендери і записати нові та змінені в outbox підписок"""
+        finished = 0
+        while finished < workers:
+            item = await match_queue.get()
+            if item is _DONE:
+                finished += 1
+                continue
+            tender, matched, changed = item
+            with metrics.STAGE_SECONDS.time(stage='notify'):
+                if changed:
+                    result.changed += await self._in_storage_lane(self._dispatch_changes, queues, tender)
+                if matched:
+                    result.new += await self._in_storage_lane(self._dispatch, queues, tender)
+            self._outbox_ready.set()
+        self._dispatched = True
+        self._outbox_ready.set()
+
+    async def _deliver(self, queues: List[Dict]):
+        """
+        Етап 6: відправляти сповіщення з outbox, щойно вони записані,
+        паралельно з перевіркою. Дайджести відправляються наприкінці запуску
+        """
+        while True:
+            await self._outbox_ready.wait()
+            self._outbox_ready.clear()
+            dispatched = self._dispatched
+            for entry in queues:
+                if not entry['queue'].digest:
+                    await self._drain(entry, wait=False)
+            if dispatched:
+                return
+
+    async def _drain(self, entry: Dict, wait: bool = True):
+        """Взяти готові повідомлення черги і відправити їх (wait - дочекатися відправки)"""
+        queue = entry['queue']
+        messages = await self._in_storage_lane(queue.take)
+        sends = [asyncio.create_task(self._send(entry, message)) for message in messages]
+        self._sends = [send for send in self._sends if not send.done()] + sends
+        if wait:
+            await asyncio.gather(*sends)
+
+    async def _send(self, entry: Dict, message: Dict):
+        """Відправити одне повідомлення і зафіксувати результат у сховищі"""
+        queue = entry['queue']
+        delivered = await self._loop.run_in_executor(self._send_pool, queue.send, message)
+        sent = await self._in_storage_lane(queue.finish, message, delivered)
+        entry['sent'] += sent
+        if sent:
+            for tender_id in message['tender_ids']:
+                if tender_id in self._modified:
+                    self._observe_latency(self._modified.pop(tender_id))
+
+    def _dispatch_changes(self, queues: List[Dict], tender: TenderRecord) -> int:
+        """
+        Порівняти тендер зі збереженим знімком і сповістити про зміни
+        підписки, яким його вже надсилали. Повертає 1, якщо відстежувані
+        поля змінилися
+        """
+        snapshot = self.storage.get_snapshot(tender['id'])
+        if snapshot is None:
+            return 0
+        changes = tender.diff(snapshot)
+        # Новий знімок - і для знімків, збережених до відстеження змін (без відбитка)
+        self.storage.save_snapshot(tender)
+        if not changes:
+            return 0
+
+        fields = ', '.join(field for field, _, _ in changes)
+        print(f"\n✏️  Змінено тендер {tender.get('tenderID', tender['id'])}: {fields}")
+        for entry in queues:
+            subscription, queue = entry['subscription'], entry['queue']
+            if tender['id'] in entry['skip_ids']:
+                continue
+            if not self.storage.is_processed(tender['id'], subscription.namespace):
+                continue
+
+            entry['skip_ids'].add(tender['id'])
+            queue.enqueue(tender, changes)
+        return 1
+
+    def _dispatch(self, queues: List[Dict], tender: Dict) -> int:
+        """
+        Записати сповіщення в outbox підписок, яким тендер цікавий і ще
+        не відправлявся (відправляє етап доставки). Повертає кількість
+        підписок, для яких тендер новий.
+        """
+        new_count = 0
+        for entry in queues:
+            subscription, queue = entry['subscription'], entry['queue']
+            if not subscription.accepts(tender) or tender['id'] in entry['skip_ids']:
+                continue
+            if self.storage.is_processed(tender['id'], subscription.namespace):
+                continue
+
+            entry['skip_ids'].add(tender['id'])
+            new_count += 1
+            print(f"\n[{subscription.name}] Новий тендер: {tender.get('tenderID', tender['id'])}")
+
+            queue.enqueue(tender)
+            self.storage.save_snapshot(tender)
+            self._modified[tender['id']] = tender.get('dateModified')
+        return new_count
+
+    @staticmethod
+    def _observe_latency(date_modified: Optional[str]):
+        """Затримка від зміни тендера в Prozorro (dateModified) до доставки сповіщення"""
+        try:
+            modified = datetime.fromisoformat(date_modified.replace('Z', '+00:00'))
+        except (AttributeError, ValueError):
+            return
+        if modified.tzinfo is None:
+            modified = modified.replace(tzinfo=timezone.utc)
+        metrics.NOTIFY_LATENCY.observe(max(0.0, (datetime.now(timezone.utc) - modified).total_seconds()))
+
+    def _print_stats(self, result: PipelineResult):
+        """Вивести підсумки проходу"""
+        print(f"\n📊 Результати:")
+        print(f"   Всього перевірено: {result.feed_items}")
+        print(f"   Запитів деталей: {result.candidates}")
+        if result.failed:
+            print(f"   Не вдалося отримати деталі: {result.failed} (повтор при наступному запуску)")
+        if self.api.detail_cache:
+            cache_stats = self.api.detail_cache.stats()
+            print(f"   Кеш деталей: влучань {cache_stats['hits']}, промахів {cache_stats['misses']}, "
+                  f"заощаджено {cache_stats['bytes_saved'] / 1024:.0f} КБ")
+        traffic = self.api.traffic()
+        if traffic['wire']:
+            print(f"   Трафік API: {traffic['wire'] / 1024:.0f} КБ з мережі, "
+                  f"{traffic['decoded'] / 1024:.0f} КБ після розпакування")
+        print(f"   Конкурентних процедур: {result.stats['competitive']}")
+        print(f"   Збіг по CPV коду: {result.stats['cpv']}")
+        print(f"   Збіг по назві: {result.stats['title']}")
+        print(f"   На переклад (активних): {result.matched}")
+        if result.changed:
+            print(f"   Змінилися після сповіщення: {result.changed}")
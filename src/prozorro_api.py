@@ -2,81 +2,267 @@
 Модуль для роботи з Prozorro API
 """
 import os
+import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from src.detail_cache import DetailCache
+from src import metrics, json_stream
+from src.records import TenderRecord
+from src.transport import RetryPolicy, CircuitBreaker, RETRY_STATUSES, retry_after_seconds
+from src.matching import MatchEngine, DEFAULT_PROCEDURE_TYPES, DEFAULT_STATUSES
 
 # Завантажити змінні середовища
 load_dotenv()
 
 
+class _PagePrefetcher:
+    """
+    Наступна сторінка стрічки завантажується у фоновому потоці, поки
+    викликач обробляє поточну: курсор next_page.offset відомий одразу
+    після розбору сторінки, тож запити стрічки не чекають на обробку
+    """
+
+    def __init__(self, fetch, enabled: bool = True):
+        """fetch(params) -> (тендери, next_page.offset); enabled=False - без попереднього завантаження"""
+        self._fetch = fetch
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='feed-prefetch') if enabled else None
+        self._next = None
+
+    def prefetch(self, params: Dict):
+        """Почати завантаження сторінки з параметрами params"""
+        if self._executor is not None:
+            params = dict(params)
+            self._next = (params, self._executor.submit(self._fetch, params))
+
+    def get(self, params: Dict) -> Tuple[List[Dict], Optional[str]]:
+        """Сторінка з параметрами params: завантажена заздалегідь або запитана зараз"""
+        pending, self._next = self._next, None
+        if pending is not None and pending[0] == params:
+            return pending[1].result()
+        return self._fetch(dict(params))
+
+    def close(self):
+        """Зупинити фоновий потік (незатребувана сторінка відкидається)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
 class ProzorroAPI:
     """Клас для роботи з Prozorro API"""
     
     # Типи конкурентних процедур
-    COMPETITIVE_TYPES = [
-        'aboveThreshold',           # Відкриті торги з особливостями
-        'aboveThresholdUA',         # Відкриті торги UA
-        'aboveThresholdEU',         # Відкриті торги ЄС
-        'aboveThreshold.defense',   # Відкриті торги оборона
-        'aboveThresholdUA.defense', # Відкриті торги оборона UA
-        'competitiveDialogueUA',    # Конкурентний діалог
-        'competitiveDialogueEU',    # Конкурентний діалог ЄС
-        'competitiveOrdering',      # Конкурентні замовлення
-    ]
+    COMPETITIVE_TYPES = DEFAULT_PROCEDURE_TYPES
+    
+    # Статуси, в яких ще можна подати пропозицію
+    ACTIVE_STATUSES = tuple(DEFAULT_STATUSES)
+    
+    # Додаткові поля стрічки (opt_fields), щоб відсіяти тендери без запиту деталей
+    FEED_OPT_FIELDS = ('procurementMethodType', 'status', 'tenderID', 'title')
     
     # CPV код для письмового перекладу
     TRANSLATION_CPV = '79530000-8'
     
-    def __init__(self):
-        """Ініціалізація API клієнта"""
+    def __init__(self, max_concurrency: Optional[int] = None, request_interval: Optional[float] = None,
+                 feed_prefetch: Optional[bool] = None):
+        """
+        Ініціалізація API клієнта
+
+        max_concurrency - максимум одночасних запитів деталей тендерів
+        request_interval - мінімальний інтервал (сек) між запитами до одного хоста
+        feed_prefetch - завантажувати наступну сторінку стрічки, поки
+                        обробляється поточна (None - PROZORRO_FEED_PREFETCH)
+        """
         self.api_url = os.getenv('PROZORRO_API_URL', 'https://api.prozorro.gov.ua/api/2.5/tenders')
         self.cpv_code = os.getenv('CPV_CODE', '79530000-8')
+
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv('PROZORRO_MAX_CONCURRENCY', '8'))
+        if request_interval is None:
+            request_interval = float(os.getenv('PROZORRO_REQUEST_INTERVAL', '0.05'))
+        self.max_concurrency = max(1, max_concurrency)
+        self.request_interval = max(0.0, request_interval)
+        if feed_prefetch is None:
+            feed_prefetch = os.getenv('PROZORRO_FEED_PREFETCH', '1') == '1'
+        self.feed_prefetch = feed_prefetch
+
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Prozorro Tender Monitor Bot/1.0',
             'Accept': 'application/json'
         })
-    
-    def has_translation_cpv(self, tender_details: Dict) -> bool:
+        # Пул з'єднань keep-alive під паралельні запити деталей + читання стрічки
+        # і наступної сторінки; pool_block - чекати вільне з'єднання замість
+        # одноразових. Повтори робить _get. Accept-Encoding requests уже просить
+        # gzip/deflate (і br, якщо встановлено brotli).
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.max_concurrency + 3,
+                              pool_block=True, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._throttle_lock = threading.Lock()
+        self._next_request_at: Dict[str, float] = {}
+        
+        # Байти тіл відповідей з reset_traffic(): з мережі та після розпакування
+        self._traffic_lock = threading.Lock()
+        self._traffic = {'wire': 0, 'decoded': 0}
+        
+        # Повтори з експоненційною затримкою та запобіжник на весь клієнт
+        self.retry_policy = RetryPolicy.from_env()
+        self.breaker = CircuitBreaker.from_env()
+        
+        # Кеш деталей за (ID, dateModified); None - кеш вимкнено
+        self.detail_cache = DetailCache.from_env()
+        
+        # Правила відбору (MATCH_RULES_FILE або вбудоване правило для CPV_CODE)
+        self.matcher = MatchEngine.from_env()
+        
+        # Поля деталей, що читаються з відповіді: потрібні сповіщенню та правилам
+        self.detail_fields = json_stream.DETAIL_FIELDS.union(
+            field for rule in self.matcher.rules for field in rule.keyword_fields
+        )
+
+    def _throttle(self, url: str):
         """
-        Перевірити чи тендер має CPV код письмового перекладу в items
+        Ввічливість до хоста: не частіше ніж раз на request_interval секунд
         """
-        items = tender_details.get('items', [])
+        if self.request_interval <= 0:
+            return
+
+        host = urlsplit(url).netloc
+        with self._throttle_lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_request_at.get(host, 0.0))
+            self._next_request_at[host] = start_at + self.request_interval
+
+        delay = start_at - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def _pause_host(self, url: str, seconds: float):
+        """Відкласти всі запити до хоста на seconds (Retry-After)"""
+        host = urlsplit(url).netloc
+        with self._throttle_lock:
+            resume_at = time.monotonic() + seconds
+            self._next_request_at[host] = max(self._next_request_at.get(host, 0.0), resume_at)
+
+    @staticmethod
+    def _buffer_body(response: requests.Response) -> bytes:
+        """
+        Дочитати тіло потокової відповіді з помилкою в пам'ять (воно невелике).
+        Дочитане з'єднання requests повертає в пул, а тіло лишається
+        доступним викликачу (response.json(), raise_for_status())
+        """
+        return response.content
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """
+        GET запит з обмеженням частоти, повторами та запобіжником.
+
+        429/5xx і помилки з'єднання повторюються з експоненційною затримкою
+        (або через Retry-After, якщо він не довший за backoff_max). Після
+        останньої спроби повертається відповідь з помилкою або кидається
+        виняток; при розімкненому запобіжнику - CircuitOpenError без запиту.
+        """
+        endpoint = 'feed' if url == self.api_url else 'detail'
+        attempt = 0
         
-        for item in items:
-            classification = item.get('classification', {})
-            cpv_id = classification.get('id', '')
+        while True:
+            self.breaker.before_request()
+            self._throttle(url)
             
-            if cpv_id == self.TRANSLATION_CPV or cpv_id.startswith('79530000'):
-                return True
-        
-        return False
+            status = 'error'
+            try:
+                with metrics.HTTP_SECONDS.time(endpoint=endpoint):
+                    response = self.session.get(url, timeout=30, **kwargs)
+                status = response.status_code
+            except requests.exceptions.RequestException:
+                self.breaker.record_failure()
+                if attempt >= self.retry_policy.max_retries:
+                    raise
+                delay = self.retry_policy.backoff(attempt)
+            else:
+                if status not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    if status >= 400 and kwargs.get('stream'):
+                        self._buffer_body(response)
+                    return response
+                
+                self.breaker.record_failure()
+                retry_after = retry_after_seconds(response)
+                if attempt >= self.retry_policy.max_retries or (
+                        retry_after is not None and retry_after > self.retry_policy.backoff_max):
+                    if kwargs.get('stream'):
+                        self._buffer_body(response)
+                    return response
+                response.close()
+                
+                if retry_after is not None:
+                    # Сервер просить зачекати - пауза для всіх потоків, не лише цього
+                    self._pause_host(url, retry_after)
+                    delay = 0.0
+                else:
+                    delay = self.retry_policy.backoff(attempt)
+            finally:
+                metrics.HTTP_REQUESTS.inc(endpoint=endpoint, status=status)
+            
+            metrics.HTTP_RETRIES.inc(endpoint=endpoint)
+            attempt += 1
+            if delay:
+                time.sleep(delay)
+    
+    def _record_body(self, response, endpoint: str):
+        """Врахувати розмір прочитаного тіла відповіді (з мережі та розпакованого)"""
+        wire, decoded = json_stream.body_size(response)
+        metrics.HTTP_BYTES.inc(wire, endpoint=endpoint, encoding='wire')
+        metrics.HTTP_BYTES.inc(decoded, endpoint=endpoint, encoding='decoded')
+        with self._traffic_lock:
+            self._traffic['wire'] += wire
+            self._traffic['decoded'] += decoded
+    
+    def traffic(self) -> Dict[str, int]:
+        """Байти відповідей з останнього reset_traffic(): wire - з мережі, decoded - після розпакування"""
+        with self._traffic_lock:
+            return dict(self._traffic)
+    
+    def reset_traffic(self):
+        """Обнулити лічильники трафіку"""
+        with self._traffic_lock:
+            self._traffic = {'wire': 0, 'decoded': 0}
+    
+    def _read_feed_page(self, response) -> Tuple[List[Dict], Optional[str]]:
+        """Елементи сторінки стрічки та next_page.offset з відповіді"""
+        page = json_stream.read_feed_page(response)
+        self._record_body(response, 'feed')
+        return page
+    
+    def _fetch_feed_page(self, params: Dict) -> Tuple[List[Dict], Optional[str]]:
+        """Запитати сторінку стрічки (HTTPError - API повернуло помилку)"""
+        response = self._get(self.api_url, params=params, stream=json_stream.AVAILABLE)
+        response.raise_for_status()
+        return self._read_feed_page(response)
+    
+    def has_translation_cpv(self, tender_details: Dict) -> bool:
+        """
+        Перевірити чи тендер має в items CPV код з правил відбору
+        """
+        cpv_ids = (
+            (item.get('classification') or {}).get('id', '')
+            for item in tender_details.get('items', [])
+        )
+        return bool(self.matcher.match_cpv(cpv_ids))
     
     def is_translation_tender(self, title: str, description: str = '') -> bool:
         """
-        Перевірити чи тендер на послуги перекладу за назвою/описом
+        Перевірити чи назва тендера відповідає ключовим словам правил відбору
         """
-        if not title:
-            return False
-        
-        title_lower = title.lower()
-        
-        if 'письмов' in title_lower and 'переклад' in title_lower:
-            return True
-        
-        if '79530000' in title_lower:
-            return True
-        
-        if 'послуги' in title_lower and 'переклад' in title_lower:
-            if 'українськ' not in title_lower and 'мовою' not in title_lower:
-                return True
-        
-        if title_lower.startswith('переклад') or title_lower.startswith('послуги з перекладу'):
-            return True
-        
-        return False
+        return bool(self.matcher.match_text(title))
     
     def is_competitive_procedure(self, proc_type: str) -> bool:
         """
@@ -84,53 +270,101 @@ class ProzorroAPI:
         """
         return proc_type in self.COMPETITIVE_TYPES
     
-    def get_tender_details(self, tender_id: str) -> Optional[Dict]:
+    def prefilter_feed_item(self, tender: Dict) -> bool:
         """
-        Отримати детальну інформацію про тендер
+        Дешева перевірка елемента стрічки до запиту деталей.
+        False - тендер точно не підходить; якщо поля немає в стрічці,
+        рішення відкладається до перевірки деталей.
         """
-        try:
-            url = f"{self.api_url}/{tender_id}"
-            response = self.session.get(url, timeout=30)
+        return self.matcher.accepts_feed_item(tender)
+    
+    def fetch_tender_details(self, tender_id: str, date_modified: Optional[str] = None) -> Optional[Dict]:
+        """
+        Отримати детальну інформацію про тендер.
+        Якщо передано dateModified зі стрічки і в кеші є копія з тим самим
+        dateModified - запит до API не виконується.
+        
+        None - тендера немає (4xx); RequestException - API тимчасово
+        недоступне після всіх повторів, запит варто повторити пізніше.
+        """
+        if self.detail_cache and date_modified:
+            cached = self.detail_cache.get(tender_id, date_modified)
+            metrics.DETAIL_CACHE.inc(result='miss' if cached is None else 'hit')
+            if cached is not None:
+                return cached
+        
+        url = f"{self.api_url}/{tender_id}"
+        response = self._get(url, stream=json_stream.AVAILABLE)
+        if response.status_code in RETRY_STATUSES:
             response.raise_for_status()
-            
-            data = response.json()
-            return data.get('data')
-            
-        except requests.exceptions.RequestException as e:
+        if response.status_code >= 400:
             return None
+        
+        # Лише потрібні поля: документи, пропозиції тощо не тримаються в пам'яті
+        details = json_stream.read_details(response, self.detail_fields)
+        self._record_body(response, 'detail')
+        
+        if self.detail_cache and details:
+            self.detail_cache.put(tender_id, details.get('dateModified'), details)
+        return details
     
-    def get_recent_tenders(self, hours: int = 6) -> List[Dict]:
+    def get_tender_details(self, tender_id: str, date_modified: Optional[str] = None) -> Optional[Dict]:
         """
-        Отримати список тендерів за останні N годин
+        Отримати детальну інформацію про тендер (None при будь-якій помилці)
         """
         try:
-            date_from = datetime.now(timezone.utc) - timedelta(hours=hours)
-            date_from_str = date_from.strftime('%Y-%m-%d %H:%M:%S UTC')
-            
-            print(f"🔍 Пошук тендерів з {date_from_str}...")
-            
-            params = {
-                'offset': '',
-                'limit': 100,
-                'mode': '_all_',
-                'descending': 1
-            }
-            
-            all_tenders = []
-            page = 0
-            max_pages = 35  # Збільшено з 25 до 35 для охоплення більшої кількості тендерів
-            stop_pagination = False
-            
+            return self.fetch_tender_details(tender_id, date_modified)
+        except requests.exceptions.RequestException:
+            return None
+    
+    def get_tender_details_many(self, tender_ids: List[str],
+                                dates_modified: Optional[List[Optional[str]]] = None) -> Iterator[Optional[Dict]]:
+        """
+        Отримати деталі кількох тендерів паралельно (не більше max_concurrency
+        запитів одночасно). Результати повертаються в порядку tender_ids.
+        """
+        if dates_modified is None:
+            dates_modified = [None] * len(tender_ids)
+        
+        if self.max_concurrency == 1:
+            for tender_id, date_modified in zip(tender_ids, dates_modified):
+                yield self.get_tender_details(tender_id, date_modified)
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            yield from executor.map(self.get_tender_details, tender_ids, dates_modified)
+    
+    def iter_recent_pages(self, hours: int = 6) -> Iterator[List[Dict]]:
+        """
+        Сторінки стрічки за останні N годин (від найновіших).
+        Помилки запиту передаються викликачу.
+        """
+        date_from = datetime.now(timezone.utc) - timedelta(hours=hours)
+        date_from_str = date_from.strftime('%Y-%m-%d %H:%M:%S UTC')
+        
+        print(f"🔍 Пошук тендерів з {date_from_str}...")
+        
+        params = {
+            'offset': '',
+            'limit': 100,
+            'mode': '_all_',
+            'descending': 1,
+            'opt_fields': ','.join(self.FEED_OPT_FIELDS)
+        }
+        
+        page = 0
+        max_pages = 35  # Збільшено з 25 до 35 для охоплення більшої кількості тендерів
+        stop_pagination = False
+        prefetcher = _PagePrefetcher(self._fetch_feed_page, self.feed_prefetch)
+        
+        try:
             while page < max_pages and not stop_pagination:
-                response = self.session.get(self.api_url, params=params, timeout=30)
-                response.raise_for_status()
-                
-                data = response.json()
-                tenders = data.get('data', [])
+                tenders, offset = prefetcher.get(params)
                 
                 if not tenders:
                     break
                 
+                page_tenders = []
                 for tender in tenders:
                     tender_date_str = tender.get('dateModified', '')
                     
@@ -148,109 +382,297 @@ class ProzorroAPI:
                             stop_pagination = True
                             break
                         
-                        all_tenders.append(tender)
+                        page_tenders.append(tender)
                     except Exception:
                         continue
                 
-                next_page = data.get('next_page', {})
-                offset = next_page.get('offset', '')
-                
                 if not offset or stop_pagination:
+                    yield page_tenders
                     break
                 
+                # Наступна сторінка вантажиться, поки викликач обробляє цю
                 params['offset'] = offset
                 page += 1
-            
-            print(f"✅ Знайдено {len(all_tenders)} тендерів за останні {hours} годин")
-            return all_tenders
-            
+                if page < max_pages:
+                    prefetcher.prefetch(params)
+                yield page_tenders
+        finally:
+            prefetcher.close()
+    
+    def iter_recent_tenders(self, hours: int = 6) -> Iterator[Dict]:
+        """
+        Тендери за останні N годин по одному, без накопичення сторінок.
+        Помилка запиту завершує читання; вже повернуті тендери лишаються чинними.
+        """
+        count = 0
+        try:
+            for page_tenders in self.iter_recent_pages(hours):
+                for tender in page_tenders:
+                    count += 1
+                    yield tender
         except requests.exceptions.RequestException as e:
             print(f"❌ Помилка запиту до Prozorro API: {e}")
-            return []
+            if count:
+                print(f"⚠️  Використовуємо {count} тендерів з уже прочитаних сторінок")
+            return
         except Exception as e:
             print(f"❌ Неочікувана помилка: {e}")
-            return []
+            return
+        
+        print(f"✅ Знайдено {count} тендерів за останні {hours} годин")
+    
+    def get_recent_tenders(self, hours: int = 6) -> List[Dict]:
+        """
+        Отримати список тендерів за останні N годин.
+        При помилці повертаються вже прочитані сторінки.
+        """
+        return list(self.iter_recent_tenders(hours))
+    
+    def iter_feed_pages(self, cursor: Optional[str], hours: int = 6, limit: int = 100,
+                        verbose: bool = True) -> Iterator[Tuple[List[Dict], str]]:
+        """
+        Інкрементальне читання стрічки вперед (за зростанням dateModified).
+        
+        Починає з курсора next_page.offset попереднього запуску; якщо курсора
+        немає або API його не приймає - з моменту now - hours. Повертає пари
+        (тендери сторінки, курсор після цієї сторінки). Помилки запиту
+        передаються викликачу; вже повернуті сторінки лишаються чинними.
+        
+        limit - розмір сторінки (для частого опитування досить невеликого)
+        """
+        from_cursor = bool(cursor)
+        if not from_cursor:
+            date_from = datetime.now(timezone.utc) - timedelta(hours=hours)
+            print(f"🔍 Курсор відсутній, читаємо стрічку з {date_from.strftime('%Y-%m-%d %H:%M:%S UTC')}...")
+            cursor = str(date_from.timestamp())
+        elif verbose:
+            print(f"🔍 Читаємо стрічку від курсора {cursor}...")
+        
+        params = {
+            'offset': cursor,
+            'limit': limit,
+            'mode': '_all_',
+            'opt_fields': ','.join(self.FEED_OPT_FIELDS)
+        }
+        
+        pages = 0
+        prefetcher = _PagePrefetcher(self._fetch_feed_page, self.feed_prefetch)
+        
+        try:
+            while True:
+                if pages:
+                    tenders, offset = prefetcher.get(params)
+                else:
+                    response = self._get(self.api_url, params=params, stream=json_stream.AVAILABLE)
+                    
+                    if from_cursor and response.status_code in (400, 404):
+                        print(f"⚠️  Курсор {params['offset']} не прийнято API, сканування за {hours} год")
+                        yield from self.iter_feed_pages(None, hours=hours, limit=limit, verbose=verbose)
+                        return
+                    
+                    response.raise_for_status()
+                    tenders, offset = self._read_feed_page(response)
+                pages += 1
+                
+                if offset:
+                    cursor = str(offset)
+                
+                if not tenders or not offset or str(offset) == params['offset']:
+                    yield tenders, cursor
+                    break
+                
+                # Наступна сторінка вантажиться, поки викликач обробляє цю
+                params['offset'] = cursor
+                prefetcher.prefetch(params)
+                yield tenders, cursor
+        
+        finally:
+            prefetcher.close()
+    
+    def get_tenders_since(self, cursor: Optional[str], hours: int = 6) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Прочитати всі нові зміни стрічки від курсора (див. iter_feed_pages).
+        Повертає тендери та новий курсор. При помилці запиту - вже прочитані сторінки.
+        """
+        all_tenders = []
+        pages = 0
+        
+        try:
+            for tenders, cursor in self.iter_feed_pages(cursor, hours):
+                all_tenders.extend(tenders)
+                pages += 1
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Помилка запиту до Prozorro API (сторінка {pages + 1}): {e}")
+        
+        print(f"✅ Знайдено {len(all_tenders)} нових змін у стрічці ({pages} сторінок)")
+        return all_tenders, cursor
+
+    def iter_feed_range(self, offset: str, until: float, limit: int = 100,
+                        max_pages: Optional[int] = None) -> Iterator[Tuple[List[Dict], str]]:
+        """
+        Сторінки стрічки вперед від offset до моменту until (unix timestamp, не включно).
+        Повертає пари (тендери сторінки, курсор після неї); курсор останньої
+        сторінки дорівнює until. Помилки запиту передаються викликачу, щоб
+        прохід можна було продовжити з курсора.
+        max_pages - прочитати не більше стількох сторінок
+        """
+        params = {
+            'offset': offset,
+            'limit': limit,
+            'mode': '_all_',
+            'opt_fields': ','.join(self.FEED_OPT_FIELDS)
+        }
+
+        prefetcher = _PagePrefetcher(self._fetch_feed_page, self.feed_prefetch)
+        pages = 0
+
+        try:
+            while True:
+                page, next_offset = prefetcher.get(params)
+                pages += 1
+
+                tenders = []
+                reached_end = False
+                for tender in page:
+                    try:
+                        modified = datetime.fromisoformat(tender.get('dateModified', '').replace('Z', '+00:00'))
+                    except ValueError:
+                        continue
+                    if modified.tzinfo is None:
+                        modified = modified.replace(tzinfo=timezone.utc)
+                    if modified.timestamp() >= until:
+                        reached_end = True
+                        break
+                    tenders.append(tender)
+
+                next_offset = str(next_offset or '')
+                if reached_end or not next_offset or next_offset == params['offset']:
+                    yield tenders, str(until)
+                    return
+
+                if max_pages is not None and pages >= max_pages:
+                    yield tenders, next_offset
+                    return
+
+                # Наступна сторінка вантажиться, поки викликач обробляє цю
+                params['offset'] = next_offset
+                prefetcher.prefetch(params)
+                yield tenders, next_offset
+        finally:
+            prefetcher.close()
+
+    def check_tender_details(self, tender_id: str, details: Optional[Dict],
+                             stats: Dict[str, int]) -> Optional[TenderRecord]:
+        """
+        Перевірити деталі тендера правилами відбору.
+        Повертає компактний TenderRecord з match_type/matched_rules або None;
+        лічильники competitive/cpv/title у stats збільшуються на місці.
+        """
+        if not details:
+            return None
+        
+        result = self.matcher.evaluate(details)
+        if not result.procedure_ok:
+            return None
+        
+        stats['competitive'] = stats.get('competitive', 0) + 1
+        
+        if result.by_cpv:
+            stats['cpv'] = stats.get('cpv', 0) + 1
+        if result.by_title:
+            stats['title'] = stats.get('title', 0) + 1
+        
+        if not (result.by_cpv or result.by_title):
+            return None
+        
+        if not result.matched:
+            match_type = "CPV" if result.by_cpv else "назва"
+            print(f"  ⏭️  Пропущено (статус: {details.get('status', '')}, знайдено по: {match_type}): {details.get('tenderID', tender_id)}")
+            return None
+        
+        is_translation_by_cpv = 'CPV' in result.matched.values()
+        record = TenderRecord.from_details(details)
+        record.id = tender_id
+        record.match_type = 'CPV' if is_translation_by_cpv else 'title'
+        record.matched_rules = tuple(sorted(result.matched))
+        
+        title = record.title or ''
+        match_type = "CPV" if is_translation_by_cpv else "назва"
+        print(f"\n  ✅ ЗНАЙДЕНО! {record.tender_id or tender_id} (по: {match_type}, правила: {', '.join(record.matched_rules)})")
+        print(f"     Назва: {title[:70]}...")
+        
+        return record
     
-    def search_new_translation_tenders(self, hours: int = 6) -> List[Dict]:
+    def search_new_translation_tenders(self, hours: int = 6) -> List[TenderRecord]:
         """
         Пошук нових тендерів на переклад за останні N годин
         """
         print(f"\n{'='*70}")
         print(f"🚀 Початок пошуку нових тендерів на переклад")
         print(f"📅 Період: останні {hours} годин")
-        print(f"🎯 Фільтр: конкурентні процедури + CPV 79530000-8 + активні")
+        print(f"🎯 Правила відбору: {', '.join(rule.name for rule in self.matcher.rules)}")
         print(f"{'='*70}\n")
         
-        all_tenders = self.get_recent_tenders(hours=hours)
-        
-        if not all_tenders:
-            print("⚠️  Тендери не знайдено")
-            return []
+        return self.filter_translation_tenders(self.iter_recent_tenders(hours=hours))
+    
+    def filter_translation_tenders(self, all_tenders: Iterable[Dict]) -> List[TenderRecord]:
+        """
+        Відібрати тендери на переклад серед елементів стрічки.
+        Стрічка читається потоково: деталі запитуються порціями, а знайдені
+        тендери одразу стискаються до TenderRecord.
+        """
+        translation_tenders = []
+        stats = {'competitive': 0, 'cpv': 0, 'title': 0}
+        scanned = 0
+        requested = 0
         
-        print(f"\n🔍 Перевірка {len(all_tenders)} тендерів...")
+        def candidates():
+            nonlocal scanned
+            for tender in all_tenders:
+                scanned += 1
+                if tender.get('id') and self.prefilter_feed_item(tender):
+                    yield tender['id'], tender.get('dateModified')
         
-        translation_tenders = []
-        competitive_count = 0
-        cpv_matches = 0
-        title_matches = 0
+        if self.detail_cache:
+            self.detail_cache.reset_stats()
         
-        for i, tender in enumerate(all_tenders, 1):
-            tender_id = tender.get('id')
-            
-            if not tender_id:
-                continue
-            
-            if i % 50 == 0:
-                print(f"  📊 Перевірено: {i}/{len(all_tenders)}, конкурентних: {competitive_count}, на переклад: {len(translation_tenders)}")
-            
-            details = self.get_tender_details(tender_id)
-            
-            if not details:
-                continue
-            
-            proc_type = details.get('procurementMethodType', '')
-            if not self.is_competitive_procedure(proc_type):
-                continue
-            
-            competitive_count += 1
+        # Порція - кілька запитів на кожен потік, щоб пул не простоював
+        pending = candidates()
+        batch_size = self.max_concurrency * 4
+        while True:
+            batch = list(islice(pending, batch_size))
+            if not batch:
+                break
+            tender_ids = [tender_id for tender_id, _ in batch]
+            dates_modified = [date_modified for _, date_modified in batch]
             
-            title = details.get('title', '')
-            description = details.get('description', '')
-            
-            is_translation_by_cpv = self.has_translation_cpv(details)
-            is_translation_by_title = self.is_translation_tender(title, description)
-            
-            if is_translation_by_cpv:
-                cpv_matches += 1
-            if is_translation_by_title:
-                title_matches += 1
-            
-            if not (is_translation_by_cpv or is_translation_by_title):
-                continue
-            
-            status = details.get('status', '')
-            if status not in ('active.tendering', 'active.enquiries'):
-                match_type = "CPV" if is_translation_by_cpv else "назва"
-                print(f"  ⏭️  Пропущено (статус: {status}, знайдено по: {match_type}): {details.get('tenderID', tender_id)}")
-                continue
-            
-            details['id'] = tender_id
-            details['_match_type'] = 'CPV' if is_translation_by_cpv else 'title'
-            translation_tenders.append(details)
-            
-            match_type = "CPV" if is_translation_by_cpv else "назва"
-            print(f"\n  ✅ ЗНАЙДЕНО! {details.get('tenderID', tender_id)} (по: {match_type})")
-            print(f"     Назва: {title[:70]}...")
+            for tender_id, details in zip(tender_ids, self.get_tender_details_many(tender_ids, dates_modified)):
+                requested += 1
+                if requested % 50 == 0:
+                    print(f"  📊 Перевірено: {requested}, конкурентних: {stats['competitive']}, на переклад: {len(translation_tenders)}")
+                
+                matched = self.check_tender_details(tender_id, details, stats)
+                if matched is not None:
+                    translation_tenders.append(matched)
+        
+        if not scanned:
+            print("⚠️  Тендери не знайдено")
+            return []
         
         print(f"\n📊 Результати:")
-        print(f"   Всього перевірено: {len(all_tenders)}")
-        print(f"   Конкурентних процедур: {competitive_count}")
-        print(f"   Збіг по CPV коду: {cpv_matches}")
-        print(f"   Збіг по назві: {title_matches}")
+        print(f"   Всього перевірено: {scanned}")
+        print(f"   Запитів деталей: {requested} (відсіяно за даними стрічки: {scanned - requested})")
+        if self.detail_cache:
+            cache_stats = self.detail_cache.stats()
+            print(f"   Кеш деталей: влучань {cache_stats['hits']}, промахів {cache_stats['misses']}, "
+                  f"заощаджено {cache_stats['bytes_saved'] / 1024:.0f} КБ")
+        print(f"   Конкурентних процедур: {stats['competitive']}")
+        print(f"   Збіг по CPV коду: {stats['cpv']}")
+        print(f"   Збіг по назві: {stats['title']}")
         print(f"   На переклад (активних): {len(translation_tenders)}")
         
         print(f"\n{'='*70}")
         print(f"✅ Пошук завершено: знайдено {len(translation_tenders)} тендерів")
         print(f"{'='*70}\n")
         
-        return translation_tenders
\ No newline at end of file
+        return translation_tenders
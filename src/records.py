@@ -0,0 +1,179 @@
+"""
+Компактні записи знайдених тендерів
+"""
+import hashlib
+import json
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+
+def documents_hash(documents: Iterable[Dict]) -> str:
+    """Відбиток набору документів: ID та дата зміни кожного (нова версія - новий відбиток)"""
+    versions = sorted(f"{document.get('id')}|{document.get('dateModified')}" for document in documents)
+    return hashlib.blake2b('\n'.join(versions).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class TenderRecord:
+    """
+    Знайдений тендер: лише поля для сповіщення та знімка у сховищі.
+
+    Повні деталі (документи, позиції, адреси) відкидаються одразу після
+    перевірки правилами. Для коду, що працює зі словниками деталей,
+    доступні get() та [] за ключами API (id, tenderID, dateModified,
+    _matched_rules, ...).
+    """
+
+    __slots__ = ('id', 'tender_id', 'title', 'description', 'status', 'date_modified',
+                 'amount', 'currency', 'end_date', 'customer', 'cpv', 'documents', 'documents_hash',
+                 'match_type', 'matched_rules')
+
+    # Ключі словника деталей -> атрибути запису
+    _KEYS = {
+        'id': 'id',
+        'tenderID': 'tender_id',
+        'title': 'title',
+        'description': 'description',
+        'status': 'status',
+        'dateModified': 'date_modified',
+        '_match_type': 'match_type',
+        '_matched_rules': 'matched_rules',
+    }
+
+    # Скільки символів опису потрібно сповіщенню
+    DESCRIPTION_LENGTH = 200
+
+    # Поля знімка, зміни яких відстежуються після сповіщення
+    TRACKED_FIELDS = ('endDate', 'amount', 'currency', 'status', 'documentsHash')
+
+    def __init__(self, id: str, tender_id: Optional[str] = None, title: Optional[str] = None,
+                 description: Optional[str] = None, status: Optional[str] = None,
+                 date_modified: Optional[str] = None, amount: Optional[float] = None,
+                 currency: Optional[str] = None, end_date: Optional[str] = None,
+                 customer: Optional[str] = None, cpv: Iterable[str] = (),
+                 documents: Optional[int] = None, documents_hash: Optional[str] = None,
+                 match_type: Optional[str] = None, matched_rules: Iterable[str] = ()):
+        self.id = id
+        self.tender_id = tender_id
+        self.title = title
+        self.description = description[:self.DESCRIPTION_LENGTH] if description else description
+        self.status = status
+        self.date_modified = date_modified
+        self.amount = amount
+        self.currency = currency
+        self.end_date = end_date
+        self.customer = customer
+        self.cpv = tuple(cpv)
+        self.documents = documents
+        self.documents_hash = documents_hash
+        self.match_type = match_type
+        self.matched_rules = tuple(matched_rules)
+
+    @classmethod
+    def from_details(cls, details: Dict) -> 'TenderRecord':
+        """Запис з деталей тендера (або його знімка)"""
+        value = details.get('value') or {}
+        cpv = details.get('cpv')
+        if cpv is None:
+            cpv = sorted({
+                (item.get('classification') or {}).get('id', '')
+                for item in details.get('items') or []
+            } - {''})
+        documents = details.get('documents')
+        if isinstance(documents, list):
+            documents, digest = len(documents), documents_hash(documents)
+        else:
+            digest = details.get('documentsHash')
+        return cls(
+            id=details.get('id'),
+            tender_id=details.get('tenderID'),
+            title=details.get('title'),
+            description=details.get('description'),
+            status=details.get('status'),
+            date_modified=details.get('dateModified'),
+            amount=value.get('amount', details.get('amount')),
+            currency=value.get('currency', details.get('currency')),
+            end_date=(details.get('tenderPeriod') or {}).get('endDate', details.get('endDate')),
+            customer=(details.get('procuringEntity') or {}).get('name', details.get('customer')),
+            cpv=cpv,
+            documents=documents,
+            documents_hash=digest,
+            match_type=details.get('_match_type'),
+            matched_rules=details.get('_matched_rules') or (),
+        )
+
+    @classmethod
+    def coerce(cls, tender: Union['TenderRecord', Dict]) -> 'TenderRecord':
+        """Запис як є або зі словника деталей"""
+        return tender if isinstance(tender, cls) else cls.from_details(tender)
+
+    def get(self, key: str, default=None):
+        """Значення за ключем API, як у словника деталей"""
+        attribute = self._KEYS.get(key)
+        if attribute is None:
+            return default
+        value = getattr(self, attribute)
+        return default if value is None else value
+
+    def __getitem__(self, key: str):
+        attribute = self._KEYS.get(key)
+        if attribute is None:
+            raise KeyError(key)
+        return getattr(self, attribute)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, TenderRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"TenderRecord({self.tender_id or self.id!r})"
+
+    def snapshot(self) -> Dict:
+        """Знімок для сховища (формат DataStorage.make_snapshot)"""
+        return {
+            'id': self.id,
+            'tenderID': self.tender_id,
+            'title': self.title,
+            'status': self.status,
+            'dateModified': self.date_modified,
+            'amount': self.amount,
+            'currency': self.currency,
+            'endDate': self.end_date,
+            'customer': self.customer,
+            'cpv': list(self.cpv),
+            'documents': self.documents,
+            'documentsHash': self.documents_hash,
+        }
+
+    def to_dict(self) -> Dict:
+        """Усі поля запису (для передачі між процесами у JSON)"""
+        data = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            data[name] = list(value) if isinstance(value, tuple) else value
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TenderRecord':
+        """Запис з to_dict()"""
+        return cls(**data)
+
+    def tracked_hash(self) -> str:
+        """Відбиток відстежуваних полів: однаковий відбиток - змін немає"""
+        snapshot = self.snapshot()
+        values = json.dumps([snapshot[field] for field in self.TRACKED_FIELDS], ensure_ascii=False)
+        return hashlib.blake2b(values.encode('utf-8'), digest_size=8).hexdigest()
+
+    def diff(self, snapshot: Dict) -> List[Tuple[str, object, object]]:
+        """
+        Зміни відстежуваних полів відносно збереженого знімка: (поле, було, стало).
+        Поля, яких у старому знімку немає, пропускаються
+        """
+        current = self.snapshot()
+        changes = []
+        for field in self.TRACKED_FIELDS:
+            if field in snapshot and snapshot[field] != current[field]:
+                if field == 'documentsHash':
+                    changes.append(('documents', snapshot.get('documents'), current['documents']))
+                else:
+                    changes.append((field, snapshot[field], current[field]))
+        return changes
@@ -1,74 +1,268 @@
 """
 Модуль для планування щоденних перевірок
+
+Компоненти монітора (клієнт API, сховище, Telegram, індекс, черга завдань)
+створюються при першому зверненні, а apscheduler і pytz імпортуються лише
+для режиму планувальника: разові команди не платять за те, чим не користуються.
 """
+import asyncio
 import time
-from datetime import datetime
-from apscheduler.schedulers.blocking import BlockingScheduler
-from apscheduler.triggers.cron import CronTrigger
-import pytz
+from datetime import datetime, timedelta
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 import os
-from src.prozorro_api import ProzorroAPI
-from src.telegram_bot import TelegramNotifier
-from src.data_storage import DataStorage
+from src import metrics
+from src.subscriptions import load_subscriptions
+
+if TYPE_CHECKING:
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler
+    from src.prozorro_api import ProzorroAPI
+    from src.telegram_bot import TelegramNotifier
+
+
+class AdaptiveInterval:
+    """
+    Інтервал опитування для адаптивного розкладу: частіше в робочий час
+    (пн-пт) і вдвічі частіше, коли стрічка жвава, рідше вночі та у вихідні
+    """
+
+    def __init__(self, business_minutes: float = 15, idle_minutes: float = 60, min_minutes: float = 5,
+                 business_hours: Tuple[int, int] = (8, 19), busy_feed_rate: float = 600):
+        """
+        business_hours - [початок, кінець) робочого часу, години
+        busy_feed_rate - змін стрічки за годину, з яких стрічка вважається жвавою
+        """
+        self.business_minutes = business_minutes
+        self.idle_minutes = idle_minutes
+        self.min_minutes = min_minutes
+        self.business_hours = business_hours
+        self.busy_feed_rate = busy_feed_rate
+
+    @classmethod
+    def from_env(cls) -> 'AdaptiveInterval':
+        """Налаштування з SCHEDULE_* змінних середовища"""
+        start, end = os.getenv('SCHEDULE_BUSINESS_HOURS', '8-19').split('-')
+        return cls(
+            business_minutes=float(os.getenv('SCHEDULE_BUSINESS_INTERVAL_MINUTES', '15')),
+            idle_minutes=float(os.getenv('SCHEDULE_IDLE_INTERVAL_MINUTES', '60')),
+            min_minutes=float(os.getenv('SCHEDULE_MIN_INTERVAL_MINUTES', '5')),
+            business_hours=(int(start), int(end)),
+            busy_feed_rate=float(os.getenv('SCHEDULE_BUSY_FEED_RATE', '600')),
+        )
+
+    def is_business_time(self, now: datetime) -> bool:
+        """Робочий час: пн-пт у межах business_hours"""
+        start, end = self.business_hours
+        return now.weekday() < 5 and start <= now.hour < end
+
+    def next_interval(self, now: datetime, feed_rate: Optional[float] = None) -> timedelta:
+        """Інтервал до наступної перевірки (now - у часовому поясі розкладу)"""
+        minutes = self.business_minutes if self.is_business_time(now) else self.idle_minutes
+        if feed_rate is not None and feed_rate >= self.busy_feed_rate:
+            minutes /= 2
+        return timedelta(minutes=max(self.min_minutes, minutes))
 
 
 class TenderMonitor:
     """Клас для моніторингу тендерів"""
     
+    # Ключ стану в DataStorage для курсора стрічки
+    FEED_CURSOR_KEY = 'feed_cursor'
+    
+    # Ключ стану: час початку останньої успішної перевірки (межа наступного вікна)
+    LAST_SUCCESS_KEY = 'last_success'
+    
+    # Вікно сканування (години), якщо курсора немає або він застарів
+    # і невідомо, коли була остання успішна перевірка
+    WINDOW_HOURS = 2
+    
+    # Перекриття вікна з попередньою перевіркою, хвилини
+    WINDOW_OVERLAP_MINUTES = 5
+    
+    # ID завдання планувальника
+    JOB_ID = 'tender_check'
+    
+    # Режим tail: як часто очищати старі записи, секунди
+    TAIL_CLEANUP_SECONDS = 24 * 3600
+    
     def __init__(self):
-        """Ініціалізація моніторингу"""
-        self.api = ProzorroAPI()
-        self.notifier = TelegramNotifier()
-        self.storage = DataStorage()
+        """Ініціалізація моніторингу (компоненти - див. властивості нижче)"""
+        # Підписки: кожна зі своїм фільтром, чатом і простором імен історії
+        self.subscriptions = load_subscriptions()
+        
+        # incremental - читати стрічку від збереженого курсора, window - за останні години
+        self.feed_mode = os.getenv('FEED_MODE', 'incremental')
+        self.cursor_max_age = timedelta(hours=float(os.getenv('FEED_CURSOR_MAX_AGE_HOURS', '24')))
+        
+        # cron - щогодини о :00, adaptive - інтервал залежно від часу доби та жвавості стрічки
+        self.schedule_mode = os.getenv('SCHEDULE_MODE', 'cron')
+        self.adaptive_interval = AdaptiveInterval.from_env()
+        
+        # Змін стрічки за годину за останньою перевіркою (для адаптивного інтервалу)
+        self.feed_rate: Optional[float] = None
+        self._running = False
+        
+        # Режим tail: розмір сторінки та межі паузи між опитуваннями стрічки, секунди
+        self.tail_limit = int(os.getenv('TAIL_LIMIT', '20'))
+        self.tail_min_interval = float(os.getenv('TAIL_MIN_INTERVAL', '5'))
+        self.tail_max_interval = float(os.getenv('TAIL_MAX_INTERVAL', '60'))
+        self._scheduler: Optional['AsyncIOScheduler'] = None
     
-    def check_new_tenders(self):
-        """Перевірити нові тендери та відправити сповіщення"""
+    @cached_property
+    def api(self) -> 'ProzorroAPI':
+        """Клієнт Prozorro API"""
+        from src.prozorro_api import ProzorroAPI
+        return ProzorroAPI()
+    
+    @cached_property
+    def storage(self):
+        """Сховище оброблених тендерів (STORAGE_BACKEND)"""
+        from src.data_storage import create_storage
+        return create_storage()
+    
+    @cached_property
+    def search_index(self):
+        """Локальний пошук по всіх переглянутих тендерах (python main.py search)"""
+        from src.search_index import SearchIndex
+        return SearchIndex.from_env()
+    
+    @cached_property
+    def work_queue(self):
+        """Режим координатора: деталі завантажують виконавці (python main.py worker)"""
+        from src.work_queue import WorkQueue
+        return WorkQueue.from_env()
+    
+    @cached_property
+    def notifiers(self) -> Dict[str, 'TelegramNotifier']:
+        """TelegramNotifier для кожного chat_id підписок"""
+        from src.telegram_bot import TelegramNotifier
+        notifiers = {}
+        for subscription in self.subscriptions:
+            if subscription.chat_id not in notifiers:
+                notifiers[subscription.chat_id] = TelegramNotifier(chat_id=subscription.chat_id)
+        return notifiers
+    
+    @cached_property
+    def notifier(self) -> 'TelegramNotifier':
+        """Чат першої підписки (тестове повідомлення)"""
+        return self.notifiers[self.subscriptions[0].chat_id]
+    
+    def _load_feed_cursor(self) -> Optional[str]:
+        """Отримати збережений курсор стрічки, якщо він не застарів"""
+        state = self.storage.get_state(self.FEED_CURSOR_KEY)
+        if not state or not state.get('offset'):
+            return None
+        
+        try:
+            updated_at = datetime.fromisoformat(state['updated_at'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        
+        if datetime.now() - updated_at > self.cursor_max_age:
+            print(f"⚠️  Курсор стрічки застарів ({state['updated_at']}), сканування за часовим вікном")
+            return None
+        
+        return state['offset']
+    
+    def _save_feed_cursor(self, cursor: str):
+        """Зберегти курсор стрічки для наступного запуску"""
+        self.storage.set_state(self.FEED_CURSOR_KEY, {
+            'offset': cursor,
+            'updated_at': datetime.now().isoformat()
+        })
+    
+    def _load_last_success(self) -> Optional[datetime]:
+        """Час початку останньої успішної перевірки"""
+        state = self.storage.get_state(self.LAST_SUCCESS_KEY)
+        try:
+            return datetime.fromisoformat(state['started_at'])
+        except (KeyError, TypeError, ValueError):
+            return None
+    
+    def _window_hours(self, last_success: Optional[datetime]) -> float:
+        """
+        Вікно сканування без курсора: від початку останньої успішної перевірки
+        (з невеликим перекриттям), але не більше FEED_CURSOR_MAX_AGE_HOURS
+        """
+        if last_success is None:
+            return self.WINDOW_HOURS
+        gap = datetime.now() - last_success + timedelta(minutes=self.WINDOW_OVERLAP_MINUTES)
+        return round(min(gap, self.cursor_max_age).total_seconds() / 3600, 2)
+    
+    async def check_new_tenders_async(self):
+        """
+        Перевірити нові тендери та відправити сповіщення всім підпискам.
+        Стрічка, деталі та відправка працюють конвеєром (див. TenderPipeline).
+        Якщо попередня перевірка ще триває, запуск пропускається.
+        """
+        if self._running:
+            print("⏭️  Попередня перевірка ще триває, запуск пропущено")
+            return
+        
+        self._running = True
+        try:
+            await self._check_new_tenders()
+        finally:
+            self._running = False
+    
+    async def _check_new_tenders(self):
+        """Одна перевірка (див. check_new_tenders_async)"""
+        from src.pipeline import TenderPipeline
+        
         print(f"\n{'='*70}")
         print(f"Запуск перевірки тендерів: {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
         print(f"{'='*70}\n")
         
+        started = time.perf_counter()
+        started_at = datetime.now()
+        run_result = 'error'
         try:
-            # Отримати нові тендери за останні 2 години (з запасом для щогодинних перевірок)
-            tenders = self.api.search_new_translation_tenders(hours=2)
+            incremental = self.feed_mode == 'incremental'
+            cursor = self._load_feed_cursor() if incremental else None
+            last_success = self._load_last_success()
+            hours = self._window_hours(last_success)
+            if not cursor:
+                print(f"🕐 Вікно сканування: {hours:g} год")
             
-            if not tenders:
-                print("Нових тендерів на переклад не знайдено")
-                return
+            # Кожен тендер завантажується один раз і розподіляється між підписками
+            pipeline = TenderPipeline(self.api, self.storage, self.subscriptions, self.notifiers,
+                                      search_index=self.search_index, work_queue=self.work_queue)
+            result = await pipeline.run(cursor, incremental=incremental, hours=hours)
             
-            # Відфільтрувати вже оброблені
-            new_tenders = []
-            for tender in tenders:
-                tender_id = tender.get('id')
-                if not self.storage.is_processed(tender_id):
-                    new_tenders.append(tender)
+            # Недоставлені сповіщення лежать у сховищі, тож курсор можна просунути
+            if result.cursor:
+                self._save_feed_cursor(result.cursor)
             
-            if not new_tenders:
-                print(f"Всі знайдені тендери ({len(tenders)}) вже були оброблені раніше")
-                return
+            if result.feed_error:
+                # Межа вікна лишається: наступна перевірка покриє непрочитані сторінки
+                print("⚠️  Стрічку прочитано не повністю, межа вікна не зсувається")
+            else:
+                # Межа вікна наступної перевірки та жвавість стрічки для розкладу
+                covered = (started_at - last_success) if last_success else timedelta(hours=hours)
+                self.feed_rate = result.feed_items / max(covered.total_seconds() / 3600, 1 / 60)
+                self.storage.set_state(self.LAST_SUCCESS_KEY, {
+                    'started_at': started_at.isoformat(),
+                    'finished_at': datetime.now().isoformat(),
+                    'feed_items': result.feed_items,
+                })
+                run_result = 'success'
             
-            print(f"\nНових тендерів для обробки: {len(new_tenders)}")
-            print(f"{'='*70}\n")
+            for stage, count in (('scanned', result.feed_items), ('fetched', result.candidates),
+                                 ('matched', result.matched), ('new', result.new),
+                                 ('changed', result.changed), ('sent', result.sent)):
+                metrics.TENDERS.inc(count, stage=stage)
             
-            # Відправити сповіщення про кожен новий тендер
-            sent_count = 0
-            for tender in new_tenders:
-                tender_id = tender.get('id')
-                
-                # Відправити сповіщення
-                success = self.notifier.send_tender_notification(tender)
-                
-                if success:
-                    # Позначити як оброблений
-                    self.storage.mark_as_processed(tender_id)
-                    sent_count += 1
-                    
-                    # Затримка між повідомленнями
-                    if sent_count < len(new_tenders):
-                        time.sleep(2)
+            if not result.matched:
+                print("Нових тендерів на переклад не знайдено")
+            
+            if not result.new and not result.sent:
+                if result.matched:
+                    print(f"Всі знайдені тендери ({result.matched}) вже були оброблені раніше")
+                return
             
             print(f"\n{'='*70}")
             print(f"Перевірку завершено!")
-            print(f"Відправлено сповіщень: {sent_count} з {len(new_tenders)}")
+            print(f"Відправлено сповіщень: {result.sent} (нових тендерів: {result.new})")
             print(f"Всього оброблено тендерів: {self.storage.get_processed_count()}")
             print(f"{'='*70}\n")
             
@@ -76,60 +270,236 @@ class TenderMonitor:
             print(f"Помилка під час перевірки тендерів: {e}")
             import traceback
             traceback.print_exc()
+        finally:
+            # Записати накопичені позначки одним атомарним записом
+            self.storage.flush()
+            
+            elapsed = time.perf_counter() - started
+            metrics.RUNS.inc(result=run_result)
+            metrics.RUN_SECONDS.observe(elapsed)
+            metrics.LAST_RUN_SECONDS.set(elapsed)
+            metrics.LAST_RUN_TIMESTAMP.set(time.time())
     
-    def run_check(self):
-        """Запустити перевірку (синхронна обгортка для scheduler)"""
+    def check_new_tenders(self):
+        """Синхронна обгортка check_new_tenders_async()"""
+        asyncio.run(self.check_new_tenders_async())
+    
+    async def run_check_async(self):
+        """Запустити перевірку (завдання для scheduler)"""
         # Очищення старих записів (старші 90 днів)
         self.storage.cleanup_old_tenders(days=90)
-        self.check_new_tenders()
+        await self.check_new_tenders_async()
+    
+    def run_check(self):
+        """Синхронна обгортка run_check_async()"""
+        asyncio.run(self.run_check_async())
     
     def start_scheduler(self):
         """Запустити планувальник для щогодинних перевірок"""
+        try:
+            asyncio.run(self._run_scheduler())
+        except (KeyboardInterrupt, SystemExit):
+            print("\n\nЗупинка моніторингу...")
+            print("До побачення!\n")
+    
+    async def _scheduled_check(self):
+        """Завдання планувальника: перевірка і (в адаптивному режимі) новий інтервал"""
+        await self.run_check_async()
+        
+        if self.schedule_mode == 'adaptive' and self._scheduler is not None:
+            self._reschedule()
+    
+    def _reschedule(self):
+        """Переналаштувати інтервал завдання, якщо він змінився"""
+        from apscheduler.triggers.interval import IntervalTrigger
+        
+        timezone = self._scheduler.timezone
+        interval = self.adaptive_interval.next_interval(datetime.now(timezone), self.feed_rate)
+        metrics.SCHEDULE_INTERVAL.set(interval.total_seconds())
+        
+        job = self._scheduler.get_job(self.JOB_ID)
+        if job is not None and getattr(job.trigger, 'interval', None) == interval:
+            return
+        
+        print(f"🕐 Наступні перевірки кожні {interval.total_seconds() / 60:g} хв")
+        self._scheduler.reschedule_job(self.JOB_ID, trigger=IntervalTrigger(seconds=interval.total_seconds(),
+                                                                            timezone=timezone))
+    
+    async def _run_scheduler(self):
+        """Запустити AsyncIOScheduler у поточному циклі подій і чекати завершення"""
+        import pytz
+        from apscheduler.schedulers.asyncio import AsyncIOScheduler
+        from apscheduler.triggers.cron import CronTrigger
+        from apscheduler.triggers.interval import IntervalTrigger
+        
         # Отримати часовий пояс з environment variables
         timezone_str = os.getenv('TIMEZONE', 'Europe/Kiev')
         timezone = pytz.timezone(timezone_str)
+        adaptive = self.schedule_mode == 'adaptive'
         
         print(f"\n{'='*70}")
         print(f"Prozorro Tender Monitor запущено!")
-        print(f"Перевірки кожну годину ({timezone_str})")
+        if adaptive:
+            print(f"Адаптивний розклад перевірок ({timezone_str})")
+        else:
+            print(f"Перевірки кожну годину ({timezone_str})")
         print(f"Моніторинг: конкурентні процедури на письмовий переклад")
         print(f"{'='*70}\n")
         
-        # Створити scheduler
-        scheduler = BlockingScheduler(timezone=timezone)
+        # Одночасно не більше однієї перевірки; пропущені запуски зливаються в один
+        scheduler = AsyncIOScheduler(timezone=timezone, job_defaults={
+            'max_instances': 1,
+            'coalesce': True,
+            'misfire_grace_time': 15 * 60,
+        })
+        self._scheduler = scheduler
+        
+        if adaptive:
+            interval = self.adaptive_interval.next_interval(datetime.now(timezone), self.feed_rate)
+            trigger = IntervalTrigger(seconds=interval.total_seconds(), timezone=timezone)
+            metrics.SCHEDULE_INTERVAL.set(interval.total_seconds())
+        else:
+            # Перевірка кожну годину (о :00 кожної години)
+            trigger = CronTrigger(
+                minute=0,  # Кожну годину о :00
+                timezone=timezone
+            )
+            metrics.SCHEDULE_INTERVAL.set(3600)
         
-        # Перевірка кожну годину (о :00 кожної години)
-        trigger = CronTrigger(
-            minute=0,  # Кожну годину о :00
-            timezone=timezone
-        )
         scheduler.add_job(
-            self.run_check,
+            self._scheduled_check,
             trigger=trigger,
-            id='tender_check_hourly',
-            name='Щогодинна перевірка тендерів',
+            id=self.JOB_ID,
+            name='Перевірка тендерів',
             replace_existing=True
         )
         
-        print(f"✅ Заплановано перевірки кожну годину")
-        print(f"   🕐 Наступна перевірка о :00\n")
+        metrics.start_metrics_server()
+        
+        if adaptive:
+            print(f"✅ Заплановано перевірки кожні {interval.total_seconds() / 60:g} хв "
+                  f"(інтервал підлаштовується після кожної перевірки)\n")
+        else:
+            print(f"✅ Заплановано перевірки кожну годину")
+            print(f"   🕐 Наступна перевірка о :00\n")
         
         # Запустити першу перевірку одразу (для тестування)
         print("Виконуємо першу перевірку одразу...\n")
-        self.run_check()
+        await self.run_check_async()
         
         # Запустити scheduler
         print(f"\n{'='*70}")
         print(f"Scheduler запущено. Очікування наступних перевірок...")
         print(f"{'='*70}\n")
         
+        scheduler.start()
+        if adaptive:
+            self._reschedule()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            scheduler.shutdown(wait=False)
+    
+    def next_tail_delay(self, delay: float, feed_items: int) -> float:
+        """
+        Пауза перед наступним опитуванням стрічки в режимі tail:
+        є нові зміни - мінімальна, порожньо - вдвічі довша, до TAIL_MAX_INTERVAL
+        """
+        if feed_items:
+            return self.tail_min_interval
+        return min(self.tail_max_interval, max(delay, self.tail_min_interval) * 2)
+    
+    def start_tail(self):
+        """Запустити безперервне стеження за стрічкою"""
         try:
-            scheduler.start()
+            asyncio.run(self.run_tail_async())
         except (KeyboardInterrupt, SystemExit):
             print("\n\nЗупинка моніторингу...")
             print("До побачення!\n")
     
-    def run_test(self):
+    async def run_tail_async(self, max_polls: Optional[int] = None):
+        """
+        Режим tail: коротке опитування стрічки від курсора замість щогодинних перевірок.
+        Кожне опитування - прохід конвеєра з невеликою сторінкою, знахідки
+        відправляються одразу (без дайджесту). max_polls - для тестів.
+        """
+        print(f"\n{'='*70}")
+        print(f"Prozorro Tender Monitor запущено в режимі tail!")
+        print(f"Опитування стрічки кожні {self.tail_min_interval:g}-{self.tail_max_interval:g} с "
+              f"(сторінка {self.tail_limit})")
+        print(f"{'='*70}\n")
+        
+        metrics.start_metrics_server()
+        metrics.SCHEDULE_INTERVAL.set(self.tail_min_interval)
+        
+        cursor = self._load_feed_cursor()
+        hours = self._window_hours(self._load_last_success())
+        if not cursor:
+            print(f"🕐 Вікно сканування: {hours:g} год")
+        
+        delay = self.tail_min_interval
+        cleaned_at = None
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            if cleaned_at is None or time.monotonic() - cleaned_at >= self.TAIL_CLEANUP_SECONDS:
+                self.storage.cleanup_old_tenders(days=90)
+                cleaned_at = time.monotonic()
+            
+            feed_items, cursor = await self._tail_poll(cursor, hours)
+            polls += 1
+            delay = self.next_tail_delay(delay, feed_items)
+            metrics.SCHEDULE_INTERVAL.set(delay)
+            if max_polls is None or polls < max_polls:
+                await asyncio.sleep(delay)
+    
+    async def _tail_poll(self, cursor: Optional[str], hours: float) -> Tuple[int, Optional[str]]:
+        """Одне опитування стрічки в режимі tail; повертає кількість змін і новий курсор"""
+        from src.pipeline import TenderPipeline
+        
+        started = time.perf_counter()
+        started_at = datetime.now()
+        run_result = 'error'
+        feed_items = 0
+        try:
+            pipeline = TenderPipeline(self.api, self.storage, self.subscriptions, self.notifiers,
+                                      digest=False, page_limit=self.tail_limit, verbose=False,
+                                      search_index=self.search_index, work_queue=self.work_queue)
+            result = await pipeline.run(cursor, incremental=True, hours=hours)
+            feed_items = result.feed_items
+            
+            if result.cursor and result.cursor != cursor:
+                self._save_feed_cursor(result.cursor)
+                cursor = result.cursor
+            # Межа вікна зсувається лише після повністю прочитаної стрічки
+            if feed_items and not result.feed_error:
+                self.storage.set_state(self.LAST_SUCCESS_KEY, {
+                    'started_at': started_at.isoformat(),
+                    'finished_at': datetime.now().isoformat(),
+                    'feed_items': feed_items,
+                })
+            
+            run_result = 'error' if result.feed_error else 'success'
+            for stage, count in (('scanned', result.feed_items), ('fetched', result.candidates),
+                                 ('matched', result.matched), ('new', result.new),
+                                 ('changed', result.changed), ('sent', result.sent)):
+                metrics.TENDERS.inc(count, stage=stage)
+            
+            if result.sent:
+                print(f"{datetime.now().strftime('%H:%M:%S')} Відправлено сповіщень: {result.sent}")
+            
+        except Exception as e:
+            print(f"Помилка під час опитування стрічки: {e}")
+        finally:
+            self.storage.flush()
+            
+            elapsed = time.perf_counter() - started
+            metrics.RUNS.inc(result=run_result)
+            metrics.RUN_SECONDS.observe(elapsed)
+            metrics.LAST_RUN_SECONDS.set(elapsed)
+            metrics.LAST_RUN_TIMESTAMP.set(time.time())
+        return feed_items, cursor
+    
+    async def run_test(self):
         """Запустити тестову перевірку зараз"""
         print(f"\n{'='*70}")
         print(f"ТЕСТОВИЙ РЕЖИМ")
@@ -137,11 +507,11 @@ class TenderMonitor:
         
         # Відправити тестове повідомлення
         print("Відправка тестового повідомлення...")
-        self.notifier.send_test_message()
+        await asyncio.to_thread(self.notifier.send_test_message)
         
         # Запустити перевірку тендерів
         print("\nЗапуск перевірки тендерів...\n")
-        self.check_new_tenders()
+        await self.check_new_tenders_async()
         
         print(f"\n{'='*70}")
         print(f"ТЕСТ ЗАВЕРШЕНО")
@@ -0,0 +1,242 @@
+"""
+Локальний повнотекстовий пошук по переглянутих тендерах
+
+SQLite FTS5: назви, описи, CPV-коди та замовники тендерів зі стрічки та
+завантажених деталей. Слова приводяться до основи легким стемером
+(відкидаються українські закінчення: перекладу, перекладів -> переклад),
+а слова запиту шукаються як префікси основ, тож "переклад" знаходить і
+"перекладацьких".
+
+Час зміни зберігається також як epoch-секунди (modified_at): Prozorro
+віддає dateModified з різними зсувами (+02:00, +03:00), і порівняння
+ISO-рядків біля межі доби дає неправильний результат.
+"""
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tenders (
+    id INTEGER PRIMARY KEY,
+    tender_id TEXT NOT NULL UNIQUE,
+    tender_code TEXT,
+    title TEXT,
+    description TEXT,
+    cpv TEXT,
+    customer TEXT,
+    status TEXT,
+    date_modified TEXT,
+    modified_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tenders_modified_at ON tenders(modified_at);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS tenders_fts USING fts5(
+    stems, tokenize = 'unicode61 remove_diacritics 0', prefix = '2 3'
+);
+"""
+
+# Скільки символів опису індексувати
+DESCRIPTION_LIMIT = 1000
+
+# Закінчення, що відкидаються стемером (довші перевіряються першими)
+_ENDINGS = sorted({
+    'ами', 'ями', 'ові', 'еві', 'єві', 'ого', 'ому', 'ими', 'іми', 'ього', 'ьому',
+    'ів', 'їв', 'ах', 'ях', 'ою', 'ею', 'єю', 'ом', 'ем', 'єм', 'ям', 'ам',
+    'ий', 'ій', 'ої', 'их', 'іх', 'ім', 'ая', 'яя', 'ую', 'юю', 'ее', 'еє',
+    'а', 'я', 'у', 'ю', 'і', 'и', 'о', 'е', 'є', 'ї', 'ь',
+}, key=len, reverse=True)
+
+# Найкоротша основа: коротші слова не скорочуються
+_MIN_STEM = 4
+
+_APOSTROPHES = re.compile(r"['’ʼ`]")
+_WORD = re.compile(r'\w+')
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Слова тексту в нижньому регістрі (апостроф не розриває слово)"""
+    if not text:
+        return []
+    return _WORD.findall(_APOSTROPHES.sub('', text.lower()))
+
+
+def stem(word: str) -> str:
+    """Основа слова: без одного українського закінчення"""
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= _MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def stems(*texts: Optional[str]) -> str:
+    """Основи всіх слів текстів через пробіл (вміст колонки FTS)"""
+    return ' '.join(stem(word) for text in texts for word in tokenize(text))
+
+
+def document(item: Dict) -> Tuple[Optional[str], ...]:
+    """
+    Документ індексу з елемента стрічки або деталей тендера.
+    Поля, яких немає (у стрічці - опису, CPV, замовника), - None
+    """
+    cpv = None
+    if item.get('items') is not None:
+        cpv = ' '.join(sorted({
+            (entry.get('classification') or {}).get('id', '')
+            for entry in item['items']
+        } - {''}))
+    description = item.get('description')
+    return (
+        item.get('id'),
+        item.get('tenderID'),
+        item.get('title'),
+        description[:DESCRIPTION_LIMIT] if description else description,
+        cpv,
+        (item.get('procuringEntity') or {}).get('name'),
+        item.get('status'),
+        item.get('dateModified'),
+    )
+
+
+def timestamp(value: Optional[str]) -> Optional[float]:
+    """Epoch-секунди ISO-моменту; без часового поясу - UTC (None - не дата)"""
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def build_query(text: str) -> Optional[str]:
+    """Запит FTS5: усі слова тексту як префікси основ (None - слів немає)"""
+    words = [stem(word) for word in tokenize(text)]
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class SearchIndex:
+    """Повнотекстовий індекс тендерів у SQLite FTS5"""
+
+    def __init__(self, path: str = 'data/search.db'):
+        """sqlite3.OperationalError - SQLite зібрано без FTS5"""
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # Кілька процесів (backfill, моніторинг) можуть писати в індекс одночасно
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._upgrade_schema()
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    def _upgrade_schema(self):
+        """Додати modified_at в індекс, створений без цієї колонки"""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(tenders)")]
+        if not columns or 'modified_at' in columns:
+            return
+        with self._conn:
+            self._conn.execute("ALTER TABLE tenders ADD COLUMN modified_at REAL")
+            self._conn.execute("DROP INDEX IF EXISTS idx_tenders_date_modified")
+            rows = self._conn.execute("SELECT id, date_modified FROM tenders").fetchall()
+            self._conn.executemany("UPDATE tenders SET modified_at = ? WHERE id = ?",
+                                   [(timestamp(date_modified), rowid) for rowid, date_modified in rows])
+
+    @classmethod
+    def from_env(cls) -> Optional['SearchIndex']:
+        """Індекс за SEARCH_INDEX_PATH ('' вимикає індекс)"""
+        path = os.getenv('SEARCH_INDEX_PATH', 'data/search.db')
+        if not path:
+            return None
+        try:
+            return cls(path)
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  Пошуковий індекс недоступний: {e}")
+            return None
+
+    def close(self):
+        """Закрити з'єднання з базою"""
+        with self._lock:
+            self._conn.close()
+
+    def add(self, documents: Iterable[Tuple[Optional[str], ...]]) -> int:
+        """
+        Додати або оновити документи (з document()) однією транзакцією.
+        Відсутні поля не затирають уже проіндексовані. Повертає кількість документів
+        """
+        count = 0
+        with self._lock, self._conn:
+            for doc in documents:
+                if not doc[0]:
+                    continue
+                self._conn.execute("""
+                    INSERT INTO tenders (tender_id, tender_code, title, description, cpv, customer, status,
+                                         date_modified, modified_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(tender_id) DO UPDATE SET
+                        tender_code = COALESCE(excluded.tender_code, tender_code),
+                        title = COALESCE(excluded.title, title),
+                        description = COALESCE(excluded.description, description),
+                        cpv = COALESCE(excluded.cpv, cpv),
+                        customer = COALESCE(excluded.customer, customer),
+                        status = COALESCE(excluded.status, status),
+                        date_modified = COALESCE(excluded.date_modified, date_modified),
+                        modified_at = COALESCE(excluded.modified_at, modified_at)
+                """, (*doc, timestamp(doc[7])))
+                rowid, title, description, cpv, customer = self._conn.execute(
+                    "SELECT id, title, description, cpv, customer FROM tenders WHERE tender_id = ?", (doc[0],)
+                ).fetchone()
+                self._conn.execute("DELETE FROM tenders_fts WHERE rowid = ?", (rowid,))
+                self._conn.execute(
+                    "INSERT INTO tenders_fts (rowid, stems) VALUES (?, ?)",
+                    (rowid, stems(title, description, customer, cpv))
+                )
+                count += 1
+        return count
+
+    def add_items(self, items: Iterable[Dict]) -> int:
+        """Додати елементи стрічки або деталі тендерів"""
+        return self.add(document(item) for item in items)
+
+    def search(self, text: str, limit: int = 20, since: Optional[str] = None) -> List[Dict]:
+        """
+        Тендери, що містять усі слова запиту, від нещодавно змінених.
+        since - лише тендери з dateModified не раніше (ISO-рядок; без поясу - UTC)
+        """
+        query = build_query(text)
+        if query is None:
+            return []
+
+        sql = """
+            SELECT t.tender_id, t.tender_code, t.title, t.customer, t.cpv, t.status, t.date_modified
+            FROM tenders_fts f JOIN tenders t ON t.id = f.rowid
+            WHERE tenders_fts MATCH ?
+        """
+        params: List = [query]
+        if since:
+            sql += " AND t.modified_at >= ?"
+            params.append(timestamp(since))
+        # За часом зміни, а не появи в індексі: backfill додає старі тендери пізніше нових
+        sql += " ORDER BY t.modified_at DESC, t.id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        keys = ('id', 'tenderID', 'title', 'customer', 'cpv', 'status', 'dateModified')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def count(self) -> int:
+        """Кількість проіндексованих тендерів"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tenders").fetchone()[0]
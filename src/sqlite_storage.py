@@ -0,0 +1,501 @@
+"""
+SQLite-сховище оброблених тендерів та знімків знайдених тендерів
+Той самий інтерфейс, що й у DataStorage, але з індексованими таблицями
+"""
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, Union
+
+from src import backup, bloom, metrics
+from src.data_storage import DataStorage
+from src.records import TenderRecord
+
+
+PROCESSED_DDL = """
+CREATE TABLE IF NOT EXISTS processed (
+    namespace TEXT NOT NULL DEFAULT '',
+    tender_id TEXT NOT NULL,
+    processed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, tender_id)
+);
+CREATE INDEX IF NOT EXISTS idx_processed_at ON processed(processed_at);
+"""
+
+SCHEMA = PROCESSED_DDL + """
+
+CREATE TABLE IF NOT EXISTS tender_seen (
+    tender_id TEXT PRIMARY KEY,
+    date_modified TEXT NOT NULL,
+    seen_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_seen_at ON tender_seen(seen_at);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    tender_id TEXT PRIMARY KEY,
+    date_modified TEXT,
+    saved_at REAL NOT NULL,
+    data TEXT NOT NULL,
+    hash TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_saved_at ON snapshots(saved_at);
+
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    namespace TEXT NOT NULL DEFAULT '',
+    tender_ids TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_namespace ON outbox(namespace, seq);
+"""
+
+# Версія схеми (PRAGMA user_version); 2 - простори імен підписок у processed,
+# 3 - відбиток відстежуваних полів у snapshots, 4 - outbox сповіщень
+SCHEMA_VERSION = 4
+
+
+class SQLiteStorage:
+    """Клас для збереження оброблених тендерів у SQLite"""
+
+    # Як часто перевіряти, чи processed змінювало інше з'єднання, секунди
+    BLOOM_SYNC_SECONDS = 1.0
+
+    def __init__(self, filepath: str = "data/tenders.db", json_path: Optional[str] = "data/processed_tenders.json",
+                 use_bloom: Optional[bool] = None):
+        """
+        Ініціалізація сховища
+
+        json_path - файл JSON-сховища, з якого мігрувати історію при першому запуску
+        use_bloom - фільтр Блума перед таблицею processed (за замовчуванням STORAGE_BLOOM)
+        """
+        self.filepath = filepath
+        self.bloom_enabled = use_bloom if use_bloom is not None else os.getenv('STORAGE_BLOOM', '0') == '1'
+        self.bloom_path = os.path.splitext(filepath)[0] + '.bloom'
+        self._bloom: Optional[bloom.BloomFilter] = None
+        self._bloom_version: Optional[int] = None
+        self._bloom_synced = 0.0
+        self._backup_changed = False
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(filepath, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._upgrade_schema()
+        self._conn.executescript(SCHEMA)
+        self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.commit()
+
+        # Мігрувати лише в нову базу: історія підписок і стан (курсор) не перезаписуються
+        if self._is_empty():
+            self._migrate_if_needed(json_path)
+
+    def _is_empty(self) -> bool:
+        """У базі немає історії жодного простору імен і службових значень"""
+        with self._lock:
+            return not any(self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+                           for table in ('processed', 'state'))
+
+    def _upgrade_schema(self):
+        """Оновити таблиці бази, створеної попередньою версією схеми"""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(processed)")]
+
+        if version < 2 and columns and 'namespace' not in columns:
+            self._conn.executescript(f"""
+                BEGIN;
+                ALTER TABLE processed RENAME TO processed_v1;
+                DROP INDEX IF EXISTS idx_processed_at;
+                {PROCESSED_DDL}
+                INSERT INTO processed (namespace, tender_id, processed_at)
+                    SELECT '', tender_id, processed_at FROM processed_v1;
+                DROP TABLE processed_v1;
+                COMMIT;
+            """)
+
+        snapshot_columns = [row[1] for row in self._conn.execute("PRAGMA table_info(snapshots)")]
+        if version < 3 and snapshot_columns and 'hash' not in snapshot_columns:
+            self._conn.execute("ALTER TABLE snapshots ADD COLUMN hash TEXT")
+
+    def _migrate_if_needed(self, json_path: Optional[str]):
+        """Перенести історію з JSON-файлу або PROCESSED_TENDERS_BACKUP"""
+        if json_path and os.path.exists(json_path):
+            imported = self.migrate_from_json(json_path)
+            if imported:
+                print(f"🔄 Перенесено {imported} тендерів з {json_path} у SQLite")
+                return
+
+        backup_value = os.getenv('PROCESSED_TENDERS_BACKUP', '')
+        if backup_value:
+            try:
+                imported = self.import_data(backup.decode(backup_value))
+                if imported:
+                    print(f"🔄 Відновлено {imported} тендерів з backup")
+            except ValueError:
+                print("⚠️  Помилка парсингу PROCESSED_TENDERS_BACKUP")
+
+    def migrate_from_json(self, json_path: str) -> int:
+        """Імпортувати дані з файлу JSON-сховища. Повертає кількість тендерів"""
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                return self.import_data(json.load(f))
+        except (json.JSONDecodeError, FileNotFoundError):
+            return 0
+
+    def import_data(self, data: Dict) -> int:
+        """Імпортувати дані у форматі JSON-сховища (processed_tenders, namespaces, last_check, state)"""
+        processed = DataStorage._normalize(dict(data))["processed_tenders"]
+
+        tables = {'': processed, **(data.get("namespaces") or {})}
+
+        rows = []
+        for namespace, table in tables.items():
+            for tender_id, date_str in table.items():
+                try:
+                    processed_at = datetime.fromisoformat(date_str).timestamp()
+                except (TypeError, ValueError):
+                    processed_at = datetime.now().timestamp()
+                rows.append((namespace, tender_id, processed_at))
+
+        with self._lock, self._conn:
+            self._insert_processed(rows)
+            if data.get("last_check"):
+                self._set_state_row("last_check", data["last_check"])
+            for key, value in (data.get("state") or {}).items():
+                self._set_state_row(key, value)
+
+        return len(rows)
+
+    def flush(self):
+        """
+        Сумісність з DataStorage: кожна зміна вже зафіксована транзакцією.
+        Виводить backup, якщо історія змінилась
+        """
+        with self._lock:
+            self._conn.commit()
+            if self._bloom is not None:
+                self._bloom.flush()
+                bloom.report(self._bloom, 'sqlite')
+            changed, self._backup_changed = self._backup_changed, False
+        if changed:
+            self._print_backup_instruction()
+
+    def close(self):
+        """Закрити з'єднання з базою"""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.close()
+                self._bloom = None
+            self._conn.close()
+
+    def _current_bloom(self) -> Optional[bloom.BloomFilter]:
+        """
+        Фільтр Блума, що відповідає таблиці processed (викликається під
+        self._lock). Не частіше ніж раз на BLOOM_SYNC_SECONDS перевіряється,
+        чи базу змінювало інше з'єднання (PRAGMA data_version); тоді
+        звіряється кількість записів. Фільтр будується заново, якщо файлу
+        немає, кількість не збігається чи фільтр переповнений
+        """
+        if not self.bloom_enabled:
+            return None
+        now = time.monotonic()
+        if self._bloom is not None and not self._bloom.full and now - self._bloom_synced < self.BLOOM_SYNC_SECONDS:
+            return self._bloom
+        self._bloom_synced = now
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if self._bloom is not None and version == self._bloom_version and not self._bloom.full:
+            return self._bloom
+
+        count = self._conn.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+        if self._bloom is None:
+            self._bloom = bloom.BloomFilter.open(self.bloom_path)
+        if self._bloom is None or self._bloom.count != count or self._bloom.full:
+            if self._bloom is not None:
+                self._bloom.close()
+            self._bloom = bloom.BloomFilter.build(
+                self.bloom_path,
+                (bloom.key(namespace, tender_id)
+                 for namespace, tender_id in self._conn.execute("SELECT namespace, tender_id FROM processed")),
+                count,
+            )
+            bloom.report(self._bloom, 'sqlite')
+        self._bloom_version = version
+        return self._bloom
+
+    def _reset_bloom(self):
+        """Викинути фільтр (з нього не можна видаляти); наступна перевірка побудує новий"""
+        if self._bloom is not None:
+            self._bloom.close()
+            self._bloom = None
+        if os.path.exists(self.bloom_path):
+            os.remove(self.bloom_path)
+
+    def _insert_processed(self, rows: List[Tuple[str, str, float]]) -> int:
+        """Вставити нові записи processed (всередині транзакції). Повертає кількість нових"""
+        before = self._conn.total_changes
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO processed (namespace, tender_id, processed_at) VALUES (?, ?, ?)", rows
+        )
+        added = self._conn.total_changes - before
+        if self._bloom is not None:
+            for namespace, tender_id, _ in rows:
+                self._bloom.add(bloom.key(namespace, tender_id))
+            self._bloom.count += added
+        return added
+
+    def is_processed(self, tender_id: str, namespace: str = '') -> bool:
+        """Перевірити чи тендер вже оброблено"""
+        def exists() -> bool:
+            return self._conn.execute(
+                "SELECT 1 FROM processed WHERE namespace = ? AND tender_id = ?", (namespace, tender_id)
+            ).fetchone() is not None
+
+        with self._lock:
+            return bloom.lookup(self._current_bloom(), 'sqlite', bloom.key(namespace, tender_id), exists)
+
+    def mark_as_processed(self, tender_id: str, namespace: str = ''):
+        """Позначити тендер як оброблений"""
+        self.mark_many([tender_id], namespace)
+
+    def mark_many(self, tender_ids: Iterable[str], namespace: str = ''):
+        """Позначити кілька тендерів як оброблені однією транзакцією"""
+        now = datetime.now()
+        rows = [(namespace, tender_id, now.timestamp()) for tender_id in tender_ids]
+        if not rows:
+            return
+
+        with metrics.STORAGE_SECONDS.time(backend='sqlite', operation='mark'), self._lock, self._conn:
+            added = self._insert_processed(rows)
+            if added:
+                self._set_state_row("last_check", now.isoformat())
+
+        if added:
+            self._backup_changed = True
+
+    def _print_backup_instruction(self):
+        """Вивести компактний backup для збереження в Railway Variables"""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM processed").fetchone()[0]
+        if count > 0:
+            backup.print_instruction(count, self.get_backup)
+
+    def get_processed_count(self, namespace: str = '') -> int:
+        """Отримати кількість оброблених тендерів"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM processed WHERE namespace = ?", (namespace,)
+            ).fetchone()[0]
+
+    def get_processed_ids(self, namespace: str = '') -> List[str]:
+        """Отримати список ID оброблених тендерів"""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT tender_id FROM processed WHERE namespace = ?", (namespace,)
+            )]
+
+    def get_last_check(self) -> str:
+        """Отримати час останньої перевірки"""
+        return self.get_state("last_check", "Ніколи")
+
+    def _set_state_row(self, key: str, value: Any):
+        """Записати значення стану (викликається всередині транзакції)"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+            (key, json.dumps(value, ensure_ascii=False))
+        )
+
+    def get_state(self, key: str, default: Any = None) -> Any:
+        """Отримати службове значення (курсор стрічки тощо)"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_state(self, key: str, value: Any):
+        """Зберегти службове значення"""
+        with self._lock, self._conn:
+            self._set_state_row(key, value)
+
+    def outbox_add(self, entries: Iterable[Dict]) -> int:
+        """
+        Записати сповіщення в outbox однією транзакцією.
+        entries - {'key', 'namespace', 'tender_ids', 'text'}; запис з ключем,
+        що вже є в outbox, пропускається. Повертає кількість доданих
+        """
+        now = datetime.now().timestamp()
+        rows = [(entry['key'], entry['namespace'], json.dumps(entry['tender_ids']), entry['text'], now)
+                for entry in entries]
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO outbox (key, namespace, tender_ids, text, created_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            return self._conn.total_changes - before
+
+    def outbox_pending(self, namespace: str = '') -> List[Dict]:
+        """Невідправлені сповіщення простору імен у порядку додавання"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, tender_ids, text FROM outbox WHERE namespace = ? ORDER BY seq", (namespace,)
+            ).fetchall()
+        return [{'key': key, 'namespace': namespace, 'tender_ids': json.loads(tender_ids), 'text': text}
+                for key, tender_ids, text in rows]
+
+    def outbox_complete(self, keys: Iterable[str], namespace: str = '') -> int:
+        """
+        Відправлені сповіщення: тендери позначаються обробленими, записи
+        видаляються з outbox - в одній транзакції. Повертає кількість тендерів
+        """
+        keys = list(keys)
+        now = datetime.now()
+        with metrics.STORAGE_SECONDS.time(backend='sqlite', operation='outbox'), self._lock, self._conn:
+            tender_ids = []
+            for key in keys:
+                row = self._conn.execute(
+                    "SELECT tender_ids FROM outbox WHERE key = ? AND namespace = ?", (key, namespace)
+                ).fetchone()
+                if row:
+                    tender_ids.extend(json.loads(row[0]))
+                    self._conn.execute("DELETE FROM outbox WHERE key = ?", (key,))
+            if self._insert_processed([(namespace, tender_id, now.timestamp()) for tender_id in tender_ids]):
+                self._set_state_row("last_check", now.isoformat())
+                self._backup_changed = True
+        return len(tender_ids)
+
+    def record_seen(self, items: Iterable[Tuple[str, str]]):
+        """Запам'ятати останній побачений dateModified для пар (tender_id, dateModified)"""
+        now = datetime.now().timestamp()
+        rows = [(tender_id, date_modified, now) for tender_id, date_modified in items if date_modified]
+        with metrics.STORAGE_SECONDS.time(backend='sqlite', operation='record_seen'), self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tender_seen (tender_id, date_modified, seen_at) VALUES (?, ?, ?)",
+                rows
+            )
+
+    def get_seen_date_modified(self, tender_id: str) -> Optional[str]:
+        """Отримати останній побачений dateModified тендера"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT date_modified FROM tender_seen WHERE tender_id = ?", (tender_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_snapshot(self, tender: Union[TenderRecord, Dict]):
+        """Зберегти компактний знімок знайденого тендера з відбитком відстежуваних полів"""
+        record = TenderRecord.coerce(tender)
+        snapshot = record.snapshot()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots (tender_id, date_modified, saved_at, data, hash) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (snapshot['id'], snapshot.get('dateModified'), datetime.now().timestamp(),
+                 json.dumps(snapshot, ensure_ascii=False, separators=(',', ':')), record.tracked_hash())
+            )
+
+    def get_snapshot(self, tender_id: str) -> Optional[Dict]:
+        """Отримати збережений знімок тендера"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM snapshots WHERE tender_id = ?", (tender_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_tracked(self, tender_ids: Iterable[str]) -> Dict[str, Tuple[Optional[str], str]]:
+        """
+        Тендери зі знімками серед tender_ids: ID -> (dateModified знімка, відбиток).
+        Відбиток '' - знімок збережено до відстеження змін
+        """
+        tender_ids = list(tender_ids)
+        tracked = {}
+        with self._lock:
+            # Не більше 500 параметрів на запит (ліміт SQLite - 999 у старих версіях)
+            for start in range(0, len(tender_ids), 500):
+                chunk = tender_ids[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                for tender_id, date_modified, digest in self._conn.execute(
+                    f"SELECT tender_id, date_modified, hash FROM snapshots WHERE tender_id IN ({placeholders})",
+                    chunk
+                ):
+                    tracked[tender_id] = (date_modified, digest or '')
+        return tracked
+
+    def get_backup(self) -> str:
+        """Отримати компактний backup (PTB1) для PROCESSED_TENDERS_BACKUP"""
+        out = io.StringIO()
+        backup.export_storage(self, out)
+        return out.getvalue()
+
+    def iter_processed(self) -> Iterator[Tuple[str, str, float]]:
+        """Записи (простір імен, ID, epoch) за простором імен та ID - для експорту"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT namespace, tender_id, processed_at FROM processed ORDER BY namespace, tender_id"
+            )
+        while True:
+            with self._lock:
+                batch = rows.fetchmany(1000)
+            if not batch:
+                return
+            yield from batch
+
+    def get_backup_meta(self) -> Dict[str, Any]:
+        """last_check і службові значення для backup"""
+        with self._lock:
+            state = {key: json.loads(value) for key, value in self._conn.execute("SELECT key, value FROM state")}
+        return {'last_check': state.pop('last_check', None), 'state': state}
+
+    def import_processed(self, rows: Iterable[Tuple[str, str, float]]) -> int:
+        """Додати записи (простір імен, ID, epoch) з backup. Повертає кількість нових"""
+        with self._lock, self._conn:
+            return self._insert_processed(list(rows))
+
+    def import_backup_meta(self, meta: Dict[str, Any]):
+        """Відновити last_check і службові значення з backup"""
+        with self._lock, self._conn:
+            if meta.get('last_check'):
+                self._set_state_row("last_check", meta['last_check'])
+            for key, value in (meta.get('state') or {}).items():
+                self._set_state_row(key, value)
+
+    def get_backup_json(self) -> str:
+        """Отримати JSON для збереження в PROCESSED_TENDERS_BACKUP (старий формат)"""
+        tables: Dict[str, Dict[str, str]] = {}
+        with self._lock:
+            for namespace, tender_id, processed_at in self._conn.execute(
+                "SELECT namespace, tender_id, processed_at FROM processed ORDER BY namespace, tender_id"
+            ):
+                tables.setdefault(namespace, {})[tender_id] = datetime.fromtimestamp(processed_at).isoformat()
+
+        data = {"processed_tenders": tables.pop('', {}), "last_check": self.get_state("last_check")}
+        if tables:
+            data["namespaces"] = tables
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+    def cleanup_old_tenders(self, days: int = 90):
+        """Видалити тендери старші за N днів (за індексом дати)"""
+        cutoff = (datetime.now() - timedelta(days=days)).timestamp()
+
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                "DELETE FROM processed WHERE processed_at < ?", (cutoff,)
+            ).rowcount
+            self._conn.execute("DELETE FROM tender_seen WHERE seen_at < ?", (cutoff,))
+            self._conn.execute("DELETE FROM snapshots WHERE saved_at < ?", (cutoff,))
+            if removed > 0:
+                self._reset_bloom()
+
+        if removed > 0:
+            print(f"🧹 Видалено {removed} старих записів (старші {days} днів)")
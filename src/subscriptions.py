@@ -0,0 +1,63 @@
+"""
+Підписки: один прохід стрічки - багато фільтрів і чатів
+"""
+import json
+import os
+from typing import List, Dict, Optional, Iterable
+
+
+class Subscription:
+    """
+    Підписка на тендери: які правила відбору цікаві, куди надсилати
+    сповіщення і в якому просторі імен сховища вести історію
+    """
+
+    def __init__(self, name: str, chat_id: Optional[str] = None, rules: Optional[Iterable[str]] = None,
+                 namespace: str = ''):
+        """
+        rules - назви правил MatchEngine (None - всі правила)
+        namespace - простір імен історії в сховищі ('' - основна історія)
+        """
+        self.name = name
+        self.chat_id = str(chat_id) if chat_id is not None else os.getenv('TELEGRAM_CHAT_ID')
+        self.rules = set(rules) if rules is not None else None
+        self.namespace = namespace
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Subscription':
+        """Створити підписку з елемента конфігураційного файлу"""
+        return cls(
+            name=data['name'],
+            chat_id=data.get('chat_id'),
+            rules=data.get('rules'),
+            namespace=data.get('namespace', data['name']),
+        )
+
+    def accepts(self, tender: Dict) -> bool:
+        """Чи цікавий підписці тендер (за правилами, що на ньому збіглися)"""
+        if self.rules is None:
+            return True
+        return bool(self.rules.intersection(tender.get('_matched_rules', [])))
+
+
+def load_subscriptions() -> List[Subscription]:
+    """
+    Завантажити підписки з SUBSCRIPTIONS_FILE; якщо файлу немає - одна
+    підписка на всі правила в чат TELEGRAM_CHAT_ID з основною історією
+    """
+    path = os.getenv('SUBSCRIPTIONS_FILE', 'config/subscriptions.json')
+    if not path or not os.path.exists(path):
+        return [Subscription('default')]
+
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    subscriptions = [Subscription.from_dict(item) for item in config.get('subscriptions', [])]
+    if not subscriptions:
+        raise ValueError(f"У файлі підписок {path} немає жодної підписки")
+
+    namespaces = [subscription.namespace for subscription in subscriptions]
+    if len(set(namespaces)) != len(namespaces):
+        raise ValueError(f"У файлі підписок {path} простори імен (namespace) мають бути унікальними")
+
+    return subscriptions
@@ -3,8 +3,10 @@
 """
 import os
 import requests
-from typing import Dict
+from typing import Dict, List, Optional, Tuple, Union
 from dotenv import load_dotenv
+from src import metrics
+from src.records import TenderRecord
 
 # Завантажити змінні середовища
 load_dotenv()
@@ -13,35 +15,36 @@ load_dotenv()
 class TelegramNotifier:
     """Клас для відправки сповіщень у Telegram"""
 
-    def __init__(self):
-        """Ініціалізація Telegram бота"""
+    # Максимальна довжина тексту повідомлення в Telegram
+    MAX_MESSAGE_LENGTH = 4096
+
+    def __init__(self, chat_id: Optional[str] = None):
+        """Ініціалізація Telegram бота (chat_id за замовчуванням - TELEGRAM_CHAT_ID)"""
         self.bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
-        self.chat_id = os.getenv('TELEGRAM_CHAT_ID')
+        self.chat_id = chat_id or os.getenv('TELEGRAM_CHAT_ID')
 
         if not self.bot_token or not self.chat_id:
             raise ValueError("TELEGRAM_BOT_TOKEN та TELEGRAM_CHAT_ID мають бути встановлені в .env файлі")
 
-        self.api_url = f"https://api.telegram.org/bot{self.bot_token}"
+        base_url = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org').rstrip('/')
+        self.api_url = f"{base_url}/bot{self.bot_token}"
+        # Одне keep-alive з'єднання на всі повідомлення
+        self.session = requests.Session()
 
-    def format_tender_message(self, tender: Dict) -> str:
+    def format_tender_message(self, tender: Union[TenderRecord, Dict]) -> str:
         """
         Форматувати повідомлення про тендер
         """
-        title = tender.get('title', 'N/A')
-        value = tender.get('value', {})
-        amount = value.get('amount', 0)
-        currency = value.get('currency', 'UAH')
-
-        tender_period = tender.get('tenderPeriod', {})
-        end_date = tender_period.get('endDate', 'N/A')
-
-        procuring_entity = tender.get('procuringEntity', {})
-        customer = procuring_entity.get('name', 'N/A')
-
-        description = tender.get('description', 'Опис відсутній')
+        record = TenderRecord.coerce(tender)
+        title = record.title or 'N/A'
+        amount = record.amount if record.amount is not None else 0
+        currency = record.currency or 'UAH'
+        end_date = record.end_date or 'N/A'
+        customer = record.customer or 'N/A'
+        description = record.description or 'Опис відсутній'
 
         # Використовуємо tenderID (публічний ID) для посилання
-        tender_id = tender.get('tenderID', tender.get('id', ''))
+        tender_id = record.tender_id or record.id or ''
 
         uub_link = f"https://tender.uub.com.ua/tender/{tender_id}/"
 
@@ -58,41 +61,87 @@ class TelegramNotifier:
 
         return message
 
-    def send_tender_notification(self, tender: Dict) -> bool:
+    # Підписи відстежуваних полів у сповіщенні про зміни
+    CHANGE_LABELS = {
+        'endDate': '📅 Дедлайн подачі',
+        'amount': '💰 Бюджет',
+        'currency': '💱 Валюта',
+        'status': '📌 Статус',
+        'documents': '📎 Документи',
+    }
+
+    def format_change_message(self, tender: Union[TenderRecord, Dict], changes: List[Tuple[str, object, object]]) -> str:
         """
-        Відправити сповіщення про тендер
+        Форматувати коротке повідомлення про зміни вже надісланого тендера
+        changes - (поле, було, стало) з TenderRecord.diff
+        """
+        record = TenderRecord.coerce(tender)
+        tender_id = record.tender_id or record.id or ''
+
+        lines = [f"✏️ Зміни в тендері {tender_id}", "", f"📋 {record.title or 'N/A'}", ""]
+        for field, old, new in changes:
+            label = self.CHANGE_LABELS.get(field, field)
+            if field == 'amount':
+                old = f"{old:,.2f}" if isinstance(old, (int, float)) else 'N/A'
+                new = f"{new:,.2f} {record.currency or 'UAH'}" if isinstance(new, (int, float)) else 'N/A'
+            elif field == 'documents':
+                new = f"{new if new is not None else 'N/A'} (оновлено)"
+            lines.append(f"{label}: {old if old is not None else 'N/A'} → {new}")
+        lines.extend(["", f"🔗 Посилання: https://tender.uub.com.ua/tender/{tender_id}/"])
+
+        return '\n'.join(lines) + '\n'
+
+    def send_message(self, text: str) -> Tuple[bool, Optional[float]]:
+        """
+        Відправити текстове повідомлення.
+        Повертає (успіх, retry_after) - retry_after задано, якщо Telegram
+        відповів 429 і просить зачекати N секунд.
         """
         try:
-            message = self.format_tender_message(tender)
-
-            response = requests.post(
-                f"{self.api_url}/sendMessage",
-                json={
-                    "chat_id": self.chat_id,
-                    "text": message,
-                    "disable_web_page_preview": True
-                },
-                timeout=30
-            )
+            with metrics.TELEGRAM_SECONDS.time():
+                response = self.session.post(
+                    f"{self.api_url}/sendMessage",
+                    json={
+                        "chat_id": self.chat_id,
+                        "text": text[:self.MAX_MESSAGE_LENGTH],
+                        "disable_web_page_preview": True
+                    },
+                    timeout=30
+                )
 
             if response.status_code == 200:
-                return True
-            else:
-                error_data = response.json()
-                print(f"❌ Помилка відправки в Telegram: {error_data.get('description', response.status_code)}")
-                return False
+                metrics.TELEGRAM_MESSAGES.inc(result='sent')
+                return True, None
+
+            error_data = response.json()
+            retry_after = (error_data.get('parameters') or {}).get('retry_after')
+            print(f"❌ Помилка відправки в Telegram: {error_data.get('description', response.status_code)}")
+            if response.status_code == 429 and retry_after is not None:
+                metrics.TELEGRAM_MESSAGES.inc(result='rate_limited')
+                return False, float(retry_after)
+            metrics.TELEGRAM_MESSAGES.inc(result='failed')
+            return False, None
 
         except requests.exceptions.RequestException as e:
+            metrics.TELEGRAM_MESSAGES.inc(result='error')
             print(f"❌ Помилка з'єднання з Telegram: {e}")
-            return False
+            return False, None
         except Exception as e:
+            metrics.TELEGRAM_MESSAGES.inc(result='error')
             print(f"❌ Неочікувана помилка: {e}")
-            return False
+            return False, None
+
+    def send_tender_notification(self, tender: Dict) -> bool:
+        """
+        Відправити сповіщення про тендер
+        """
+        success, _ = self.send_message(self.format_tender_message(tender))
+        return success
 
     def send_test_message(self) -> bool:
         """Відправити тестове повідомлення"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.api_url}/sendMessage",
                 json={
                     "chat_id": self.chat_id,
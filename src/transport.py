@@ -0,0 +1,141 @@
+"""
+Стійкість HTTP-клієнта Prozorro: повтори з експоненційною затримкою,
+Retry-After та запобіжник (circuit breaker)
+"""
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+
+from src import metrics
+
+
+# Статуси, після яких запит варто повторити
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Запобіжник розімкнено: запит не виконувався"""
+
+
+class RetryPolicy:
+    """
+    Повтори з експоненційною затримкою та повним jitter:
+    спроба n чекає випадковий час від 0 до min(backoff_max, backoff_base * 2^n)
+    """
+
+    def __init__(self, max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 30.0):
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = max(0.0, backoff_base)
+        self.backoff_max = max(0.0, backoff_max)
+
+    @classmethod
+    def from_env(cls) -> 'RetryPolicy':
+        """Налаштування з PROZORRO_MAX_RETRIES, PROZORRO_BACKOFF_BASE, PROZORRO_BACKOFF_MAX"""
+        return cls(
+            max_retries=int(os.getenv('PROZORRO_MAX_RETRIES', '3')),
+            backoff_base=float(os.getenv('PROZORRO_BACKOFF_BASE', '0.5')),
+            backoff_max=float(os.getenv('PROZORRO_BACKOFF_MAX', '30')),
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """Затримка перед повтором номер attempt (з нуля)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    """Значення заголовка Retry-After у секундах (число або HTTP-дата)"""
+    value = (response.headers or {}).get('Retry-After')
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """
+    Запобіжник: після failure_threshold помилок поспіль запити не виконуються
+    reset_timeout секунд. Потім пропускається один пробний запит: успіх
+    замикає запобіжник, помилка - знову розмикає.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, name: str = 'prozorro'):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.name = name
+
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'CircuitBreaker':
+        """Налаштування з PROZORRO_BREAKER_THRESHOLD та PROZORRO_BREAKER_RESET"""
+        return cls(
+            failure_threshold=int(os.getenv('PROZORRO_BREAKER_THRESHOLD', '5')),
+            reset_timeout=float(os.getenv('PROZORRO_BREAKER_RESET', '30')),
+        )
+
+    def _set_state(self, state: str):
+        """Змінити стан (під блокуванням)"""
+        if state != self.state:
+            self.state = state
+            if state == self.OPEN:
+                metrics.BREAKER_OPENED.inc(name=self.name)
+        metrics.BREAKER_STATE.set(
+            {self.CLOSED: 0, self.OPEN: 1, self.HALF_OPEN: 2}[state], name=self.name
+        )
+
+    def before_request(self):
+        """Дозволити запит або кинути CircuitOpenError"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+        raise CircuitOpenError(f"Запобіжник {self.name} розімкнено після {self._failures} помилок поспіль")
+
+    def record_success(self):
+        """Запит успішний: скинути лічильник помилок"""
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        """Запит невдалий: розімкнути запобіжник при досягненні порогу"""
+        with self._lock:
+            self._failures += 1
+            was_probe = self._probe_in_flight
+            self._probe_in_flight = False
+            if was_probe or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"⚡ Запобіжник {self.name} розімкнено на {self.reset_timeout:.0f} с "
+                          f"({self._failures} помилок поспіль)")
+                self._opened_at = time.monotonic()
+                self._set_state(self.OPEN)
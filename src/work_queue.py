@@ -0,0 +1,279 @@
+"""
+Черга завдань для розподіленої перевірки (координатор і виконавці)
+
+Координатор (TenderMonitor з WORK_QUEUE_PATH) читає стрічку і кладе
+кандидатів у чергу SQLite. Виконавці (python main.py worker) - процеси
+на цьому ж або інших вузлах зі спільним томом - беруть завдання в оренду,
+завантажують деталі, перевіряють правилами й повертають результат.
+Дедуплікацію і сповіщення виконує лише координатор, тож тендер
+надсилається один раз незалежно від кількості виконавців.
+
+Стани завдання: pending -> leased -> done -> collected (видаляється
+після обробки). Оренда, що не завершилась за lease_seconds (виконавець
+упав), повертається в чергу; результат застарілої оренди відкидається.
+"""
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+from src import metrics, search_index
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    tender_id TEXT PRIMARY KEY,
+    date_modified TEXT,
+    track TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL NOT NULL DEFAULT 0,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(state, lease_until);
+"""
+
+# Завдання - (ID тендера, dateModified, відбиток надісланого тендера або None)
+Job = Tuple[str, Optional[str], Optional[str]]
+
+
+class WorkQueue:
+    """Спільна черга завдань у SQLite (WAL, кілька процесів і вузлів)"""
+
+    # Скільки разів видавати завдання, перш ніж вважати його невдалим
+    MAX_LEASES = 5
+
+    def __init__(self, path: str = 'data/work_queue.db', lease_seconds: float = 120):
+        """lease_seconds - за скільки виконавець має повернути результат"""
+        self.path = path
+        self.lease_seconds = lease_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # isolation_level=None: транзакції відкриваються явно (BEGIN IMMEDIATE)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> Optional['WorkQueue']:
+        """Черга за WORK_QUEUE_PATH (порожнє значення - розподілена перевірка вимкнена)"""
+        path = os.getenv('WORK_QUEUE_PATH', '')
+        if not path:
+            return None
+        return cls(path, lease_seconds=float(os.getenv('WORK_QUEUE_LEASE_SECONDS', '120')))
+
+    def close(self):
+        """Закрити з'єднання з базою"""
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _write(self):
+        """Транзакція BEGIN IMMEDIATE: блокування запису береться одразу, а не посеред транзакції"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def put(self, jobs: Sequence[Job]):
+        """
+        Додати завдання. Завдання, що вже в черзі з тим самим dateModified,
+        не змінюється; з іншим - видається заново
+        """
+        with self._write() as conn:
+            conn.executemany("""
+                INSERT INTO jobs (tender_id, date_modified, track) VALUES (?, ?, ?)
+                ON CONFLICT(tender_id) DO UPDATE SET
+                    date_modified = excluded.date_modified, track = excluded.track,
+                    state = 'pending', worker = NULL, attempts = 0, lease_until = 0, result = NULL
+                WHERE date_modified IS NOT excluded.date_modified
+            """, jobs)
+
+    def lease(self, worker: str, limit: int) -> List[Tuple[int, str, Optional[str], Optional[str]]]:
+        """
+        Взяти в оренду до limit завдань: нових або з простроченою орендою.
+        Повертає (номер оренди, ID, dateModified, відбиток)
+        """
+        now = time.time()
+        with self._write() as conn:
+            # Завдання, яке вже MAX_LEASES разів не повернули, - невдале
+            conn.execute("""
+                UPDATE jobs SET state = 'done', result = ?
+                WHERE state = 'leased' AND lease_until < ? AND attempts >= ?
+            """, (json.dumps({'failed': True}), now, self.MAX_LEASES))
+            rows = conn.execute("""
+                SELECT tender_id, date_modified, track, lease FROM jobs
+                WHERE state = 'pending' OR (state = 'leased' AND lease_until < ?)
+                ORDER BY rowid LIMIT ?
+            """, (now, limit)).fetchall()
+            # Номер оренди лише зростає: за ним відкидаються результати застарілих оренд
+            conn.executemany("""
+                UPDATE jobs SET state = 'leased', worker = ?, lease = lease + 1, attempts = attempts + 1,
+                                lease_until = ?
+                WHERE tender_id = ?
+            """, [(worker, now + self.lease_seconds, row[0]) for row in rows])
+        return [(lease + 1, tender_id, date_modified, track) for tender_id, date_modified, track, lease in rows]
+
+    def complete(self, results: Sequence[Tuple[int, str, Dict]]) -> int:
+        """
+        Записати результати (номер оренди, ID, результат). Результат оренди,
+        яку вже передано іншому виконавцю, відкидається. Повертає кількість прийнятих
+        """
+        accepted = 0
+        with self._write() as conn:
+            for lease, tender_id, result in results:
+                accepted += conn.execute("""
+                    UPDATE jobs SET state = 'done', result = ?
+                    WHERE tender_id = ? AND lease = ? AND state = 'leased'
+                """, (json.dumps(result, ensure_ascii=False), tender_id, lease)).rowcount
+        return accepted
+
+    def collect(self, limit: int = 100) -> List[Tuple[str, Optional[str], Optional[str], Dict]]:
+        """
+        Готові результати для координатора: (ID, dateModified, відбиток, результат).
+        Завдання лишаються в черзі (collected) до ack(), тож після падіння
+        координатора їх обробить наступний запуск (restore())
+        """
+        with self._write() as conn:
+            rows = conn.execute("""
+                SELECT tender_id, date_modified, track, result FROM jobs
+                WHERE state = 'done' ORDER BY rowid LIMIT ?
+            """, (limit,)).fetchall()
+            conn.executemany("UPDATE jobs SET state = 'collected' WHERE tender_id = ?",
+                             [(row[0],) for row in rows])
+        return [(tender_id, date_modified, track, json.loads(result))
+                for tender_id, date_modified, track, result in rows]
+
+    def ack(self, tender_ids: Sequence[str]):
+        """Видалити оброблені координатором завдання (якщо їх не додано заново)"""
+        with self._write() as conn:
+            conn.executemany("DELETE FROM jobs WHERE tender_id = ? AND state = 'collected'",
+                             [(tender_id,) for tender_id in tender_ids])
+
+    def restore(self) -> int:
+        """Повернути результати, не підтверджені попереднім запуском координатора"""
+        with self._lock:
+            return self._conn.execute("UPDATE jobs SET state = 'done' WHERE state = 'collected'").rowcount
+
+    def counts(self) -> Dict[str, int]:
+        """Кількість завдань за станом"""
+        with self._lock:
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'collected': 0}
+        counts.update(rows)
+        return counts
+
+
+def process_job(api, tender_id: str, date_modified: Optional[str], track: Optional[str]) -> Dict:
+    """
+    Завантажити деталі й перевірити тендер (як етап деталей конвеєра).
+    Результат - JSON-сумісний словник для координатора
+    """
+    from src.pipeline import evaluate_details
+
+    try:
+        details = api.fetch_tender_details(tender_id, date_modified)
+    except requests.exceptions.RequestException:
+        return {'failed': True}
+
+    stats = {}
+    record, matched, changed = evaluate_details(api, tender_id, details, track, stats)
+    result = {'failed': False, 'matched': matched, 'changed': changed, 'stats': stats}
+    if matched or changed:
+        result['record'] = record.to_dict()
+    if details:
+        result['document'] = search_index.document(details)
+    return result
+
+
+def worker_name() -> str:
+    """Ім'я виконавця: вузол і PID"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def run_worker(queue: WorkQueue, api=None, batch: Optional[int] = None, poll_seconds: float = 0.2,
+               stop: Optional[threading.Event] = None, idle_exit: Optional[float] = None) -> int:
+    """
+    Цикл виконавця: брати завдання пачками, обробляти паралельно
+    (PROZORRO_MAX_CONCURRENCY запитів) і повертати результати.
+    idle_exit - завершитися після стількох секунд без завдань (None - працювати до stop).
+    Повертає кількість оброблених завдань
+    """
+    if api is None:
+        from src.prozorro_api import ProzorroAPI
+        api = ProzorroAPI()
+    name = worker_name()
+    batch = batch or max(1, api.max_concurrency) * 4
+    processed = 0
+    idle_since = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=max(1, api.max_concurrency)) as executor:
+        while stop is None or not stop.is_set():
+            jobs = queue.lease(name, batch)
+            if not jobs:
+                if idle_exit is not None and time.monotonic() - idle_since >= idle_exit:
+                    break
+                time.sleep(poll_seconds)
+                continue
+
+            outcomes = executor.map(lambda job: process_job(api, *job[1:]), jobs)
+            results = [(job[0], job[1], outcome) for job, outcome in zip(jobs, outcomes)]
+            accepted = queue.complete(results)
+            for _, _, outcome in results:
+                metrics.WORKER_JOBS.inc(result='failed' if outcome['failed'] else 'done')
+            if accepted < len(results):
+                metrics.WORKER_JOBS.inc(len(results) - accepted, result='stale')
+            processed += len(results)
+            idle_since = time.monotonic()
+    return processed
+
+
+def _worker_process(path: str, lease_seconds: float):
+    """Точка входу окремого процесу-виконавця"""
+    queue = WorkQueue(path, lease_seconds=lease_seconds)
+    try:
+        run_worker(queue)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        queue.close()
+
+
+def run_workers(processes: int, queue: Optional[WorkQueue] = None):
+    """Запустити processes процесів-виконавців і чекати їх завершення (Ctrl+C)"""
+    queue = queue or WorkQueue.from_env()
+    if queue is None:
+        raise ValueError("Не задано WORK_QUEUE_PATH")
+    print(f"👷 Виконавців: {processes}, черга: {queue.path}")
+    children = [
+        multiprocessing.Process(target=_worker_process, args=(queue.path, queue.lease_seconds),
+                                name=f'worker-{number}')
+        for number in range(processes)
+    ]
+    for child in children:
+        child.start()
+    try:
+        for child in children:
+            child.join()
+    except KeyboardInterrupt:
+        print("\n⏹ Зупинка виконавців")
+        for child in children:
+            child.join(timeout=10)
@@ -0,0 +1,75 @@
+"""
+Тести для модуля backfill
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+from benchmarks.stub_server import StubServer, build_tenders
+from src.backfill import Backfill, split_range
+from src.data_storage import DataStorage
+from src.search_index import SearchIndex
+from src.subscriptions import Subscription
+
+
+def test_split_range_covers_whole_period():
+    """Шарди йдуть впритул і покривають весь період"""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    shards = split_range(start, start + timedelta(days=4), 4)
+
+    assert len(shards) == 4
+    assert shards[0][0] == start.timestamp()
+    assert shards[-1][1] == (start + timedelta(days=4)).timestamp()
+    assert all(shards[i][1] == shards[i + 1][0] for i in range(3))
+
+    with pytest.raises(ValueError):
+        split_range(start, start, 2)
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Stub Prozorro, на який спрямовано процеси backfill"""
+    with StubServer(build_tenders(60), page_size=10) as server:
+        for key, value in {
+            'PROZORRO_API_URL': server.api_url,
+            'PROZORRO_REQUEST_INTERVAL': '0',
+            'DETAIL_CACHE_DIR': '',
+            'MATCH_RULES_FILE': '',
+        }.items():
+            monkeypatch.setenv(key, value)
+        yield server
+
+
+def test_backfill_stores_matches_without_notifications(stub, tmp_path):
+    """Знайдені тендери позначаються обробленими, сповіщення не надсилаються"""
+    storage = DataStorage(str(tmp_path / 'processed_tenders.json'))
+    index = SearchIndex(str(tmp_path / 'search.db'))
+    now = datetime.now(timezone.utc)
+
+    state = Backfill(storage, [Subscription('default')], workers=2, shards=3, chunk_pages=1,
+                     search_index=index).run(now - timedelta(hours=1), now + timedelta(minutes=1))
+
+    assert state['completed']
+    assert state['scanned'] == 60
+    assert storage.get_processed_count() == 4
+    assert stub.messages == []
+    # Переглянуті тендери потрапляють у пошуковий індекс, записує головний процес
+    assert index.count() == 60
+    index.close()
+
+
+def test_backfill_resumes_from_checkpoint(stub, tmp_path):
+    """Повторний запуск продовжує лише незавершені шарди"""
+    storage = DataStorage(str(tmp_path / 'processed_tenders.json'))
+    now = datetime.now(timezone.utc)
+    date_from, date_to = now - timedelta(hours=1), now + timedelta(minutes=1)
+
+    backfill = Backfill(storage, [Subscription('default')], workers=1, shards=2)
+    state = backfill._load_state(date_from, date_to)
+    state['shards'][-1]['done'] = True
+    storage.set_state(Backfill.STATE_KEY, state)
+
+    state = backfill.run(date_from, date_to)
+
+    # Усі тендери stub - в останні хвилини, тобто в уже завершеному шарді
+    assert state['completed']
+    assert state['scanned'] == 0
+    assert stub.requests['feed'] == 1
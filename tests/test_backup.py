@@ -0,0 +1,113 @@
+"""
+Тести для модуля backup
+"""
+import json
+import uuid
+import pytest
+from datetime import datetime, timedelta
+from src import backup
+from src.data_storage import DataStorage
+from src.sqlite_storage import SQLiteStorage
+
+
+def make_data(count=3):
+    """Дані у форматі JSON-сховища з hex- і довільними ID та простором імен"""
+    now = datetime.now().replace(microsecond=0)
+    processed = {uuid.uuid4().hex: (now - timedelta(hours=i)).isoformat() for i in range(count)}
+    processed["legacy-id"] = now.isoformat()
+    return {
+        "processed_tenders": processed,
+        "namespaces": {"legal": {uuid.uuid4().hex: now.isoformat()}},
+        "last_check": now.isoformat(),
+        "state": {"feed_cursor": {"offset": "1700000000.5", "updated_at": now.isoformat()}},
+    }
+
+
+def test_round_trip():
+    """encode/decode зберігають ID, дати з точністю до секунди, простори імен і стан"""
+    data = make_data()
+    text = backup.encode(data)
+
+    assert text.startswith(backup.PREFIX)
+    assert backup.decode(text) == data
+
+
+def test_decode_accepts_legacy_json():
+    assert backup.decode('{"processed_tenders": {"a": "2024-01-01T00:00:00"}}') == {
+        "processed_tenders": {"a": "2024-01-01T00:00:00"}
+    }
+
+
+def test_decode_rejects_corrupted_backup():
+    text = backup.encode(make_data())
+    with pytest.raises(ValueError):
+        backup.decode(text[:len(text) // 2])
+
+
+def test_backup_is_much_smaller_than_json():
+    """hex-ID займає 16 байт, дата - кілька байт varint"""
+    data = make_data(20000)
+    compact = backup.encode(data)
+
+    assert len(compact) < len(json.dumps(data, separators=(',', ':'))) / 2
+    assert len(compact) / 20000 < 30
+
+
+def test_export_import_between_backends(tmp_path):
+    """Потоковий експорт з JSON-сховища та імпорт у SQLite"""
+    source = DataStorage(str(tmp_path / "processed_tenders.json"))
+    source.mark_many([uuid.uuid4().hex for _ in range(2500)])
+    source.mark_as_processed("other", namespace="legal")
+    source.set_state("feed_cursor", {"offset": "1"})
+
+    path = tmp_path / "backup.txt"
+    with open(path, "w", encoding="ascii") as f:
+        assert backup.export_storage(source, f) == 2501
+
+    target = SQLiteStorage(str(tmp_path / "tenders.db"), json_path=None)
+    with open(path, "r", encoding="utf-8") as f:
+        assert backup.import_storage(target, f, batch_size=1000) == 2501
+
+    assert sorted(target.get_processed_ids()) == sorted(source.get_processed_ids())
+    assert target.is_processed("other", namespace="legal")
+    assert target.get_state("feed_cursor") == {"offset": "1"}
+
+    # Повторний імпорт нічого не додає
+    with open(path, "r", encoding="utf-8") as f:
+        assert backup.import_storage(target, f) == 0
+    target.close()
+
+
+def test_storage_restores_compact_env_backup(tmp_path, monkeypatch):
+    """Порожнє JSON-сховище відновлюється з компактного PROCESSED_TENDERS_BACKUP"""
+    data = make_data()
+    monkeypatch.setenv("PROCESSED_TENDERS_BACKUP", backup.encode(data))
+
+    storage = DataStorage(str(tmp_path / "processed_tenders.json"))
+
+    assert sorted(storage.get_processed_ids()) == sorted(data["processed_tenders"])
+    assert storage.get_processed_count("legal") == 1
+
+
+def test_cli_export_to_stdout_imports_back(tmp_path, monkeypatch, capsys):
+    """backup export у stdout містить лише backup, навіть якщо сховище відновлювалось з env"""
+    import main
+
+    data = make_data()
+    monkeypatch.setenv("STORAGE_BACKEND", "json")
+    monkeypatch.setenv("STORAGE_PATH", str(tmp_path / "source.json"))
+    monkeypatch.setenv("PROCESSED_TENDERS_BACKUP", backup.encode(data))
+    main.run_backup(["export"])
+    captured = capsys.readouterr()
+    assert captured.out.startswith(backup.PREFIX)
+    assert "Відновлено" in captured.err
+
+    path = tmp_path / "backup.txt"
+    path.write_text(captured.out, encoding="ascii")
+    monkeypatch.setenv("STORAGE_PATH", str(tmp_path / "target.json"))
+    monkeypatch.delenv("PROCESSED_TENDERS_BACKUP")
+    main.run_backup(["import", str(path)])
+
+    target = DataStorage(str(tmp_path / "target.json"))
+    assert sorted(target.get_processed_ids()) == sorted(data["processed_tenders"])
+    assert target.get_processed_count("legal") == 1
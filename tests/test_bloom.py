@@ -0,0 +1,87 @@
+"""
+Тести для модуля bloom
+"""
+import sqlite3
+from datetime import datetime, timedelta
+from src import metrics
+from src.bloom import BloomFilter, key
+from src.data_storage import DataStorage
+from src.sqlite_storage import SQLiteStorage
+
+
+def test_filter_persists_without_false_negatives(tmp_path):
+    """Усі додані ключі є у фільтрі і після повторного відкриття файлу"""
+    path = str(tmp_path / 'processed.bloom')
+    items = [key('', f'tender-{i}') for i in range(5000)]
+    bloom = BloomFilter.build(path, items[:4000], 4000)
+    for item in items[4000:]:
+        bloom.add(item)
+    bloom.count = 5000
+    bloom.close()
+
+    bloom = BloomFilter.open(path)
+    assert bloom.count == 5000
+    assert all(item in bloom for item in items)
+    false_positives = sum(key('', f'other-{i}') in bloom for i in range(5000))
+    assert false_positives < 50
+    assert bloom.false_positive_rate() < 0.01
+    bloom.close()
+
+    (tmp_path / 'broken.bloom').write_bytes(b'PTBF')
+    assert BloomFilter.open(str(tmp_path / 'broken.bloom')) is None
+
+
+def test_json_storage_answers_new_tenders_from_filter(tmp_path):
+    """Новий тендер відсікається фільтром, позначки та простори імен враховуються"""
+    storage = DataStorage(str(tmp_path / 'processed_tenders.json'), use_bloom=True)
+    storage.mark_many(['tender-1', 'tender-2'])
+    storage.mark_as_processed('tender-3', 'legal')
+    negative = metrics.BLOOM_CHECKS.get(backend='json', result='negative')
+
+    assert storage.is_processed('tender-1')
+    assert storage.is_processed('tender-3', 'legal')
+    assert not storage.is_processed('tender-3')
+    assert not storage.is_processed('tender-4')
+    assert metrics.BLOOM_CHECKS.get(backend='json', result='negative') >= negative + 1
+
+    storage.flush()
+    reopened = DataStorage(str(tmp_path / 'processed_tenders.json'), use_bloom=True)
+    assert reopened.is_processed('tender-2')
+    assert reopened._current_bloom().count == 3
+
+
+def test_cleanup_rebuilds_filter(tmp_path):
+    """Після очищення історії фільтр будується заново з решти записів"""
+    storage = DataStorage(str(tmp_path / 'processed_tenders.json'), use_bloom=True)
+    storage.import_processed([('', 'old', (datetime.now() - timedelta(days=100)).timestamp())])
+    storage.mark_as_processed('new')
+    assert storage.is_processed('old')
+
+    storage.cleanup_old_tenders(days=90)
+
+    assert not storage.is_processed('old')
+    assert storage.is_processed('new')
+    assert storage._current_bloom().count == 1
+    assert key('', 'old') not in storage._current_bloom()
+
+
+def test_sqlite_filter_follows_other_connections(tmp_path):
+    """Записи, додані іншим з'єднанням, не губляться через застарілий фільтр"""
+    db_path = str(tmp_path / 'tenders.db')
+    storage = SQLiteStorage(db_path, json_path=None, use_bloom=True)
+    storage.BLOOM_SYNC_SECONDS = 0
+    storage.mark_many(['tender-1'])
+    assert storage.is_processed('tender-1')
+    assert not storage.is_processed('tender-2')
+
+    other = sqlite3.connect(db_path)
+    with other:
+        other.execute("INSERT INTO processed (namespace, tender_id, processed_at) VALUES ('', 'tender-2', 0)")
+    other.close()
+
+    assert storage.is_processed('tender-2')
+
+    storage.cleanup_old_tenders(days=90)
+    assert not storage.is_processed('tender-2')
+    assert storage.is_processed('tender-1')
+    storage.close()
@@ -0,0 +1,71 @@
+"""
+Наскрізний тест перевірки на локальному stub Prozorro та Telegram
+"""
+import asyncio
+import pytest
+from benchmarks.stub_server import StubServer, build_tenders
+from src import metrics
+from src.scheduler import TenderMonitor
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    """Stub-сервер і середовище монітора, спрямоване на нього"""
+    with StubServer(build_tenders(60), page_size=25) as server:
+        env = {
+            'PROZORRO_API_URL': server.api_url,
+            'PROZORRO_REQUEST_INTERVAL': '0',
+            'TELEGRAM_API_URL': server.base_url,
+            'TELEGRAM_BOT_TOKEN': 'test',
+            'TELEGRAM_CHAT_ID': '1',
+            'TELEGRAM_RATE_PER_MINUTE': '60000',
+            'TELEGRAM_DIGEST': '0',
+            'DETAIL_CACHE_DIR': '',
+            'FEED_MODE': 'incremental',
+            'STORAGE_BACKEND': 'json',
+            'STORAGE_PATH': str(tmp_path / 'processed_tenders.json'),
+            'MATCH_RULES_FILE': '',
+            'SUBSCRIPTIONS_FILE': '',
+            'PROCESSED_TENDERS_BACKUP': '',
+            'SEARCH_INDEX_PATH': str(tmp_path / 'search.db'),
+        }
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        yield server
+
+
+def test_check_run_notifies_each_match_once(stub):
+    """Перевірка надсилає кожен знайдений тендер один раз, повторна - нічого"""
+    metrics.REGISTRY.clear()
+    monitor = TenderMonitor()
+    monitor.check_new_tenders()
+
+    # Кожен 10-й тендер - на переклад, але кожен 3-й з них - reporting
+    assert len(stub.messages) == 4
+    assert stub.requests['feed'] == 4
+
+    assert metrics.HTTP_REQUESTS.get(endpoint='feed', status=200) == 4
+    assert metrics.TENDERS.get(stage='sent') == 4
+    assert metrics.TELEGRAM_MESSAGES.get(result='sent') == 4
+    assert metrics.RUNS.get(result='success') == 1
+    assert metrics.STAGE_SECONDS.get_count(stage='detail') == stub.requests['detail']
+
+    stub.reset_stats()
+    TenderMonitor().check_new_tenders()
+
+    assert stub.messages == []
+    assert stub.requests['detail'] == 0
+
+
+def test_tail_notifies_and_follows_cursor(stub, monkeypatch):
+    """Режим tail відправляє знахідки одразу і далі читає стрічку від курсора"""
+    monkeypatch.setenv('TAIL_MIN_INTERVAL', '0')
+    monkeypatch.setenv('TAIL_MAX_INTERVAL', '0')
+    metrics.REGISTRY.clear()
+    monitor = TenderMonitor()
+    asyncio.run(monitor.run_tail_async(max_polls=2))
+
+    assert len(stub.messages) == 4
+    assert metrics.RUNS.get(result='success') == 2
+    assert metrics.NOTIFY_LATENCY.get_count() == 4
+    assert monitor._load_feed_cursor() is not None
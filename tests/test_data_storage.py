@@ -76,4 +76,87 @@ class TestDataStorage:
         self.storage.cleanup_old_tenders(days=90)
         
         assert self.storage.is_processed("old-tender") == False
-        assert self.storage.is_processed("new-tender") == True
\ No newline at end of file
+        assert self.storage.is_processed("new-tender") == True
+    
+    def test_state_roundtrip(self):
+        """Службовий стан зберігається між екземплярами сховища"""
+        assert self.storage.get_state("feed_cursor") is None
+        
+        self.storage.set_state("feed_cursor", {"offset": "1700000000.5"})
+        
+        reopened = DataStorage(filepath=self.temp_file)
+        assert reopened.get_state("feed_cursor") == {"offset": "1700000000.5"}
+    
+    def test_marks_are_batched_until_flush(self):
+        """Позначки пишуться на диск пачкою при flush()"""
+        storage = DataStorage(filepath=self.temp_file, flush_every=100)
+        storage.mark_as_processed("tender-1")
+        storage.mark_as_processed("tender-2")
+        
+        with open(self.temp_file, encoding='utf-8') as f:
+            assert json.load(f)["processed_tenders"] == {}
+        
+        storage.flush()
+        
+        reopened = DataStorage(filepath=self.temp_file)
+        assert reopened.get_processed_count() == 2
+    
+    def test_backup_is_printed_on_flush_only(self, capsys):
+        """Backup виводиться один раз при flush(), велика історія - лише підказкою"""
+        storage = DataStorage(filepath=self.temp_file, flush_every=2)
+        storage.mark_many([f"tender-{i}" for i in range(10)])
+        assert "Backup" not in capsys.readouterr().out
+        
+        storage.flush()
+        assert capsys.readouterr().out.count("PTB1:") == 1
+        storage.flush()
+        assert capsys.readouterr().out == ""
+        
+        storage.mark_many([f"bulk-{i}" for i in range(500)])
+        storage.flush()
+        output = capsys.readouterr().out
+        assert "PTB1:" not in output and "backup export" in output
+    
+    def test_flush_every_n_marks(self):
+        """Після flush_every позначок дані записуються автоматично"""
+        storage = DataStorage(filepath=self.temp_file, flush_every=2)
+        storage.mark_as_processed("tender-1")
+        storage.mark_as_processed("tender-2")
+        
+        reopened = DataStorage(filepath=self.temp_file)
+        assert reopened.is_processed("tender-2") == True
+    
+    def test_flush_every_zero_writes_each_mark(self, monkeypatch):
+        """Явне flush_every=0 не замінюється значенням із середовища"""
+        monkeypatch.setenv('STORAGE_FLUSH_EVERY', '100')
+        storage = DataStorage(filepath=self.temp_file, flush_every=0)
+        storage.mark_as_processed("tender-1")
+        
+        reopened = DataStorage(filepath=self.temp_file)
+        assert reopened.is_processed("tender-1") == True
+    
+    def test_save_leaves_no_temp_files(self):
+        """Атомарний запис не залишає тимчасових файлів"""
+        self.storage.mark_as_processed("tender-1")
+        self.storage.flush()
+        
+        assert os.listdir(self.temp_dir) == ["test_tenders.json"]
+    
+    def test_namespaces_are_independent(self):
+        """Історія підписок ведеться окремо від основної"""
+        self.storage.mark_as_processed("tender-1", namespace="clients")
+        
+        assert self.storage.is_processed("tender-1", namespace="clients") == True
+        assert self.storage.is_processed("tender-1") == False
+        assert self.storage.get_processed_count("clients") == 1
+    
+    def test_file_is_opened_on_first_access(self, monkeypatch):
+        """Конструктор не читає файл і backup: це відбувається при першому зверненні"""
+        monkeypatch.setenv("PROCESSED_TENDERS_BACKUP", json.dumps({"processed_tenders": {"old": "2026-01-01T00:00:00"}}))
+        path = os.path.join(self.temp_dir, "lazy.json")
+        storage = DataStorage(filepath=path)
+        assert not os.path.exists(path)
+        
+        assert storage.is_processed("old") == True
+        assert os.path.exists(path)
+        os.remove(path)
@@ -0,0 +1,147 @@
+"""
+Тести для модуля delivery_queue
+"""
+import pytest
+import os
+import shutil
+import tempfile
+from src.data_storage import DataStorage
+from src.delivery_queue import DeliveryQueue, TokenBucket
+
+
+class FakeNotifier:
+    """Замінник TelegramNotifier, що записує відправлені тексти"""
+    
+    MAX_MESSAGE_LENGTH = 4096
+    
+    def __init__(self, responses=None):
+        self.chat_id = "123"
+        self.sent = []
+        self.responses = list(responses or [])
+    
+    def format_tender_message(self, tender):
+        return f"Тендер {tender['id']}"
+    
+    def format_change_message(self, tender, changes):
+        return f"Зміни {tender['id']}"
+    
+    def send_message(self, text):
+        result = self.responses.pop(0) if self.responses else (True, None)
+        if result[0]:
+            self.sent.append(text)
+        return result
+
+
+class TestDeliveryQueue:
+    """Тести для DeliveryQueue"""
+    
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = DataStorage(filepath=os.path.join(self.temp_dir, "tenders.json"))
+    
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def make_queue(self, notifier, digest=False):
+        queue = DeliveryQueue(notifier, self.storage, digest=digest)
+        queue.limiter = TokenBucket(rate=1000, capacity=1000)
+        return queue
+    
+    def test_delivers_and_marks_processed(self):
+        """Доставлені тендери позначаються як оброблені"""
+        notifier = FakeNotifier()
+        queue = self.make_queue(notifier)
+        queue.enqueue({"id": "a"})
+        queue.enqueue({"id": "b"})
+        
+        assert queue.deliver() == 2
+        assert len(notifier.sent) == 2
+        assert self.storage.is_processed("a") and self.storage.is_processed("b")
+    
+    def test_digest_packs_tenders_into_one_message(self):
+        """У режимі дайджесту кілька тендерів йдуть одним повідомленням"""
+        notifier = FakeNotifier()
+        queue = self.make_queue(notifier, digest=True)
+        for tender_id in ("a", "b", "c"):
+            queue.enqueue({"id": tender_id})
+        
+        assert queue.deliver() == 3
+        assert len(notifier.sent) == 1
+        assert "Тендер c" in notifier.sent[0]
+    
+    def test_failed_message_is_retried_next_run(self):
+        """Невдале повідомлення зберігається і відправляється наступного разу"""
+        queue = self.make_queue(FakeNotifier(responses=[(False, None)]))
+        queue.enqueue({"id": "a"})
+        
+        assert queue.deliver() == 0
+        assert self.storage.is_processed("a") == False
+        
+        next_run = self.make_queue(FakeNotifier())
+        assert next_run.pending_ids() == {"a"}
+        assert next_run.deliver() == 1
+        assert self.storage.is_processed("a") == True
+        assert next_run.pending_ids() == set()
+    
+    def test_respects_retry_after(self):
+        """Після 429 з retry_after повідомлення відправляється повторно"""
+        notifier = FakeNotifier(responses=[(False, 0.01), (True, None)])
+        queue = self.make_queue(notifier)
+        queue.enqueue({"id": "a"})
+        
+        assert queue.deliver() == 1
+        assert len(notifier.sent) == 1
+    
+    def test_deliver_without_pending_keeps_stored_messages(self):
+        """include_pending=False не чіпає і не втрачає повідомлення минулих запусків"""
+        failing = self.make_queue(FakeNotifier(responses=[(False, None)]))
+        failing.enqueue({"id": "a"})
+        failing.deliver()
+        
+        notifier = FakeNotifier(responses=[(False, None)])
+        queue = self.make_queue(notifier)
+        queue.enqueue({"id": "b"})
+        
+        assert queue.deliver(include_pending=False) == 0
+        assert queue.pending_ids() == {"a", "b"}
+    
+    def test_enqueue_is_idempotent(self):
+        """Повторний enqueue того самого сповіщення не створює дубля"""
+        notifier = FakeNotifier()
+        queue = self.make_queue(notifier)
+        assert queue.enqueue({"id": "a"}) == True
+        assert queue.enqueue({"id": "a"}) == False
+        assert self.make_queue(notifier).enqueue({"id": "a"}) == False
+        # Сповіщення про зміну - окремий ключ (за відбитком відстежуваних полів)
+        assert queue.enqueue({"id": "a", "status": "active"}, [("status", None, "active")]) == True
+        
+        assert queue.deliver() == 2
+        assert notifier.sent == ["Тендер a", "Зміни a"]
+    
+    def test_crash_after_send_does_not_duplicate(self):
+        """Після падіння відправлене не повторюється, а невідправлене - не губиться"""
+        notifier = FakeNotifier()
+        queue = self.make_queue(notifier)
+        queue.enqueue({"id": "a"})
+        queue.enqueue({"id": "b"})
+        first, second = queue.take()
+        queue.finish(first, queue.send(first))
+        # Процес упав до відправки другого: новий екземпляр сховища з диска
+        self.storage = DataStorage(filepath=self.storage.filepath)
+        
+        next_run = self.make_queue(notifier)
+        assert next_run.pending_ids() == {"b"}
+        assert next_run.deliver() == 1
+        assert notifier.sent == ["Тендер a", "Тендер b"]
+        assert self.storage.is_processed("a") and self.storage.is_processed("b")
+    
+    def test_migrates_pending_notifications(self):
+        """Невідправлені повідомлення старого формату переносяться в outbox"""
+        self.storage.set_state(DeliveryQueue.PENDING_KEY, [{"tender_ids": ["a", "b"], "text": "Дайджест"}])
+        notifier = FakeNotifier()
+        queue = self.make_queue(notifier)
+        
+        assert self.storage.get_state(DeliveryQueue.PENDING_KEY) == []
+        assert queue.pending_ids() == {"a", "b"}
+        assert queue.deliver() == 2
+        assert notifier.sent == ["Дайджест"]
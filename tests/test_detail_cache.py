@@ -0,0 +1,62 @@
+"""
+Тести для модуля detail_cache
+"""
+import pytest
+import os
+import shutil
+import tempfile
+import time
+from src.detail_cache import DetailCache
+
+
+class TestDetailCache:
+    """Тести для DetailCache"""
+    
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, "cache")
+    
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_hit_when_date_modified_matches(self):
+        """Копія з тим самим dateModified повертається з кешу"""
+        cache = DetailCache(self.cache_dir)
+        cache.put("t1", "2026-01-01T10:00:00", {"title": "Переклад"})
+        
+        assert cache.get("t1", "2026-01-01T10:00:00") == {"title": "Переклад"}
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["bytes_saved"] > 0
+    
+    def test_miss_when_tender_changed(self):
+        """Змінений тендер (новий dateModified) - промах"""
+        cache = DetailCache(self.cache_dir)
+        cache.put("t1", "2026-01-01T10:00:00", {"title": "Переклад"})
+        
+        assert cache.get("t1", "2026-01-02T10:00:00") is None
+        assert cache.get("t2", "2026-01-01T10:00:00") is None
+        assert cache.stats()["misses"] == 2
+    
+    def test_ttl_expiry(self):
+        """Прострочений запис не повертається і видаляється при старті"""
+        cache = DetailCache(self.cache_dir, ttl_seconds=60)
+        cache.put("t1", "d1", {"title": "x"})
+        old = time.time() - 120
+        os.utime(os.path.join(self.cache_dir, "t1.json"), (old, old))
+        
+        assert cache.get("t1", "d1") is None
+        assert DetailCache(self.cache_dir, ttl_seconds=60).stats()["entries"] == 0
+    
+    def test_evicts_least_recently_used(self):
+        """При перевищенні ліміту витісняється найдавніше використаний запис"""
+        cache = DetailCache(self.cache_dir, max_bytes=250)
+        cache.put("t1", "d", {"text": "a" * 50})
+        time.sleep(0.01)
+        cache.put("t2", "d", {"text": "b" * 50})
+        time.sleep(0.01)
+        cache.get("t1", "d")
+        cache.put("t3", "d", {"text": "c" * 50})
+        
+        assert cache.get("t2", "d") is None
+        assert cache.get("t1", "d") is not None
+        assert cache.get("t3", "d") is not None
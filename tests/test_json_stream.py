@@ -0,0 +1,84 @@
+"""
+Тести для модуля json_stream
+"""
+import io
+import json
+import pytest
+from src import json_stream
+
+
+class StreamResponse:
+    """Відповідь з тілом у raw, як у requests з stream=True"""
+
+    def __init__(self, payload):
+        self.raw = io.BytesIO(json.dumps(payload).encode('utf-8'))
+        self._payload = payload
+        self.closed = False
+
+    def json(self):
+        return self._payload
+
+    def close(self):
+        self.closed = True
+
+
+DETAILS = {
+    "data": {
+        "id": "a",
+        "title": "Послуги перекладу",
+        "value": {"amount": 1500.5, "currency": "UAH"},
+        "documents": [{"url": "x" * 1000}] * 10,
+        "bids": [{"id": "b", "value": {"amount": 1}}],
+        "items": [{"classification": {"id": "79530000-8"}}],
+    }
+}
+
+
+@pytest.fixture(params=['stream', 'json'])
+def mode(request, monkeypatch):
+    """Обидва шляхи: потоковий (ijson) і response.json()"""
+    if request.param == 'stream':
+        pytest.importorskip('ijson')
+    else:
+        monkeypatch.setattr(json_stream, 'ijson', None)
+    return request.param
+
+
+def test_read_details_keeps_only_requested_fields(mode):
+    """Великі масиви (documents, bids) не потрапляють у результат"""
+    response = StreamResponse(DETAILS)
+    details = json_stream.read_details(response, {'id', 'title', 'value', 'items'})
+
+    assert details == {
+        "id": "a",
+        "title": "Послуги перекладу",
+        "value": {"amount": 1500.5, "currency": "UAH"},
+        "items": [{"classification": {"id": "79530000-8"}}],
+    }
+    assert isinstance(details['value']['amount'], float)
+    assert response.closed == (mode == 'stream')
+
+
+def test_read_details_projects_documents(mode):
+    """Від документів лишаються лише ID та дата зміни, вкладені поля теж відкидаються"""
+    document = {"id": "d1", "url": "x" * 1000, "dateModified": "2024-01-01T00:00:00",
+                "author": {"name": "a", "documents": [{"id": "nested"}]}}
+    details = json_stream.read_details(StreamResponse({"data": {"id": "a", "documents": [document] * 3}}))
+
+    assert details == {"id": "a", "documents": [{"id": "d1", "dateModified": "2024-01-01T00:00:00"}] * 3}
+
+
+def test_read_details_without_data(mode):
+    assert json_stream.read_details(StreamResponse({"data": None})) is None
+
+
+def test_read_feed_page(mode):
+    """Елементи сторінки та курсор наступної"""
+    payload = {
+        "data": [{"id": "a", "dateModified": "2024-01-01T00:00:00"}, {"id": "b", "status": "active"}],
+        "next_page": {"offset": "1704067200.0", "path": "/tenders?offset=1704067200.0"},
+    }
+    tenders, offset = json_stream.read_feed_page(StreamResponse(payload))
+
+    assert tenders == payload["data"]
+    assert offset == "1704067200.0"
@@ -0,0 +1,94 @@
+"""
+Тести для модуля matching
+"""
+import pytest
+import json
+import os
+import tempfile
+from src.matching import MatchEngine, MatchRule
+
+
+def make_tender(title="", cpv="", status="active.tendering", proc_type="aboveThreshold", **extra):
+    """Мінімальний тендер для перевірки правил"""
+    tender = {
+        "title": title,
+        "status": status,
+        "procurementMethodType": proc_type,
+        "items": [{"classification": {"id": cpv}}] if cpv else [],
+    }
+    tender.update(extra)
+    return tender
+
+
+class TestMatchEngine:
+    """Тести для MatchEngine"""
+    
+    def setup_method(self):
+        self.engine = MatchEngine([
+            MatchRule("translation", cpv_prefixes=["79530000"], keywords=[["письмов", "переклад"], ["^переклад"]]),
+            MatchRule("interpretation", cpv_prefixes=["7954"], keywords=[["усн", "переклад"]], exclude=["жестов"]),
+            MatchRule("editing", keywords=[["редагуванн"]], keyword_fields=["title", "description"],
+                      procedure_types=["competitiveOrdering"]),
+        ])
+    
+    def test_finds_overlapping_terms(self):
+        """Терміни-підрядки знаходяться разом з довшими термінами"""
+        engine = MatchEngine([MatchRule("r", keywords=[["переклад"], ["перекладу"], ["клад"]])])
+        assert engine.find_terms("Послуги перекладу") == {"переклад", "перекладу", "клад"}
+    
+    def test_cpv_prefix_trie(self):
+        """CPV-коди звіряються з префіксами всіх правил"""
+        assert self.engine.match_cpv(["79530000-8"]) == {"translation"}
+        assert self.engine.match_cpv(["79540000-1", "45000000-7"]) == {"interpretation"}
+        assert self.engine.match_cpv(["7953"]) == set()
+    
+    def test_evaluate_reports_all_matched_rules(self):
+        """Один прохід повертає всі правила, що збіглися"""
+        result = self.engine.evaluate(make_tender("Усний та письмовий переклад", cpv="79530000-8"))
+        
+        assert result.matched == {"translation": "CPV", "interpretation": "title"}
+    
+    def test_exclude_vetoes_rule(self):
+        """Виключне слово скасовує правило навіть за збігу CPV"""
+        result = self.engine.evaluate(make_tender("Усний жестовий переклад", cpv="79540000-1"))
+        
+        assert "interpretation" not in result.matched
+    
+    def test_anchored_term(self):
+        """'^термін' збігається лише на початку назви"""
+        assert self.engine.match_text("Переклад документів") == {"translation"}
+        assert self.engine.match_text("Документи на переклад") == set()
+    
+    def test_procedure_type_and_status_per_rule(self):
+        """Тип процедури та статус перевіряються для кожного правила окремо"""
+        editing = make_tender("Послуги", description="Редагування текстів", proc_type="competitiveOrdering")
+        assert self.engine.evaluate(editing).matched == {"editing": "title"}
+        
+        closed = make_tender("Письмовий переклад", status="complete")
+        result = self.engine.evaluate(closed)
+        assert result.by_title == {"translation"}
+        assert result.matched == {}
+    
+    def test_accepts_feed_item(self):
+        """Елемент стрічки відсіюється, лише якщо жодне правило його не приймає"""
+        assert self.engine.accepts_feed_item({"procurementMethodType": "competitiveOrdering"}) == True
+        assert self.engine.accepts_feed_item({"procurementMethodType": "reporting"}) == False
+        assert self.engine.accepts_feed_item({}) == True
+    
+    def test_load_from_file(self):
+        """Правила завантажуються з JSON-файлу"""
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+            json.dump({"rules": [{"name": "r1", "cpv_prefixes": ["79"], "keywords": [["тест"]]}]}, f)
+        try:
+            engine = MatchEngine.load(f.name)
+        finally:
+            os.remove(f.name)
+        
+        assert [rule.name for rule in engine.rules] == ["r1"]
+        assert engine.match_cpv(["79999999-0"]) == {"r1"}
+    
+    def test_example_config_is_valid(self):
+        """Приклад конфігурації з репозиторію завантажується"""
+        path = os.path.join(os.path.dirname(__file__), "..", "config", "match_rules.example.json")
+        engine = MatchEngine.load(path)
+        assert len(engine.rules) == 3
@@ -0,0 +1,80 @@
+"""
+Тести для модуля metrics
+"""
+import pytest
+import requests
+from src.metrics import Registry, start_metrics_server
+
+
+class TestRegistry:
+    """Тести для реєстру метрик"""
+
+    def setup_method(self):
+        self.registry = Registry()
+
+    def test_counter_with_labels(self):
+        """Лічильник рахує окремо для кожного набору міток"""
+        counter = self.registry.counter('requests_total', 'Запити', ('status',))
+        counter.inc(status=200)
+        counter.inc(2, status=200)
+        counter.inc(status=500)
+
+        text = self.registry.render()
+        assert '# TYPE requests_total counter' in text
+        assert 'requests_total{status="200"} 3.0' in text
+        assert 'requests_total{status="500"} 1.0' in text
+
+    def test_rejects_wrong_labels(self):
+        """Неправильні мітки - помилка, а не мовчазна нова серія"""
+        counter = self.registry.counter('requests_total', 'Запити', ('status',))
+        with pytest.raises(ValueError):
+            counter.inc(code=200)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Кошики гістограми накопичувальні, є _sum і _count"""
+        histogram = self.registry.histogram('op_seconds', 'Операції', buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        text = self.registry.render()
+        assert 'op_seconds_bucket{le="0.1"} 1' in text
+        assert 'op_seconds_bucket{le="1.0"} 2' in text
+        assert 'op_seconds_bucket{le="+Inf"} 3' in text
+        assert 'op_seconds_sum 5.55' in text
+        assert 'op_seconds_count 3' in text
+
+    def test_gauge_keeps_last_value(self):
+        """Датчик зберігає останнє значення"""
+        gauge = self.registry.gauge('last_run_seconds', 'Остання перевірка')
+        gauge.set(10)
+        gauge.set(2.5)
+        assert 'last_run_seconds 2.5' in self.registry.render()
+
+    def test_duplicate_name_rejected(self):
+        """Одна назва - одна метрика"""
+        self.registry.counter('a_total', 'A')
+        with pytest.raises(ValueError):
+            self.registry.gauge('a_total', 'A')
+
+
+def test_metrics_endpoint():
+    """HTTP-ендпоінт віддає метрики на /metrics"""
+    registry = Registry()
+    registry.counter('runs_total', 'Запуски').inc()
+    server = start_metrics_server(port=0, registry=registry)
+    try:
+        base_url = f'http://127.0.0.1:{server.server_address[1]}'
+        response = requests.get(f'{base_url}/metrics', timeout=5)
+        assert response.status_code == 200
+        assert 'runs_total 1.0' in response.text
+        assert requests.get(f'{base_url}/other', timeout=5).status_code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_metrics_server_disabled_without_port(monkeypatch):
+    """Без METRICS_PORT сервер не запускається"""
+    monkeypatch.delenv('METRICS_PORT', raising=False)
+    assert start_metrics_server() is None
@@ -0,0 +1,215 @@
+"""
+Тести для модуля pipeline
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import requests
+from src.data_storage import DataStorage
+from src.pipeline import TenderPipeline
+from src.prozorro_api import ProzorroAPI
+from src.subscriptions import Subscription
+
+
+class FakeNotifier:
+    """Замінник TelegramNotifier, що записує відправлені тексти"""
+
+    MAX_MESSAGE_LENGTH = 4096
+
+    def __init__(self, chat_id="123"):
+        self.chat_id = chat_id
+        self.sent = []
+
+    def format_tender_message(self, tender):
+        return f"Тендер {tender['id']}"
+
+    def format_change_message(self, tender, changes):
+        return f"Зміни {tender['id']}: {', '.join(field for field, _, _ in changes)}"
+
+    def send_message(self, text):
+        self.sent.append(text)
+        return True, None
+
+
+def make_details(tender_id, title="Послуги письмового перекладу"):
+    """Деталі активного конкурентного тендера"""
+    return {
+        "id": tender_id,
+        "tenderID": f"UA-{tender_id}",
+        "title": title,
+        "status": "active.tendering",
+        "procurementMethodType": "aboveThreshold",
+        "dateModified": "2024-01-01T10:00:00+02:00",
+        "items": [],
+    }
+
+
+class TestTenderPipeline:
+    """Тести для TenderPipeline"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = DataStorage(filepath=os.path.join(self.temp_dir, "tenders.json"))
+        self.api = ProzorroAPI(max_concurrency=3)
+        self.api.detail_cache = None
+        self.notifier = FakeNotifier()
+
+    def teardown_method(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def make_pipeline(self, pages, details, monkeypatch, subscriptions=None):
+        monkeypatch.setattr(self.api, "iter_feed_pages", lambda cursor, hours, **kwargs: iter(pages))
+        monkeypatch.setattr(self.api, "fetch_tender_details", lambda tid, date_modified=None: details.get(tid))
+        subscriptions = subscriptions or [Subscription("default", chat_id="123")]
+        return TenderPipeline(self.api, self.storage, subscriptions, {"123": self.notifier}, queue_size=2)
+
+    def test_delivers_matches_and_returns_cursor(self, monkeypatch):
+        """Відправляє знайдені тендери і повертає курсор останньої сторінки"""
+        pages = [
+            ([{"id": "t1"}, {"id": "t2"}], "c1"),
+            ([{"id": "t3"}], "c2"),
+        ]
+        details = {"t1": make_details("t1"), "t2": make_details("t2", "Ремонт даху"), "t3": make_details("t3")}
+        pipeline = self.make_pipeline(pages, details, monkeypatch)
+
+        result = asyncio.run(pipeline.run(cursor="c0"))
+
+        assert result.cursor == "c2"
+        assert result.feed_items == 3
+        assert result.matched == 2
+        assert result.sent == 2
+        assert sorted(self.notifier.sent) == ["Тендер t1", "Тендер t3"]
+        assert self.storage.is_processed("t1")
+        assert not self.storage.is_processed("t2")
+
+    def test_skips_already_processed(self, monkeypatch):
+        """Не відправляє тендери, оброблені раніше"""
+        self.storage.mark_as_processed("t1")
+        pipeline = self.make_pipeline([([{"id": "t1"}], "c1")], {"t1": make_details("t1")}, monkeypatch)
+
+        result = asyncio.run(pipeline.run())
+
+        assert result.matched == 1
+        assert result.new == 0
+        assert self.notifier.sent == []
+
+    def test_notifies_before_feed_is_exhausted(self, monkeypatch):
+        """Перше сповіщення відправляється, поки стрічка ще читається"""
+        sent_before_last_page = []
+
+        def pages():
+            yield [{"id": "t1"}], "c1"
+            # Дати конвеєру час обробити першу сторінку
+            for _ in range(100):
+                if self.notifier.sent:
+                    break
+                time.sleep(0.01)
+            sent_before_last_page.extend(self.notifier.sent)
+            yield [{"id": "t2"}], "c2"
+
+        monkeypatch.setattr(self.api, "iter_feed_pages", lambda cursor, hours, **kwargs: pages())
+        monkeypatch.setattr(self.api, "fetch_tender_details", lambda tid, date_modified=None: make_details(tid))
+        pipeline = TenderPipeline(self.api, self.storage, [Subscription("default", chat_id="123")],
+                                  {"123": self.notifier}, queue_size=1)
+
+        asyncio.run(pipeline.run())
+
+        assert sent_before_last_page == ["Тендер t1"]
+        assert len(self.notifier.sent) == 2
+
+    def test_subscriptions_of_one_chat_share_rate_limit(self, monkeypatch):
+        """Ліміт Telegram діє на чат: підписки з одним chat_id ділять обмежувач"""
+        subscriptions = [Subscription("default", chat_id="123"), Subscription("legal", chat_id="123", namespace="legal")]
+        pipeline = self.make_pipeline([], {}, monkeypatch, subscriptions)
+
+        first, second = [entry["queue"] for entry in pipeline._open_delivery_queues()]
+
+        assert first.limiter is second.limiter
+
+    def test_digest_mode_sends_once_at_end(self, monkeypatch):
+        """У режимі дайджесту всі тендери йдуть одним повідомленням наприкінці"""
+        monkeypatch.setenv("TELEGRAM_DIGEST", "1")
+        pages = [([{"id": "t1"}, {"id": "t2"}], "c1")]
+        details = {"t1": make_details("t1"), "t2": make_details("t2")}
+        pipeline = self.make_pipeline(pages, details, monkeypatch)
+
+        result = asyncio.run(pipeline.run())
+
+        assert result.sent == 2
+        assert len(self.notifier.sent) == 1
+
+    def test_failed_details_are_retried_first_next_run(self, monkeypatch):
+        """Тендер, деталі якого не завантажились, повторюється першим при наступному запуску"""
+        def failing(tid, date_modified=None):
+            raise requests.exceptions.ConnectionError("down")
+
+        pipeline = self.make_pipeline([([{"id": "t1"}], "c1")], {}, monkeypatch)
+        monkeypatch.setattr(self.api, "fetch_tender_details", failing)
+
+        result = asyncio.run(pipeline.run())
+
+        assert result.failed == 1
+        assert result.cursor == "c1"
+        assert set(self.storage.get_state(TenderPipeline.RETRY_KEY)) == {"t1"}
+
+        requested = []
+
+        def fetch(tid, date_modified=None):
+            requested.append(tid)
+            return make_details(tid)
+
+        self.api.max_concurrency = 1
+        pipeline = self.make_pipeline([([{"id": "t2"}], "c2")], {}, monkeypatch)
+        monkeypatch.setattr(self.api, "fetch_tender_details", fetch)
+
+        result = asyncio.run(pipeline.run(cursor="c1"))
+
+        assert requested[0] == "t1"
+        assert sorted(self.notifier.sent) == ["Тендер t1", "Тендер t2"]
+        assert self.storage.get_state(TenderPipeline.RETRY_KEY) == {}
+
+    def test_notifies_changes_of_sent_tenders(self, monkeypatch):
+        """Надісланий тендер з новим dateModified перевіряється за відбитком, зміни надсилаються"""
+        pipeline = self.make_pipeline([([{"id": "t1"}], "c1")], {"t1": make_details("t1")}, monkeypatch)
+        asyncio.run(pipeline.run())
+        assert self.notifier.sent == ["Тендер t1"]
+
+        requested = []
+
+        def fetch(tid, date_modified=None):
+            requested.append(tid)
+            return details[tid]
+
+        # dateModified не змінився - деталі для відстеження не запитуються
+        details = {"t1": make_details("t1")}
+        pipeline = self.make_pipeline([([{"id": "t1", "dateModified": "2024-01-01T10:00:00+02:00",
+                                          "status": "complete"}], "c2")], {}, monkeypatch)
+        monkeypatch.setattr(self.api, "fetch_tender_details", fetch)
+        result = asyncio.run(pipeline.run())
+        assert requested == []
+
+        # Змінилася лише назва - відбиток той самий, сповіщення немає
+        details = {"t1": {**make_details("t1", "Послуги письмового перекладу документів"),
+                          "dateModified": "2024-01-02T10:00:00+02:00"}}
+        pipeline = self.make_pipeline([([{"id": "t1", "dateModified": "2024-01-02T10:00:00+02:00"}], "c3")],
+                                      {}, monkeypatch)
+        monkeypatch.setattr(self.api, "fetch_tender_details", fetch)
+        result = asyncio.run(pipeline.run())
+        assert requested == ["t1"]
+        assert result.changed == 0
+
+        # Скасований тендер (не проходить фільтр стрічки) з новим дедлайном
+        details = {"t1": {**make_details("t1"), "status": "cancelled",
+                          "tenderPeriod": {"endDate": "2024-02-01T10:00:00+02:00"},
+                          "dateModified": "2024-01-03T10:00:00+02:00"}}
+        pipeline = self.make_pipeline([([{"id": "t1", "dateModified": "2024-01-03T10:00:00+02:00",
+                                          "status": "cancelled"}], "c4")], {}, monkeypatch)
+        monkeypatch.setattr(self.api, "fetch_tender_details", fetch)
+        result = asyncio.run(pipeline.run())
+
+        assert result.changed == 1
+        assert result.new == 0
+        assert self.notifier.sent[-1] == "Зміни t1: endDate, status"
+        assert self.storage.get_snapshot("t1")["status"] == "cancelled"
@@ -1,8 +1,15 @@
 """
 Тести для модуля prozorro_api
 """
+import gzip
+import io
+import json
+import threading
 import pytest
+import requests
+from urllib3 import HTTPResponse
 from src.prozorro_api import ProzorroAPI
+from src.transport import CircuitBreaker, CircuitOpenError, RetryPolicy
 
 
 class TestIsTranslationTender:
@@ -56,4 +63,221 @@ class TestIsCompetitiveProcedure:
         """Відхиляє неконкурентні типи"""
         assert self.api.is_competitive_procedure("reporting") == False
         assert self.api.is_competitive_procedure("negotiation") == False
-        assert self.api.is_competitive_procedure("") == False
\ No newline at end of file
+        assert self.api.is_competitive_procedure("") == False
+
+
+class TestGetTenderDetailsMany:
+    """Тести для паралельного завантаження деталей"""
+    
+    def test_preserves_order(self, monkeypatch):
+        """Результати йдуть у порядку переданих ID"""
+        api = ProzorroAPI(max_concurrency=4, request_interval=0)
+        monkeypatch.setattr(api, "get_tender_details", lambda tid, date_modified=None: {"id": tid})
+        
+        ids = [f"tender-{i}" for i in range(20)]
+        results = list(api.get_tender_details_many(ids))
+        
+        assert [r["id"] for r in results] == ids
+    
+    def test_sequential_mode(self, monkeypatch):
+        """max_concurrency=1 працює без пулу потоків"""
+        api = ProzorroAPI(max_concurrency=1, request_interval=0)
+        monkeypatch.setattr(api, "get_tender_details", lambda tid, date_modified=None: None)
+        
+        assert list(api.get_tender_details_many(["a", "b"])) == [None, None]
+
+
+class TestPrefilterFeedItem:
+    """Тести для попередньої фільтрації стрічки"""
+    
+    def setup_method(self):
+        self.api = ProzorroAPI()
+    
+    def test_rejects_non_competitive(self):
+        """Неконкурентна процедура відсіюється без запиту деталей"""
+        assert self.api.prefilter_feed_item({"id": "a", "procurementMethodType": "reporting"}) == False
+    
+    def test_rejects_inactive_status(self):
+        """Завершений тендер відсіюється"""
+        item = {"id": "a", "procurementMethodType": "aboveThreshold", "status": "complete"}
+        assert self.api.prefilter_feed_item(item) == False
+    
+    def test_keeps_active_competitive(self):
+        """Активна конкурентна процедура проходить далі"""
+        item = {"id": "a", "procurementMethodType": "aboveThresholdUA", "status": "active.tendering"}
+        assert self.api.prefilter_feed_item(item) == True
+    
+    def test_keeps_when_fields_missing(self):
+        """Без opt_fields рішення відкладається до деталей"""
+        assert self.api.prefilter_feed_item({"id": "a"}) == True
+
+
+class FakeResponse:
+    """Мінімальна заміна requests.Response"""
+    
+    content = b''
+    
+    def __init__(self, payload, status_code=200, headers=None):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+    
+    def close(self):
+        pass
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(str(self.status_code))
+    
+    def json(self):
+        return self._payload
+
+
+class TestGetTendersSince:
+    """Тести для інкрементального читання стрічки"""
+    
+    def test_reads_forward_until_empty_page(self, monkeypatch):
+        """Читає сторінки від курсора і повертає новий курсор"""
+        api = ProzorroAPI(request_interval=0)
+        pages = {
+            "100": FakeResponse({"data": [{"id": "a"}], "next_page": {"offset": "200"}}),
+            "200": FakeResponse({"data": [{"id": "b"}], "next_page": {"offset": "300"}}),
+            "300": FakeResponse({"data": [], "next_page": {"offset": "300"}}),
+        }
+        monkeypatch.setattr(api, "_get", lambda url, params, **kwargs: pages[params["offset"]])
+        
+        tenders, cursor = api.get_tenders_since("100")
+        
+        assert [t["id"] for t in tenders] == ["a", "b"]
+        assert cursor == "300"
+    
+    def test_falls_back_to_time_window_on_rejected_cursor(self, monkeypatch):
+        """Якщо API не приймає курсор - сканування за часовим вікном"""
+        api = ProzorroAPI(request_interval=0)
+        
+        def fake_get(url, params, **kwargs):
+            if params["offset"] == "stale":
+                return FakeResponse({}, status_code=404)
+            return FakeResponse({"data": [], "next_page": {"offset": "500"}})
+        
+        monkeypatch.setattr(api, "_get", fake_get)
+        
+        tenders, cursor = api.get_tenders_since("stale", hours=2)
+        
+        assert tenders == []
+        assert cursor == "500"
+    
+    def test_prefetches_next_page_while_caller_processes(self, monkeypatch):
+        """Наступна сторінка запитується, поки викликач ще обробляє поточну"""
+        api = ProzorroAPI(request_interval=0, feed_prefetch=True)
+        requested = {"200": threading.Event()}
+        pages = {
+            "100": FakeResponse({"data": [{"id": "a"}], "next_page": {"offset": "200"}}),
+            "200": FakeResponse({"data": [], "next_page": {"offset": "200"}}),
+        }
+        
+        def fake_get(url, params, **kwargs):
+            if params["offset"] in requested:
+                requested[params["offset"]].set()
+            return pages[params["offset"]]
+        
+        monkeypatch.setattr(api, "_get", fake_get)
+        feed = api.iter_feed_pages("100")
+        
+        assert next(feed) == ([{"id": "a"}], "200")
+        assert requested["200"].wait(timeout=5)
+        assert list(feed) == [([], "200")]
+    
+    def test_counts_wire_and_decoded_bytes(self):
+        """Для стисненої відповіді враховуються байти з мережі та після розпакування"""
+        api = ProzorroAPI(request_interval=0)
+        body = json.dumps({"data": [{"id": "a", "title": "Переклад " * 50}], "next_page": {"offset": "1"}}).encode()
+        compressed = gzip.compress(body)
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = HTTPResponse(body=io.BytesIO(compressed), headers={"Content-Encoding": "gzip"},
+                                    preload_content=False, decode_content=True)
+        
+        tenders, offset = api._read_feed_page(response)
+        
+        assert tenders[0]["id"] == "a" and offset == "1"
+        assert api.traffic() == {"wire": len(compressed), "decoded": len(body)}
+        api.reset_traffic()
+        assert api.traffic() == {"wire": 0, "decoded": 0}
+
+
+class TestResilientGet:
+    """Тести для повторів і запобіжника в _get"""
+    
+    def setup_method(self):
+        self.api = ProzorroAPI(request_interval=0)
+        self.api.retry_policy = RetryPolicy(max_retries=2, backoff_base=0, backoff_max=5)
+        self.api.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+        self.calls = 0
+    
+    def fake_session(self, monkeypatch, responses):
+        def fake_get(url, timeout, **kwargs):
+            self.calls += 1
+            result = responses.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        monkeypatch.setattr(self.api.session, "get", fake_get)
+    
+    def test_retries_server_errors(self, monkeypatch):
+        """503 і помилка з'єднання повторюються до успіху"""
+        self.fake_session(monkeypatch, [
+            FakeResponse({}, status_code=503),
+            requests.exceptions.ConnectionError("reset"),
+            FakeResponse({"data": {"id": "a"}}),
+        ])
+        
+        assert self.api.fetch_tender_details("a") == {"id": "a"}
+        assert self.calls == 3
+    
+    def test_gives_up_after_max_retries(self, monkeypatch):
+        """Після останньої спроби - виняток для fetch і None для get"""
+        self.fake_session(monkeypatch, [FakeResponse({}, status_code=502)] * 3)
+        
+        with pytest.raises(requests.exceptions.HTTPError):
+            self.api.fetch_tender_details("a")
+        assert self.calls == 3
+    
+    def test_not_found_is_not_retried(self, monkeypatch):
+        """404 - тендера немає, повтор не потрібен"""
+        self.fake_session(monkeypatch, [FakeResponse({}, status_code=404)])
+        
+        assert self.api.fetch_tender_details("a") is None
+        assert self.calls == 1
+    
+    def test_long_retry_after_is_not_waited(self, monkeypatch):
+        """Retry-After довший за backoff_max - без очікування, помилка одразу"""
+        self.fake_session(monkeypatch, [FakeResponse({}, status_code=429, headers={"Retry-After": "600"})])
+        
+        assert self.api.get_tender_details("a") is None
+        assert self.calls == 1
+    
+    def test_open_circuit_skips_requests(self, monkeypatch):
+        """Розімкнений запобіжник відхиляє запити без звернення до API"""
+        self.fake_session(monkeypatch, [FakeResponse({}, status_code=503)] * 3)
+        assert self.api.get_tender_details("a") is None
+        assert self.api.breaker.state == CircuitBreaker.OPEN
+        
+        with pytest.raises(CircuitOpenError):
+            self.api.fetch_tender_details("b")
+        assert self.calls == 3
+
+
+class TestGetRecentTendersPartial:
+    """get_recent_tenders зберігає вже прочитані сторінки"""
+    
+    def test_keeps_pages_read_before_error(self, monkeypatch):
+        api = ProzorroAPI(request_interval=0)
+        
+        def pages(hours):
+            yield [{"id": "a"}, {"id": "b"}]
+            raise requests.exceptions.ConnectionError("down")
+        
+        monkeypatch.setattr(api, "iter_recent_pages", pages)
+        
+        assert [t["id"] for t in api.get_recent_tenders(hours=2)] == ["a", "b"]
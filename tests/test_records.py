@@ -0,0 +1,78 @@
+"""
+Тести для модуля records
+"""
+import pickle
+from src.data_storage import DataStorage
+from src.records import TenderRecord
+
+
+DETAILS = {
+    "id": "a",
+    "tenderID": "UA-2024-01-01-000001-a",
+    "title": "Послуги письмового перекладу",
+    "description": "x" * 500,
+    "status": "active.tendering",
+    "dateModified": "2024-01-01T10:00:00+02:00",
+    "value": {"amount": 12000, "currency": "UAH"},
+    "tenderPeriod": {"endDate": "2024-01-10T10:00:00+02:00"},
+    "procuringEntity": {"name": "Замовник", "address": {"locality": "Київ"}},
+    "items": [{"classification": {"id": "79530000-8"}}, {"classification": {"id": "79540000-1"}}],
+    "_matched_rules": ["translation"],
+}
+
+
+def test_record_keeps_only_message_fields():
+    """Запис тримає лише поля для сповіщення, опис обрізано"""
+    record = TenderRecord.from_details(DETAILS)
+
+    assert not hasattr(record, '__dict__')
+    assert record.amount == 12000
+    assert record.customer == "Замовник"
+    assert record.cpv == ("79530000-8", "79540000-1")
+    assert len(record.description) == TenderRecord.DESCRIPTION_LENGTH
+
+
+def test_record_reads_like_details_dict():
+    """get() і [] за ключами API для коду, що працює зі словниками"""
+    record = TenderRecord.from_details(DETAILS)
+
+    assert record["id"] == "a"
+    assert record.get("tenderID") == "UA-2024-01-01-000001-a"
+    assert record.get("_matched_rules") == ("translation",)
+    assert record.get("bids", []) == []
+
+
+def test_snapshot_matches_details_snapshot():
+    """Знімок запису такий самий, як знімок повних деталей"""
+    record = TenderRecord.from_details(DETAILS)
+    assert DataStorage.make_snapshot(record) == DataStorage.make_snapshot(DETAILS)
+    assert TenderRecord.from_details(record.snapshot()).snapshot() == record.snapshot()
+
+
+def test_record_is_picklable():
+    """Запис передається між процесами (backfill)"""
+    record = TenderRecord.from_details(DETAILS)
+    assert pickle.loads(pickle.dumps(record)) == record
+
+
+def test_diff_reports_tracked_changes_only():
+    """Відбиток змінюється лише з відстежуваними полями; diff - поля з різницею"""
+    record = TenderRecord.from_details({**DETAILS, "documents": [{"id": "d1", "dateModified": "2024-01-01"}]})
+    same = TenderRecord.from_details({**DETAILS, "title": "Інша назва",
+                                      "documents": [{"id": "d1", "dateModified": "2024-01-01"}]})
+    changed = TenderRecord.from_details({
+        **DETAILS,
+        "tenderPeriod": {"endDate": "2024-01-15T10:00:00+02:00"},
+        "documents": [{"id": "d1", "dateModified": "2024-01-03"}, {"id": "d2", "dateModified": "2024-01-03"}],
+    })
+
+    assert same.tracked_hash() == record.tracked_hash()
+    assert changed.tracked_hash() != record.tracked_hash()
+    assert changed.diff(record.snapshot()) == [
+        ("endDate", "2024-01-10T10:00:00+02:00", "2024-01-15T10:00:00+02:00"),
+        ("documents", 1, 2),
+    ]
+
+    # Старий знімок без documentsHash: документи не порівнюються
+    legacy = {key: value for key, value in record.snapshot().items() if not key.startswith('documents')}
+    assert same.diff(legacy) == []
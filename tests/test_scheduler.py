@@ -0,0 +1,134 @@
+"""
+Тести для модуля scheduler
+"""
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from src.scheduler import AdaptiveInterval, TenderMonitor
+
+
+class TestAdaptiveInterval:
+    """Тести для AdaptiveInterval"""
+
+    def setup_method(self):
+        self.interval = AdaptiveInterval(business_minutes=15, idle_minutes=60, min_minutes=5,
+                                         business_hours=(8, 19), busy_feed_rate=600)
+
+    def test_business_hours_poll_more_often(self):
+        """У робочий час інтервал коротший"""
+        monday_noon = datetime(2024, 3, 4, 12, 0)
+        assert self.interval.next_interval(monday_noon) == timedelta(minutes=15)
+
+    def test_night_and_weekend_poll_less_often(self):
+        """Вночі та у вихідні - рідше"""
+        assert self.interval.next_interval(datetime(2024, 3, 4, 23, 0)) == timedelta(minutes=60)
+        assert self.interval.next_interval(datetime(2024, 3, 9, 12, 0)) == timedelta(minutes=60)
+
+    def test_busy_feed_halves_interval(self):
+        """Жвава стрічка - інтервал удвічі коротший, але не менше мінімуму"""
+        night = datetime(2024, 3, 4, 23, 0)
+        assert self.interval.next_interval(night, feed_rate=1000) == timedelta(minutes=30)
+
+        fast = AdaptiveInterval(business_minutes=6, min_minutes=5)
+        assert fast.next_interval(datetime(2024, 3, 4, 12, 0), feed_rate=1000) == timedelta(minutes=5)
+
+
+@pytest.fixture
+def monitor(monkeypatch, tmp_path):
+    """Монітор з тимчасовим сховищем"""
+    for key, value in {
+        'TELEGRAM_BOT_TOKEN': 'test',
+        'TELEGRAM_CHAT_ID': '1',
+        'STORAGE_BACKEND': 'json',
+        'STORAGE_PATH': str(tmp_path / 'processed_tenders.json'),
+        'DETAIL_CACHE_DIR': '',
+        'SUBSCRIPTIONS_FILE': '',
+        'MATCH_RULES_FILE': '',
+        'PROCESSED_TENDERS_BACKUP': '',
+        'SEARCH_INDEX_PATH': '',
+        'FEED_CURSOR_MAX_AGE_HOURS': '24',
+    }.items():
+        monkeypatch.setenv(key, value)
+    return TenderMonitor()
+
+
+class TestWindow:
+    """Вікно сканування за останньою успішною перевіркою"""
+
+    def test_default_window_without_watermark(self, monitor):
+        assert monitor._window_hours(None) == TenderMonitor.WINDOW_HOURS
+
+    def test_window_covers_gap_since_last_success(self, monitor):
+        """Вікно - від початку останньої успішної перевірки з перекриттям"""
+        last_success = datetime.now() - timedelta(hours=5)
+        assert monitor._window_hours(last_success) == pytest.approx(5 + 5 / 60, abs=0.02)
+
+    def test_window_is_capped(self, monitor):
+        """Вікно не більше FEED_CURSOR_MAX_AGE_HOURS"""
+        assert monitor._window_hours(datetime.now() - timedelta(days=10)) == 24
+
+    def test_watermark_saved_after_successful_run(self, monitor, monkeypatch):
+        """Після успішної перевірки зберігається межа наступного вікна"""
+        monkeypatch.setattr(monitor.api, "iter_feed_pages", lambda cursor, hours, **kwargs: iter([([{"id": "a"}], "c1")]))
+        monkeypatch.setattr(monitor.api, "fetch_tender_details", lambda tid, date_modified=None: None)
+
+        asyncio.run(monitor.check_new_tenders_async())
+
+        state = monitor.storage.get_state(TenderMonitor.LAST_SUCCESS_KEY)
+        assert state['feed_items'] == 1
+        assert monitor._load_last_success() is not None
+        assert monitor.feed_rate is not None
+
+    def test_watermark_kept_when_feed_fails(self, monitor, monkeypatch):
+        """Якщо стрічку не дочитано, межа вікна не зсувається"""
+        import requests
+        from src import metrics
+
+        def pages(cursor, hours, **kwargs):
+            yield [{"id": "a"}], "c1"
+            raise requests.exceptions.ConnectionError("down")
+
+        monitor.storage.set_state(TenderMonitor.LAST_SUCCESS_KEY, {'started_at': '2024-03-04T12:00:00'})
+        monkeypatch.setattr(monitor.api, "iter_feed_pages", pages)
+        monkeypatch.setattr(monitor.api, "fetch_tender_details", lambda tid, date_modified=None: None)
+        errors = metrics.RUNS.get(result='error')
+
+        asyncio.run(monitor.check_new_tenders_async())
+
+        assert monitor.storage.get_state(TenderMonitor.LAST_SUCCESS_KEY) == {'started_at': '2024-03-04T12:00:00'}
+        assert metrics.RUNS.get(result='error') == errors + 1
+
+
+def test_tail_delay_backs_off_when_feed_is_quiet(monitor):
+    """Порожня стрічка - пауза подвоюється до максимуму, нові зміни - скидається"""
+    monitor.tail_min_interval, monitor.tail_max_interval = 5, 60
+    delays = [5]
+    for _ in range(5):
+        delays.append(monitor.next_tail_delay(delays[-1], feed_items=0))
+    assert delays == [5, 10, 20, 40, 60, 60]
+    assert monitor.next_tail_delay(60, feed_items=3) == 5
+
+
+def test_overlapping_run_is_skipped(monitor, monkeypatch):
+    """Поки триває перевірка, новий запуск пропускається"""
+    calls = []
+
+    async def slow_check():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+
+    monkeypatch.setattr(monitor, "_check_new_tenders", slow_check)
+
+    async def run_both():
+        await asyncio.gather(monitor.check_new_tenders_async(), monitor.check_new_tenders_async())
+
+    asyncio.run(run_both())
+    assert calls == [1]
+
+
+def test_components_are_created_on_first_access(monitor):
+    """Монітор створює клієнт API, сховище і Telegram лише при першому зверненні"""
+    assert {'api', 'storage', 'notifiers', 'search_index', 'work_queue'}.isdisjoint(vars(monitor))
+    assert monitor.notifier is monitor.notifiers['1']
+    assert monitor.storage is monitor.storage
+    assert 'api' not in vars(monitor)
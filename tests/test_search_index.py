@@ -0,0 +1,100 @@
+"""
+Тести для модуля search_index
+"""
+import sqlite3
+from src.search_index import SearchIndex, build_query, stem
+
+
+def test_stemmer_reduces_word_forms():
+    """Відмінкові форми зводяться до спільної основи, короткі слова не скорочуються"""
+    assert stem('перекладу') == stem('перекладів') == stem('переклад') == 'переклад'
+    assert stem('послуги') == stem('послуг') == 'послуг'
+    assert stem('води') == 'води'
+    assert build_query('Переклад документів') == '"переклад"* "документ"*'
+    assert build_query(' ,. ') is None
+
+
+def test_search_finds_word_forms_and_merges_details(tmp_path):
+    """Запит знаходить інші форми слова; деталі доповнюють документ зі стрічки"""
+    index = SearchIndex(str(tmp_path / 'search.db'))
+    index.add_items([
+        {'id': 'a', 'tenderID': 'UA-1', 'title': 'Послуги перекладацьких агенцій',
+         'dateModified': '2024-05-01T10:00:00+03:00'},
+        {'id': 'b', 'tenderID': 'UA-2', 'title': 'Ремонт даху', 'dateModified': '2024-05-02T10:00:00+03:00'},
+    ])
+    # Деталі без назви не затирають назву зі стрічки
+    index.add_items([{'id': 'b', 'description': 'Письмовий переклад кошторисів',
+                      'procuringEntity': {'name': 'Київська міська рада'},
+                      'items': [{'classification': {'id': '79530000-8'}}]}])
+
+    assert [t['id'] for t in index.search('переклад')] == ['b', 'a']
+    assert [t['id'] for t in index.search('перекладів кошторису')] == ['b']
+    assert [t['id'] for t in index.search('київської міської')] == ['b']
+    assert [t['id'] for t in index.search('79530000')] == ['b']
+    assert index.search('ремонт')[0]['title'] == 'Ремонт даху'
+    assert index.search('ремонт')[0]['customer'] == 'Київська міська рада'
+    assert index.search('переклад', since='2024-05-02')[0]['id'] == 'b'
+    assert len(index.search('переклад', since='2024-05-02')) == 1
+    assert index.search('переклад', limit=1)[0]['id'] == 'b'
+    assert index.search('асфальт') == []
+    assert index.count() == 2
+    index.close()
+
+
+def test_since_compares_moments_across_offsets(tmp_path):
+    """since порівнюється як момент часу, а не як рядок з різними зсувами"""
+    index = SearchIndex(str(tmp_path / 'search.db'))
+    index.add_items([
+        # 2024-05-01 23:30 UTC
+        {'id': 'a', 'title': 'Переклад', 'dateModified': '2024-05-02T02:30:00+03:00'},
+        # 2024-05-02 00:30 UTC
+        {'id': 'b', 'title': 'Переклад', 'dateModified': '2024-05-02T02:30:00+02:00'},
+    ])
+
+    assert [t['id'] for t in index.search('переклад', since='2024-05-02T00:00:00+00:00')] == ['b']
+    assert [t['id'] for t in index.search('переклад', since='2024-05-02')] == ['b']
+    index.close()
+
+
+def test_results_are_sorted_by_date_modified(tmp_path):
+    """Старі тендери, додані пізніше (backfill), не витісняють нещодавні з limit"""
+    index = SearchIndex(str(tmp_path / 'search.db'))
+    index.add_items([{'id': 'recent', 'title': 'Переклад', 'dateModified': '2024-05-02T10:00:00+03:00'}])
+    index.add_items([{'id': f'old{i}', 'title': 'Переклад', 'dateModified': f'2023-01-0{i + 1}T10:00:00+02:00'}
+                     for i in range(3)])
+
+    assert [t['id'] for t in index.search('переклад', limit=2)] == ['recent', 'old2']
+    index.close()
+
+
+def test_upgrades_index_without_modified_at(tmp_path):
+    """Індекс попередньої версії отримує modified_at зі збережених dateModified"""
+    path = str(tmp_path / 'search.db')
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE tenders (id INTEGER PRIMARY KEY, tender_id TEXT NOT NULL UNIQUE, tender_code TEXT,
+                              title TEXT, description TEXT, cpv TEXT, customer TEXT, status TEXT,
+                              date_modified TEXT);
+        CREATE INDEX idx_tenders_date_modified ON tenders(date_modified);
+        CREATE VIRTUAL TABLE tenders_fts USING fts5(stems);
+        INSERT INTO tenders (id, tender_id, title, date_modified)
+            VALUES (1, 'a', 'Переклад', '2024-05-02T02:30:00+02:00');
+        INSERT INTO tenders_fts (rowid, stems) VALUES (1, 'переклад');
+    """)
+    conn.close()
+
+    index = SearchIndex(path)
+
+    assert [t['id'] for t in index.search('переклад', since='2024-05-02')] == ['a']
+    index.close()
+
+
+def test_from_env_can_disable_index(tmp_path, monkeypatch):
+    """Порожній SEARCH_INDEX_PATH вимикає індекс"""
+    monkeypatch.setenv('SEARCH_INDEX_PATH', '')
+    assert SearchIndex.from_env() is None
+
+    monkeypatch.setenv('SEARCH_INDEX_PATH', str(tmp_path / 'nested' / 'search.db'))
+    index = SearchIndex.from_env()
+    assert index is not None and index.count() == 0
+    index.close()
@@ -0,0 +1,181 @@
+"""
+Тести для модуля sqlite_storage
+"""
+import pytest
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+from src.sqlite_storage import SQLiteStorage
+
+
+class TestSQLiteStorage:
+    """Тести для SQLiteStorage"""
+    
+    def setup_method(self):
+        """Створити тимчасову базу перед кожним тестом"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "tenders.db")
+        self.json_path = os.path.join(self.temp_dir, "processed_tenders.json")
+        self.storage = SQLiteStorage(self.db_path, json_path=self.json_path)
+    
+    def teardown_method(self):
+        """Видалити тимчасові файли після тесту"""
+        self.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_mark_and_check(self):
+        """Після mark_as_processed тендер має бути в оброблених"""
+        assert self.storage.is_processed("tender-1") == False
+        
+        self.storage.mark_as_processed("tender-1")
+        
+        assert self.storage.is_processed("tender-1") == True
+    
+    def test_mark_many_no_duplicates(self):
+        """mark_many не додає дублікати"""
+        self.storage.mark_many(["tender-1", "tender-2", "tender-1"])
+        self.storage.mark_many(["tender-2", "tender-3"])
+        
+        assert self.storage.get_processed_count() == 3
+    
+    def test_cleanup_old_tenders(self):
+        """Очищення видаляє записи старші за N днів"""
+        old_date = (datetime.now() - timedelta(days=100)).isoformat()
+        self.storage.import_data({"processed_tenders": {"old-tender": old_date}})
+        self.storage.mark_as_processed("new-tender")
+        
+        self.storage.cleanup_old_tenders(days=90)
+        
+        assert self.storage.is_processed("old-tender") == False
+        assert self.storage.is_processed("new-tender") == True
+    
+    def test_migrates_from_json(self):
+        """При першому запуску історія переноситься з JSON-файлу"""
+        self.storage.close()
+        os.remove(self.db_path)
+        with open(self.json_path, 'w') as f:
+            json.dump({
+                "processed_tenders": {"a": datetime.now().isoformat(), "b": datetime.now().isoformat()},
+                "last_check": None,
+                "state": {"feed_cursor": {"offset": "123"}}
+            }, f)
+        
+        self.storage = SQLiteStorage(self.db_path, json_path=self.json_path)
+        
+        assert self.storage.get_processed_count() == 2
+        assert self.storage.get_state("feed_cursor") == {"offset": "123"}
+    
+    def test_does_not_remigrate_namespaced_history(self, capsys):
+        """База лише з історією підписок не перезаписується старим JSON при перезапуску"""
+        self.storage.close()
+        os.remove(self.db_path)
+        with open(self.json_path, 'w') as f:
+            json.dump({
+                "processed_tenders": {"a": datetime.now().isoformat()},
+                "last_check": None,
+                "state": {"feed_cursor": "OLD"}
+            }, f)
+        
+        # Історія є лише в просторі імен підписки
+        self.storage = SQLiteStorage(self.db_path, json_path=None)
+        self.storage.mark_as_processed("b", namespace="legal")
+        self.storage.set_state("feed_cursor", "NEW")
+        self.storage.close()
+        capsys.readouterr()
+        
+        self.storage = SQLiteStorage(self.db_path, json_path=self.json_path)
+        
+        assert self.storage.get_state("feed_cursor") == "NEW"
+        assert self.storage.get_processed_count() == 0
+        assert "Перенесено" not in capsys.readouterr().out
+    
+    def test_restores_from_env_backup(self, monkeypatch):
+        """Порожня база відновлюється з PROCESSED_TENDERS_BACKUP (старий формат списку)"""
+        self.storage.close()
+        os.remove(self.db_path)
+        monkeypatch.setenv("PROCESSED_TENDERS_BACKUP", json.dumps({"processed_tenders": ["x", "y"]}))
+        
+        self.storage = SQLiteStorage(self.db_path, json_path=None)
+        
+        assert sorted(self.storage.get_processed_ids()) == ["x", "y"]
+    
+    def test_snapshot_and_seen(self):
+        """Знімок тендера та останній dateModified зберігаються"""
+        tender = {
+            "id": "t1", "tenderID": "UA-1", "title": "Переклад", "dateModified": "2026-01-01T10:00:00",
+            "value": {"amount": 1000.0, "currency": "UAH"},
+            "items": [{"classification": {"id": "79530000-8"}}],
+        }
+        self.storage.save_snapshot(tender)
+        self.storage.record_seen([("t1", "2026-01-01T10:00:00")])
+        
+        snapshot = self.storage.get_snapshot("t1")
+        assert snapshot["amount"] == 1000.0
+        assert snapshot["cpv"] == ["79530000-8"]
+        assert self.storage.get_seen_date_modified("t1") == "2026-01-01T10:00:00"
+    
+    def test_namespaces_are_independent(self):
+        """Історія підписок ведеться окремо від основної"""
+        self.storage.mark_many(["a", "b"], namespace="clients")
+        self.storage.mark_as_processed("a")
+        
+        assert self.storage.get_processed_count("clients") == 2
+        assert self.storage.get_processed_count() == 1
+        assert self.storage.is_processed("b") == False
+    
+    def test_upgrades_schema_without_namespaces(self):
+        """База першої версії схеми оновлюється зі збереженням історії"""
+        self.storage.close()
+        os.remove(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE processed (tender_id TEXT PRIMARY KEY, processed_at REAL NOT NULL)")
+        conn.execute("INSERT INTO processed VALUES ('old', ?)", (datetime.now().timestamp(),))
+        conn.commit()
+        conn.close()
+        
+        self.storage = SQLiteStorage(self.db_path, json_path=None)
+        
+        assert self.storage.is_processed("old") == True
+        self.storage.mark_as_processed("old", namespace="clients")
+        assert self.storage.get_processed_count("clients") == 1
+    
+    def test_tracked_snapshots_survive_schema_upgrade(self):
+        """Знімки з бази версії 2 лишаються відстежуваними (без відбитка), нові - з відбитком"""
+        self.storage.close()
+        os.remove(self.db_path)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("CREATE TABLE snapshots (tender_id TEXT PRIMARY KEY, date_modified TEXT, "
+                     "saved_at REAL NOT NULL, data TEXT NOT NULL)")
+        conn.execute("INSERT INTO snapshots VALUES ('old', '2026-01-01', 0, '{\"id\": \"old\"}')")
+        conn.execute("PRAGMA user_version = 2")
+        conn.commit()
+        conn.close()
+        
+        self.storage = SQLiteStorage(self.db_path, json_path=None)
+        self.storage.save_snapshot({"id": "new", "dateModified": "2026-01-02", "status": "active.tendering"})
+        
+        tracked = self.storage.get_tracked(["old", "new", "missing"])
+        assert tracked["old"] == ("2026-01-01", "")
+        assert tracked["new"][0] == "2026-01-02"
+        assert len(tracked["new"][1]) == 16
+        assert "missing" not in tracked
+    
+    def test_outbox_complete_marks_and_removes_together(self):
+        """Відправлене сповіщення прибирається з outbox разом з позначкою тендера"""
+        entries = [{"key": f"clients:new:{tid}", "namespace": "clients", "tender_ids": [tid], "text": tid}
+                   for tid in ("a", "b")]
+        assert self.storage.outbox_add(entries) == 2
+        assert self.storage.outbox_add(entries[:1]) == 0
+        
+        assert self.storage.outbox_complete(["clients:new:a"], namespace="clients") == 1
+        assert self.storage.outbox_complete(["clients:new:a"], namespace="clients") == 0
+        
+        self.storage.close()
+        self.storage = SQLiteStorage(self.db_path, json_path=None)
+        assert self.storage.is_processed("a", "clients") == True
+        assert self.storage.is_processed("b", "clients") == False
+        assert [entry["key"] for entry in self.storage.outbox_pending("clients")] == ["clients:new:b"]
+        assert self.storage.outbox_pending() == []
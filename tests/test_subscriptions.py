@@ -0,0 +1,58 @@
+"""
+Тести для модуля subscriptions
+"""
+import pytest
+import json
+import os
+import tempfile
+from src.subscriptions import Subscription, load_subscriptions
+
+
+class TestSubscription:
+    """Тести для Subscription"""
+    
+    def test_accepts_by_matched_rules(self):
+        """Підписка приймає тендер, якщо збіглося хоч одне її правило"""
+        subscription = Subscription("s", chat_id="1", rules=["interpretation"])
+        
+        assert subscription.accepts({"_matched_rules": ["translation", "interpretation"]}) == True
+        assert subscription.accepts({"_matched_rules": ["translation"]}) == False
+    
+    def test_without_rules_accepts_everything(self):
+        """Підписка без списку правил приймає всі знайдені тендери"""
+        assert Subscription("s", chat_id="1").accepts({"_matched_rules": ["any"]}) == True
+    
+    def test_default_subscription(self, monkeypatch):
+        """Без файлу - одна підписка в TELEGRAM_CHAT_ID з основною історією"""
+        monkeypatch.setenv("SUBSCRIPTIONS_FILE", "")
+        monkeypatch.setenv("TELEGRAM_CHAT_ID", "42")
+        
+        subscriptions = load_subscriptions()
+        
+        assert len(subscriptions) == 1
+        assert subscriptions[0].chat_id == "42"
+        assert subscriptions[0].namespace == ""
+    
+    def test_load_from_file(self, monkeypatch):
+        """Простір імен за замовчуванням - назва підписки"""
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump({"subscriptions": [
+                {"name": "main", "chat_id": 1, "namespace": ""},
+                {"name": "clients", "chat_id": "-100", "rules": ["translation"]},
+            ]}, f)
+        monkeypatch.setenv("SUBSCRIPTIONS_FILE", f.name)
+        try:
+            subscriptions = load_subscriptions()
+        finally:
+            os.remove(f.name)
+        
+        assert [s.namespace for s in subscriptions] == ["", "clients"]
+        assert subscriptions[0].chat_id == "1"
+        assert subscriptions[1].rules == {"translation"}
+    
+    def test_example_config_is_valid(self, monkeypatch):
+        """Приклад конфігурації з репозиторію завантажується"""
+        path = os.path.join(os.path.dirname(__file__), "..", "config", "subscriptions.example.json")
+        monkeypatch.setenv("SUBSCRIPTIONS_FILE", path)
+        
+        assert len(load_subscriptions()) == 2
@@ -0,0 +1,88 @@
+"""
+Тести для модуля transport
+"""
+import pytest
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from src.transport import CircuitBreaker, CircuitOpenError, RetryPolicy, retry_after_seconds
+
+
+class FakeResponse:
+    """Відповідь лише з заголовками"""
+    
+    def __init__(self, headers):
+        self.headers = headers
+
+
+class TestRetryPolicy:
+    """Тести для RetryPolicy"""
+    
+    def test_backoff_is_bounded(self):
+        """Затримка не перевищує base * 2^n і backoff_max"""
+        policy = RetryPolicy(max_retries=5, backoff_base=1, backoff_max=3)
+        for _ in range(50):
+            assert 0 <= policy.backoff(0) <= 1
+            assert 0 <= policy.backoff(5) <= 3
+
+
+class TestRetryAfter:
+    """Тести для retry_after_seconds"""
+    
+    def test_seconds(self):
+        assert retry_after_seconds(FakeResponse({'Retry-After': '7'})) == 7
+    
+    def test_http_date(self):
+        moment = datetime.now(timezone.utc) + timedelta(seconds=30)
+        value = retry_after_seconds(FakeResponse({'Retry-After': format_datetime(moment, usegmt=True)}))
+        assert 25 <= value <= 30
+    
+    def test_missing_or_invalid(self):
+        assert retry_after_seconds(FakeResponse({})) is None
+        assert retry_after_seconds(FakeResponse({'Retry-After': 'soon'})) is None
+
+
+class TestCircuitBreaker:
+    """Тести для CircuitBreaker"""
+    
+    def test_opens_after_threshold(self):
+        """Після порогу помилок поспіль запити відхиляються"""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.before_request()
+        breaker.record_failure()
+        breaker.before_request()
+        breaker.record_failure()
+        
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+    
+    def test_success_resets_failures(self):
+        """Успіх між помилками не дає розімкнутися"""
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.CLOSED
+    
+    def test_half_open_allows_single_probe(self):
+        """Після reset_timeout пропускається один пробний запит"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        
+        breaker.before_request()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.before_request()
+        
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        breaker.before_request()
+    
+    def test_failed_probe_reopens(self):
+        """Невдалий пробний запит знову розмикає запобіжник"""
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=0)
+        for _ in range(3):
+            breaker.record_failure()
+        breaker.before_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
@@ -0,0 +1,95 @@
+"""
+Тести для модуля work_queue
+"""
+import asyncio
+import threading
+from src.data_storage import DataStorage
+from src.pipeline import TenderPipeline
+from src.prozorro_api import ProzorroAPI
+from src.subscriptions import Subscription
+from src.work_queue import WorkQueue, run_worker
+from tests.test_pipeline import FakeNotifier, make_details
+
+
+def test_lease_fencing_and_acknowledgement(tmp_path):
+    """Прострочена оренда видається знову, а результат старої відкидається"""
+    queue = WorkQueue(str(tmp_path / 'queue.db'), lease_seconds=60)
+    queue.put([('t1', 'd1', None), ('t2', 'd1', 'hash')])
+    queue.put([('t1', 'd1', None)])
+
+    first = queue.lease('a', 10)
+    assert [job[1:] for job in first] == [('t1', 'd1', None), ('t2', 'd1', 'hash')]
+    assert queue.lease('b', 10) == []
+
+    # Виконавець a "завис": оренда t1 прострочена і дісталася b
+    queue._conn.execute("UPDATE jobs SET lease_until = 0 WHERE tender_id = 't1'")
+    second = queue.lease('b', 10)
+    assert [job[1] for job in second] == ['t1']
+
+    assert queue.complete([(first[0][0], 't1', {'failed': False, 'from': 'a'}),
+                           (first[1][0], 't2', {'failed': False, 'from': 'a'})]) == 1
+    assert queue.complete([(second[0][0], 't1', {'failed': False, 'from': 'b'})]) == 1
+
+    collected = {tender_id: outcome['from'] for tender_id, _, _, outcome in queue.collect()}
+    assert collected == {'t1': 'b', 't2': 'a'}
+    assert queue.collect() == []
+
+    # Координатор упав до ack: наступний запуск отримає результати знову
+    assert queue.restore() == 2
+    assert len(queue.collect()) == 2
+    # Тендер змінився до ack - нове завдання не видаляється
+    queue.put([('t2', 'd2', None)])
+    queue.ack(['t1', 't2'])
+    assert queue.counts() == {'pending': 1, 'leased': 0, 'done': 0, 'collected': 0}
+    queue.close()
+
+
+def test_job_fails_after_max_leases(tmp_path):
+    """Завдання, яке жоден виконавець не повернув, стає невдалим"""
+    queue = WorkQueue(str(tmp_path / 'queue.db'), lease_seconds=0)
+    queue.put([('t1', 'd1', None)])
+    for _ in range(WorkQueue.MAX_LEASES):
+        assert len(queue.lease('a', 1)) == 1
+    assert queue.lease('a', 1) == []
+    assert queue.collect()[0][3] == {'failed': True}
+    queue.close()
+
+
+def test_coordinator_notifies_once_with_several_workers(tmp_path, monkeypatch):
+    """Кожен знайдений тендер надсилається один раз, хоч деталі обробляють кілька виконавців"""
+    monkeypatch.setenv('TELEGRAM_RATE_PER_MINUTE', '60000')
+    api = ProzorroAPI(max_concurrency=2)
+    api.detail_cache = None
+    ids = [f't{i}' for i in range(40)]
+    details = {tender_id: make_details(tender_id, 'Послуги письмового перекладу' if i % 4 == 0 else 'Ремонт')
+               for i, tender_id in enumerate(ids)}
+    pages = [([{'id': tender_id} for tender_id in ids[i:i + 10]], f'c{i}') for i in range(0, 40, 10)]
+    monkeypatch.setattr(api, 'iter_feed_pages', lambda cursor, hours, **kwargs: iter(pages))
+    monkeypatch.setattr(api, 'fetch_tender_details', lambda tid, date_modified=None: details.get(tid))
+
+    path = str(tmp_path / 'queue.db')
+    stop = threading.Event()
+    workers = [threading.Thread(target=run_worker, args=(WorkQueue(path), api),
+                                kwargs={'batch': 3, 'poll_seconds': 0.01, 'stop': stop})
+               for _ in range(3)]
+    for worker in workers:
+        worker.start()
+
+    notifier = FakeNotifier()
+    storage = DataStorage(str(tmp_path / 'tenders.json'))
+    queue = WorkQueue(path)
+    try:
+        for _ in range(2):
+            pipeline = TenderPipeline(api, storage, [Subscription('default', chat_id='123')], {'123': notifier},
+                                      work_queue=queue, job_timeout=10)
+            result = asyncio.run(pipeline.run(cursor='c0'))
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+    assert sorted(notifier.sent) == sorted(f'Тендер {tender_id}' for tender_id in ids[::4])
+    assert result.candidates == 40 and result.new == 0
+    assert result.stats['title'] == 10
+    assert queue.counts() == {'pending': 0, 'leased': 0, 'done': 0, 'collected': 0}
+    queue.close()